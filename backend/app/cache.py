@@ -1,8 +1,13 @@
+import asyncio
 import hashlib
+import json
+import threading
 import time
+from collections import OrderedDict
 from typing import Optional
 
-_cache = {}
+from .disk_cache import DiskCache
+from .settings import settings
 
 
 def key_for_messages(messages: list[dict], model_hint: str = "") -> str:
@@ -12,18 +17,132 @@ def key_for_messages(messages: list[dict], model_hint: str = "") -> str:
     return hashlib.sha256(s.encode()).hexdigest()
 
 
-def cache_get(k: str, ttl: int) -> Optional[dict]:
-    """Get cached value if not expired."""
-    item = _cache.get(k)
-    if not item:
-        return None
-    if time.time() - item["ts"] > ttl:
-        _cache.pop(k, None)
-        return None
-    return item["val"]
+class ResponseCache:
+    """In-memory LRU cache with a TTL and entry-count/byte budgets.
 
+    Entry size is the length of the JSON-encoded value plus the key, which
+    tracks the real footprint closely enough to keep memory bounded.
+    """
 
-def cache_set(k: str, val: dict):
-    """Set a value in cache with current timestamp."""
-    _cache[k] = {"ts": time.time(), "val": val}
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._items: "OrderedDict[str, tuple[float, int, dict]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
 
+    def get(self, k: str, ttl: int) -> Optional[dict]:
+        with self._lock:
+            item = self._items.get(k)
+            if item is None:
+                self.misses += 1
+                return None
+            ts, _, val = item
+            if time.time() - ts > ttl:
+                self._remove(k)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._items.move_to_end(k)
+            self.hits += 1
+            return val
+
+    def set(self, k: str, val: dict, ts: Optional[float] = None):
+        """Store ``val``; ``ts`` backdates the entry (e.g. when promoting from disk)."""
+        size = len(k) + len(json.dumps(val, default=str))
+        with self._lock:
+            if k in self._items:
+                self._remove(k)
+            if size > self.max_bytes:
+                return
+            self._items[k] = (time.time() if ts is None else ts, size, val)
+            self._bytes += size
+            while len(self._items) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._items))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def sweep(self, ttl: int) -> int:
+        """Drop every expired entry; returns the number removed."""
+        cutoff = time.time() - ttl
+        with self._lock:
+            expired = [k for k, (ts, _, _) in self._items.items() if ts < cutoff]
+            for k in expired:
+                self._remove(k)
+            self.expirations += len(expired)
+        return len(expired)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._items),
+            "bytes": self._bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+    def _remove(self, k: str):
+        _, size, _ = self._items.pop(k)
+        self._bytes -= size
+
+
+_cache = ResponseCache(settings.CACHE_MAX_ENTRIES, settings.CACHE_MAX_BYTES)
+_disk_cache: Optional[DiskCache] = (
+    DiskCache(settings.CACHE_DISK_PATH, settings.CACHE_DISK_MAX_ENTRIES, settings.CACHE_DISK_MAX_BYTES)
+    if settings.CACHE_DISK_ENABLED
+    else None
+)
+
+
+async def cache_get(k: str, ttl: int) -> Optional[dict]:
+    """Get cached value if not expired (memory first, then the disk tier).
+
+    The SQLite lookup can wait on the busy timeout, so it runs in a thread.
+    """
+    val = _cache.get(k, ttl)
+    if val is None and _disk_cache is not None:
+        entry = await asyncio.to_thread(_disk_cache.get_entry, k, ttl)
+        if entry is not None:
+            ts, val = entry
+            # Read-through: promote so the next lookup stays in memory, keeping
+            # the disk row's timestamp so the entry still expires on schedule
+            _cache.set(k, val, ts=ts)
+    return val
+
+
+async def cache_set(k: str, val: dict):
+    """Set a value in cache with current timestamp (written through to disk off the event loop)."""
+    _cache.set(k, val)
+    if _disk_cache is not None:
+        await asyncio.to_thread(_disk_cache.set, k, val)
+
+
+def cache_stats() -> dict:
+    """Hit/miss/eviction counters and current size of the response cache."""
+    stats = _cache.stats()
+    if _disk_cache is not None:
+        stats["disk"] = _disk_cache.stats()
+    return stats
+
+
+async def run_cache_sweeper():
+    """Periodically purge expired entries so unread keys don't linger until evicted."""
+    while True:
+        await asyncio.sleep(settings.CACHE_SWEEP_INTERVAL_SECONDS)
+        _cache.sweep(settings.CACHE_TTL_SECONDS)
+        if _disk_cache is not None:
+            await asyncio.to_thread(_disk_cache.sweep, settings.CACHE_TTL_SECONDS)
@@ -0,0 +1,175 @@
+"""
+Circuit breakers for the Ollama and Anthropic upstreams.
+
+A breaker is closed while its upstream is healthy. It opens when, over the
+last BREAKER_WINDOW_SECONDS and at least BREAKER_MIN_REQUESTS calls, the
+share of failed calls reaches BREAKER_ERROR_RATE or the share of calls
+slower than BREAKER_SLOW_MS[name] reaches BREAKER_SLOW_RATE. While open,
+calls raise CircuitOpenError at once, so the router falls back to the other
+model (or returns 503) instead of waiting out the upstream timeout. After
+BREAKER_OPEN_SECONDS the breaker goes half-open and lets
+BREAKER_HALF_OPEN_PROBES real requests through; one good call closes it and
+a bad one re-opens it.
+
+Per-host ejection within the Ollama pool is separate (see ollama_pool.py);
+this breaker covers the local backend as a whole.
+"""
+
+import time
+from collections import deque
+from typing import Deque, Tuple
+
+import httpx
+
+from .metrics import Counter, Gauge
+from .settings import settings
+
+CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+BREAKER_STATE = Gauge("router_circuit_state", "Circuit breaker state (0 closed, 1 half-open, 2 open)", ["backend"])
+BREAKER_REJECTIONS = Counter("router_circuit_rejections", "Calls failed fast by an open circuit breaker", ["backend"])
+
+
+class CircuitOpenError(RuntimeError):
+    pass
+
+
+def _is_failure(exc: BaseException) -> bool:
+    if isinstance(exc, httpx.HTTPStatusError):
+        # Client errors are the request's fault, not the upstream's
+        return exc.response is None or exc.response.status_code >= 500 or exc.response.status_code == 429
+    return True
+
+
+class _Call:
+    __slots__ = ("breaker", "timed", "probe", "start")
+
+    def __init__(self, breaker: "CircuitBreaker", timed: bool, probe: bool):
+        self.breaker = breaker
+        self.timed = timed
+        self.probe = probe
+
+    def __enter__(self):
+        self.start = time.monotonic()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None and not issubclass(exc_type, Exception):
+            # Cancelled or closed early: no verdict on the upstream
+            self.breaker._release(self.probe)
+            return False
+        elapsed_ms = (time.monotonic() - self.start) * 1000
+        failed = exc is not None and _is_failure(exc)
+        slow = self.timed and elapsed_ms > settings.BREAKER_SLOW_MS.get(self.breaker.name, float("inf"))
+        self.breaker._record(failed, slow, self.probe)
+        return False
+
+
+class CircuitBreaker:
+    def __init__(self, name: str):
+        self.name = name
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self._outcomes: Deque[Tuple[float, bool, bool]] = deque()  # (time, failed, slow)
+        self._probes = 0
+        self.times_opened = 0
+        self.rejected = 0
+        self._state_gauge = BREAKER_STATE.labels(name)
+        self._rejections = BREAKER_REJECTIONS.labels(name)
+
+    def _advance(self, now: float):
+        if self.state == OPEN and now - self.opened_at >= settings.BREAKER_OPEN_SECONDS:
+            self._set_state(HALF_OPEN)
+            self._probes = 0
+
+    def is_open(self) -> bool:
+        """Whether the breaker is open right now (an expired open period counts as half-open)."""
+        self._advance(time.monotonic())
+        return self.state == OPEN
+
+    def check(self):
+        """Raise CircuitOpenError if a call would be rejected right now."""
+        self._advance(time.monotonic())
+        if self.state == OPEN or (self.state == HALF_OPEN and self._probes >= settings.BREAKER_HALF_OPEN_PROBES):
+            self.rejected += 1
+            self._rejections.inc()
+            retry_in = max(settings.BREAKER_OPEN_SECONDS - (time.monotonic() - self.opened_at), 0)
+            raise CircuitOpenError(f"{self.name} circuit is open (retry in {retry_in:.0f}s)")
+
+    def call(self, timed: bool = True) -> _Call:
+        """Guard one upstream call: ``with breaker.call(): ...``.
+
+        ``timed=False`` skips the slow-call check, for streams whose duration
+        depends on the answer length.
+        """
+        self.check()
+        probe = self.state == HALF_OPEN
+        if probe:
+            self._probes += 1
+        return _Call(self, timed, probe)
+
+    def _release(self, probe: bool):
+        if probe:
+            self._probes -= 1
+
+    def _record(self, failed: bool, slow: bool, probe: bool):
+        now = time.monotonic()
+        if probe:
+            self._probes -= 1
+            if self.state == HALF_OPEN:
+                if failed or slow:
+                    self._open(now)
+                else:
+                    self._close()
+            return
+        if self.state != CLOSED:
+            return  # started before the breaker opened
+        window = self._outcomes
+        window.append((now, failed, slow))
+        cutoff = now - settings.BREAKER_WINDOW_SECONDS
+        while window and window[0][0] < cutoff:
+            window.popleft()
+        if len(window) < settings.BREAKER_MIN_REQUESTS:
+            return
+        failures = sum(1 for _, f, _ in window if f)
+        slow_calls = sum(1 for _, _, s in window if s)
+        if failures >= settings.BREAKER_ERROR_RATE * len(window):
+            self._open(now, f"{failures}/{len(window)} calls failed")
+        elif slow_calls >= settings.BREAKER_SLOW_RATE * len(window):
+            self._open(now, f"{slow_calls}/{len(window)} calls were slow")
+
+    def _open(self, now: float, reason: str = "half-open probe failed"):
+        self.opened_at = now
+        self.times_opened += 1
+        self._outcomes.clear()
+        self._set_state(OPEN)
+        print(f"Circuit breaker {self.name} opened: {reason}")
+
+    def _close(self):
+        self._set_state(CLOSED)
+        print(f"Circuit breaker {self.name} closed")
+
+    def _set_state(self, state: str):
+        self.state = state
+        self._state_gauge.set(_STATE_VALUES[state])
+
+    def stats(self) -> dict:
+        self._advance(time.monotonic())
+        window = self._outcomes
+        return {
+            "state": self.state,
+            "window_calls": len(window),
+            "window_failures": sum(1 for _, f, _ in window if f),
+            "window_slow": sum(1 for _, _, s in window if s),
+            "times_opened": self.times_opened,
+            "rejected": self.rejected,
+        }
+
+
+ollama_breaker = CircuitBreaker("ollama")
+claude_breaker = CircuitBreaker("claude")
+
+
+def breaker_stats() -> dict:
+    return {b.name: b.stats() for b in (ollama_breaker, claude_breaker)}
@@ -0,0 +1,99 @@
+"""
+Tiny hashed-feature logistic regression for routing decisions.
+
+Pure Python so it adds no dependencies: features are hashed token
+unigrams/bigrams plus a few named numeric features, weights are trained
+offline with SGD from the logs table and stored as JSON.
+"""
+
+import json
+import math
+import random
+import re
+import zlib
+from typing import Dict, List, Optional, Sequence
+
+_TOKEN = re.compile(r"\w+")
+
+
+def hashed_features(text: str, n_buckets: int, extra: Optional[Dict[str, float]] = None) -> Dict[int, float]:
+    """Map text to {bucket: weight} using stable crc32 hashing of unigrams and bigrams."""
+    tokens = _TOKEN.findall(text.lower())
+    feats: Dict[int, float] = {}
+    grams = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+    if grams:
+        # Normalize so long prompts don't dominate through sheer term count
+        w = 1.0 / math.sqrt(len(grams))
+        for g in grams:
+            idx = zlib.crc32(g.encode()) % n_buckets
+            feats[idx] = feats.get(idx, 0.0) + w
+    for name, value in (extra or {}).items():
+        idx = n_buckets + zlib.crc32(f"__{name}".encode()) % 64
+        feats[idx] = feats.get(idx, 0.0) + value
+    return feats
+
+
+class LogisticModel:
+    def __init__(self, n_buckets: int = 4096, weights: Optional[List[float]] = None, bias: float = 0.0,
+                 meta: Optional[dict] = None):
+        self.n_buckets = n_buckets
+        # 64 extra slots for named numeric features
+        self.weights = weights or [0.0] * (n_buckets + 64)
+        self.bias = bias
+        self.meta = meta or {}
+
+    def features(self, text: str, extra: Optional[Dict[str, float]] = None) -> Dict[int, float]:
+        return hashed_features(text, self.n_buckets, extra)
+
+    def predict_proba(self, feats: Dict[int, float]) -> float:
+        z = self.bias + sum(self.weights[i] * v for i, v in feats.items())
+        if z < -30:
+            return 0.0
+        return 1.0 / (1.0 + math.exp(-z))
+
+    def fit(self, samples: Sequence[Dict[int, float]], labels: Sequence[int],
+            epochs: int = 10, lr: float = 0.5, l2: float = 1e-4, seed: int = 0):
+        order = list(range(len(samples)))
+        rng = random.Random(seed)
+        for _ in range(epochs):
+            rng.shuffle(order)
+            for i in order:
+                feats, y = samples[i], labels[i]
+                err = self.predict_proba(feats) - y
+                self.bias -= lr * err
+                for j, v in feats.items():
+                    self.weights[j] -= lr * (err * v + l2 * self.weights[j])
+        return self
+
+    def save(self, path: str):
+        with open(path, "w") as f:
+            json.dump({"n_buckets": self.n_buckets, "bias": self.bias, "weights": self.weights, "meta": self.meta}, f)
+
+    @classmethod
+    def load(cls, path: str) -> "LogisticModel":
+        with open(path) as f:
+            data = json.load(f)
+        return cls(data["n_buckets"], data["weights"], data["bias"], data.get("meta"))
+
+
+def evaluate(model: LogisticModel, samples: Sequence[Dict[int, float]], labels: Sequence[int],
+             threshold: float = 0.5) -> dict:
+    """Accuracy/precision/recall of ``model`` on held-out samples."""
+    tp = fp = tn = fn = 0
+    for feats, y in zip(samples, labels):
+        pred = model.predict_proba(feats) >= threshold
+        if pred and y:
+            tp += 1
+        elif pred:
+            fp += 1
+        elif y:
+            fn += 1
+        else:
+            tn += 1
+    total = tp + fp + tn + fn
+    return {
+        "samples": total,
+        "accuracy": round((tp + tn) / total, 4) if total else 0.0,
+        "precision": round(tp / (tp + fp), 4) if tp + fp else 0.0,
+        "recall": round(tp / (tp + fn), 4) if tp + fn else 0.0,
+    }
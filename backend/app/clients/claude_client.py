@@ -1,12 +1,17 @@
+import json
 from typing import List, Tuple, Optional
 
-import requests
-from requests import HTTPError
+from httpx import HTTPStatusError
 
+from ..circuit_breaker import claude_breaker
+from ..metrics import FALLBACKS
 from ..settings import settings
+from .http import get_client
 
 ANTHROPIC_VERSION = "2023-06-01"
 
+_COMPLETE_FALLBACKS = FALLBACKS.labels("claude_complete")
+
 
 def _convert_messages(messages: List[dict]) -> Tuple[Optional[str], List[dict]]:
     """Convert OpenAI-style messages to Anthropic's message format."""
@@ -38,7 +43,7 @@ def _convert_messages(messages: List[dict]) -> Tuple[Optional[str], List[dict]]:
     return system_prompt, converted
 
 
-def chat(messages, model=None, temperature=0.2, max_tokens: Optional[int] = None, tools=None):
+async def chat(messages, model=None, temperature=0.2, max_tokens: Optional[int] = None, tools=None):
     """Call Anthropic Claude messages endpoint and return OpenAI-compatible shape."""
     if not settings.ANTHROPIC_API_KEY:
         raise RuntimeError("Anthropic API key is not configured.")
@@ -59,23 +64,96 @@ def chat(messages, model=None, temperature=0.2, max_tokens: Optional[int] = None
     if tools:
         payload["tools"] = tools
 
-    try:
-        response = _post_messages(payload)
-        data = response.json()
-        return _parse_messages_response(data)
-    except HTTPError as exc:
-        if exc.response is not None and exc.response.status_code == 404:
-            # Older accounts may not have the Messages API enabled yet.
-            return _call_complete(messages, system_prompt, model, temperature, max_tokens)
-        raise
+    with claude_breaker.call():
+        try:
+            response = await _post_messages(payload)
+            data = response.json()
+            return _parse_messages_response(data)
+        except HTTPStatusError as exc:
+            if exc.response is not None and exc.response.status_code == 404:
+                # Older accounts may not have the Messages API enabled yet.
+                _COMPLETE_FALLBACKS.inc()
+                return await _call_complete(messages, system_prompt, model, temperature, max_tokens)
+            raise
+
+
+async def stream_chat(messages, model=None, temperature=0.2, max_tokens: Optional[int] = None):
+    """Stream a Claude Messages response.
+
+    Relays Anthropic's server-sent events as ``{"delta": str}`` fragments,
+    followed by a final ``{"delta": "", "usage": {...}}``.
+    """
+    if not settings.ANTHROPIC_API_KEY:
+        raise RuntimeError("Anthropic API key is not configured.")
+
+    system_prompt, converted_messages = _convert_messages(messages)
+
+    payload = {
+        "model": model or settings.CLOUD_MODEL,
+        "messages": converted_messages,
+        "temperature": temperature,
+        "max_tokens": max_tokens or settings.CLOUD_MAX_TOKENS or 1024,
+        "stream": True,
+    }
+    if system_prompt:
+        payload["system"] = system_prompt
+
+    prompt_tokens = 0
+    completion_tokens = 0
+
+    with claude_breaker.call(timed=False):
+        async with get_client("anthropic").stream(
+            "POST",
+            f"{settings.ANTHROPIC_BASE}/v1/messages",
+            headers=_build_headers(),
+            json=payload,
+            timeout=settings.ANTHROPIC_TIMEOUT,
+        ) as response:
+            if response.is_error:
+                await response.aread()
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                event = json.loads(line[5:].strip() or "{}")
+                etype = event.get("type")
+                if etype == "message_start":
+                    usage_raw = (event.get("message") or {}).get("usage") or {}
+                    prompt_tokens = usage_raw.get("input_tokens") or 0
+                elif etype == "content_block_delta":
+                    delta = event.get("delta") or {}
+                    if delta.get("type") == "text_delta" and delta.get("text"):
+                        yield {"delta": delta["text"]}
+                elif etype == "message_delta":
+                    usage_raw = event.get("usage") or {}
+                    completion_tokens = usage_raw.get("output_tokens") or completion_tokens
+                elif etype == "error":
+                    error = event.get("error") or {}
+                    raise RuntimeError(f"Anthropic stream error: {error.get('message', error)}")
+                elif etype == "message_stop":
+                    break
+
+    total_tokens = (
+        prompt_tokens + completion_tokens
+        if (prompt_tokens or completion_tokens)
+        else None
+    )
+    yield {
+        "delta": "",
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": total_tokens,
+        },
+    }
 
 
-def _post_messages(payload: dict):
-    response = requests.post(
+async def _post_messages(payload: dict):
+    response = await get_client("anthropic").post(
         f"{settings.ANTHROPIC_BASE}/v1/messages",
         headers=_build_headers(),
         json=payload,
-        timeout=90,
+        timeout=settings.ANTHROPIC_TIMEOUT,
     )
     response.raise_for_status()
     return response
@@ -138,7 +216,7 @@ def _messages_to_prompt(messages: List[dict], system_prompt: Optional[str]) -> s
     return "".join(sections)
 
 
-def _call_complete(messages, system_prompt, model, temperature, max_tokens):
+async def _call_complete(messages, system_prompt, model, temperature, max_tokens):
     prompt = _messages_to_prompt(messages, system_prompt)
     payload = {
         "model": model or settings.CLOUD_MODEL,
@@ -149,14 +227,14 @@ def _call_complete(messages, system_prompt, model, temperature, max_tokens):
     }
 
     try:
-        response = requests.post(
+        response = await get_client("anthropic").post(
             f"{settings.ANTHROPIC_BASE}/v1/complete",
             headers=_build_headers(),
             json=payload,
-            timeout=90,
+            timeout=settings.ANTHROPIC_TIMEOUT,
         )
         response.raise_for_status()
-    except HTTPError as exc:
+    except HTTPStatusError as exc:
         if exc.response is not None and exc.response.status_code == 404:
             raise RuntimeError(
                 "Anthropic API returned 404 for both Messages and Complete endpoints. "
@@ -0,0 +1,92 @@
+"""
+Shared, pooled async HTTP clients for upstream services.
+
+Each upstream (Ollama, Anthropic, web search) gets one long-lived
+httpx.AsyncClient so keep-alive connections are reused across requests
+instead of paying a new TCP/TLS handshake per call.
+"""
+
+from typing import Dict, Optional
+
+import httpx
+
+from ..settings import settings
+
+_clients: Dict[str, httpx.AsyncClient] = {}
+_transports: Dict[str, httpx.AsyncBaseTransport] = {}
+_stats: Dict[str, Dict[str, int]] = {}
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=settings.HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY,
+    )
+
+
+def _stats_for(name: str) -> Dict[str, int]:
+    return _stats.setdefault(name, {"requests": 0, "connections_opened": 0})
+
+
+def _make_trace(name: str):
+    stats = _stats_for(name)
+
+    async def trace(event_name: str, info: dict):
+        # Fires only when httpcore has to open a fresh connection,
+        # so requests - connections_opened = reused connections.
+        if event_name == "connection.connect_tcp.complete":
+            stats["connections_opened"] += 1
+
+    return trace
+
+
+def get_client(name: str) -> httpx.AsyncClient:
+    """Get (or lazily create) the pooled client for an upstream."""
+    client = _clients.get(name)
+    if client is None or client.is_closed:
+        stats = _stats_for(name)
+
+        async def count_request(request: httpx.Request):
+            stats["requests"] += 1
+            request.extensions.setdefault("trace", _make_trace(name))
+
+        client = httpx.AsyncClient(
+            limits=_limits(),
+            timeout=httpx.Timeout(None, pool=settings.HTTP_POOL_TIMEOUT),
+            transport=_transports.get(name),
+            event_hooks={"request": [count_request]},
+        )
+        _clients[name] = client
+    return client
+
+
+def set_transport(name: str, transport: Optional[httpx.AsyncBaseTransport]):
+    """Override the transport for an upstream (used by tests and benchmarks)."""
+    if transport is None:
+        _transports.pop(name, None)
+    else:
+        _transports[name] = transport
+    # Drop the cached client so the next call picks up the new transport.
+    _clients.pop(name, None)
+
+
+def pool_stats() -> Dict[str, Dict[str, int]]:
+    """Request and connection counters per upstream."""
+    out = {}
+    for name, stats in _stats.items():
+        requests = stats["requests"]
+        opened = stats["connections_opened"]
+        out[name] = {
+            "requests": requests,
+            "connections_opened": opened,
+            "connections_reused": max(requests - opened, 0),
+        }
+    return out
+
+
+async def close_all():
+    """Close every pooled client (called on app shutdown)."""
+    for client in list(_clients.values()):
+        await client.aclose()
+    _clients.clear()
@@ -1,30 +1,101 @@
-import requests
-from requests import HTTPError
+import json
+from httpx import HTTPStatusError
 from typing import List
 
+from ..circuit_breaker import ollama_breaker
+from ..metrics import FALLBACKS
+from ..residency import keep_alive_for, residency
 from ..settings import settings
+from .http import get_client
+from .ollama_pool import ollama_pool
 
+_GENERATE_FALLBACKS = FALLBACKS.labels("ollama_generate")
 
-def chat(messages, model=None, temperature=0.2, max_tokens=None):
+
+async def chat(messages, model=None, temperature=0.2, max_tokens=None):
     """Call Ollama and normalize response. Falls back for older servers."""
     payload = _build_chat_payload(messages, model, temperature, max_tokens)
 
-    try:
-        data = _post_chat(payload)
-    except HTTPError as exc:
-        if exc.response is not None and exc.response.status_code == 404:
-            data = _post_generate(messages, model, temperature, max_tokens)
-        else:
-            raise
-
-    return _normalize_usage(data)
-
-
-def _build_chat_payload(messages, model, temperature, max_tokens):
+    async with ollama_pool.acquire(payload["model"]) as base:
+        with ollama_breaker.call():
+            try:
+                data = await _post_chat(base, payload)
+            except HTTPStatusError as exc:
+                if exc.response is not None and exc.response.status_code == 404:
+                    _GENERATE_FALLBACKS.inc()
+                    data = await _post_generate(base, messages, model, temperature, max_tokens)
+                else:
+                    raise
+        normalized = _normalize_usage(data)
+        residency.observe(base, payload["model"], normalized["timings_ms"].get("load"))
+
+    return normalized
+
+
+async def stream_chat(messages, model=None, temperature=0.2, max_tokens=None):
+    """Stream an Ollama chat generation.
+
+    Yields ``{"delta": str}`` for each content fragment and a final
+    ``{"delta": "", "usage": {...}, "timings_ms": {...}}`` once Ollama
+    reports ``done``.
+    """
+    payload = _build_chat_payload(messages, model, temperature, max_tokens, stream=True)
+
+    async with ollama_pool.acquire(payload["model"]) as base:
+        with ollama_breaker.call(timed=False):
+            async with get_client("ollama").stream(
+                "POST",
+                f"{base}/api/chat",
+                json=payload,
+                timeout=settings.OLLAMA_TIMEOUT,
+            ) as r:
+                r.raise_for_status()
+                async for line in r.aiter_lines():
+                    if not line.strip():
+                        continue
+                    data = json.loads(line)
+                    if data.get("error"):
+                        raise RuntimeError(f"Ollama error: {data['error']}")
+                    delta = (data.get("message") or {}).get("content", "")
+                    if data.get("done"):
+                        normalized = _normalize_usage(data)
+                        residency.observe(base, payload["model"], normalized["timings_ms"].get("load"))
+                        yield {"delta": delta, "usage": normalized["usage"], "timings_ms": normalized["timings_ms"]}
+                        return
+                    if delta:
+                        yield {"delta": delta}
+
+
+async def embed(text: str, model: str):
+    """Embed a single text with an Ollama embedding model. Falls back for older servers."""
+    client = get_client("ollama")
+    async with ollama_pool.acquire(model) as base:
+        with ollama_breaker.call():
+            try:
+                r = await client.post(
+                    f"{base}/api/embed",
+                    json={"model": model, "input": text},
+                    timeout=settings.OLLAMA_TIMEOUT,
+                )
+                r.raise_for_status()
+                return r.json()["embeddings"][0]
+            except HTTPStatusError as exc:
+                if exc.response is None or exc.response.status_code != 404:
+                    raise
+            r = await client.post(
+                f"{base}/api/embeddings",
+                json={"model": model, "prompt": text},
+                timeout=settings.OLLAMA_TIMEOUT,
+            )
+            r.raise_for_status()
+            return r.json()["embedding"]
+
+
+def _build_chat_payload(messages, model, temperature, max_tokens, stream=False):
     payload = {
         "model": model or settings.LOCAL_MODEL,
         "messages": messages,
-        "stream": False,
+        "stream": stream,
     }
     options = {}
     if temperature is not None:
@@ -33,20 +104,23 @@ def _build_chat_payload(messages, model, temperature, max_tokens):
         options["num_predict"] = max_tokens
     if options:
         payload["options"] = options
+    keep_alive = keep_alive_for(payload["model"])
+    if keep_alive is not None:
+        payload["keep_alive"] = keep_alive
     return payload
 
 
-def _post_chat(payload):
-    r = requests.post(
-        f"{settings.OLLAMA_BASE}/api/chat",
+async def _post_chat(base, payload):
+    r = await get_client("ollama").post(
+        f"{base}/api/chat",
         json=payload,
-        timeout=120,
+        timeout=settings.OLLAMA_TIMEOUT,
     )
     r.raise_for_status()
     return r.json()
 
 
-def _post_generate(messages, model, temperature, max_tokens):
+async def _post_generate(base, messages, model, temperature, max_tokens):
     prompt = _messages_to_prompt(messages)
     payload = {
         "model": model or settings.LOCAL_MODEL,
@@ -60,11 +134,14 @@ def _post_generate(messages, model, temperature, max_tokens):
         options["num_predict"] = max_tokens
     if options:
         payload["options"] = options
+    keep_alive = keep_alive_for(payload["model"])
+    if keep_alive is not None:
+        payload["keep_alive"] = keep_alive
 
-    r = requests.post(
-        f"{settings.OLLAMA_BASE}/api/generate",
+    r = await get_client("ollama").post(
+        f"{base}/api/generate",
         json=payload,
-        timeout=120,
+        timeout=settings.OLLAMA_TIMEOUT,
     )
     r.raise_for_status()
     data = r.json()
@@ -113,5 +190,15 @@ def _normalize_usage(data):
             "completion_tokens": completion_tokens,
             "total_tokens": total_tokens,
         },
+        "timings_ms": _server_timings(data),
     }
 
+
+def _server_timings(data):
+    """Ollama's own stage durations (reported in nanoseconds) in milliseconds."""
+    timings = {}
+    for stage, field in (("load", "load_duration"), ("prompt_eval", "prompt_eval_duration"), ("eval", "eval_duration")):
+        if data.get(field) is not None:
+            timings[stage] = int(data[field] / 1e6)
+    return timings
+
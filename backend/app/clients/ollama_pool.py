@@ -0,0 +1,165 @@
+"""
+Pool of Ollama hosts with least-outstanding-requests balancing.
+
+Hosts come from OLLAMA_BASES (or the single OLLAMA_BASE). Each host's
+model inventory is discovered from /api/tags by a periodic health probe,
+and a request only goes to hosts that have its model. Among those it picks
+the host with the fewest requests in flight.
+
+A host is ejected after OLLAMA_EJECT_AFTER_FAILURES consecutive failures
+(connection errors, 5xx responses or failed probes) and re-admitted by the
+next successful probe. If every host that has the model is ejected, the
+request is still sent to one of them rather than failing outright.
+"""
+
+import asyncio
+import random
+import time
+from contextlib import asynccontextmanager
+from typing import List, Optional, Set
+
+import httpx
+
+from ..metrics import Counter, Gauge, Histogram
+from ..settings import settings
+from .http import get_client
+
+BACKEND_SECONDS = Histogram("router_ollama_backend_request_seconds", "Ollama request duration per host", ["backend"])
+BACKEND_OUTSTANDING = Gauge("router_ollama_backend_outstanding", "Ollama requests in flight per host", ["backend"])
+BACKEND_HEALTHY = Gauge("router_ollama_backend_healthy", "1 if the Ollama host is admitted, 0 if ejected", ["backend"])
+BACKEND_FAILURES = Counter("router_ollama_backend_failures", "Failed Ollama requests and probes per host", ["backend"])
+
+
+class NoBackendAvailable(RuntimeError):
+    pass
+
+
+def normalize_model(name: str) -> str:
+    """Ollama treats "llama3.2" and "llama3.2:latest" as the same model."""
+    return name if ":" in name else f"{name}:latest"
+
+
+class Backend:
+    def __init__(self, base: str):
+        self.base = base.rstrip("/")
+        self.models: Optional[Set[str]] = None  # None until the first successful probe
+        self.healthy = True
+        self.consecutive_failures = 0
+        self.requests = 0
+        self.failures = 0
+        self.latency_ms: Optional[float] = None  # EWMA of successful requests
+        self.last_probe: Optional[float] = None
+        self._outstanding = BACKEND_OUTSTANDING.labels(self.base)
+        self._seconds = BACKEND_SECONDS.labels(self.base)
+        self._healthy = BACKEND_HEALTHY.labels(self.base)
+        self._failures = BACKEND_FAILURES.labels(self.base)
+        self._healthy.set(1)
+
+    @property
+    def outstanding(self) -> int:
+        return int(self._outstanding.value)
+
+    def has_model(self, model: str) -> bool:
+        return self.models is None or normalize_model(model) in self.models
+
+    def record_success(self, elapsed: float):
+        self.consecutive_failures = 0
+        self._seconds.observe(elapsed)
+        ms = elapsed * 1000
+        self.latency_ms = ms if self.latency_ms is None else self.latency_ms + 0.2 * (ms - self.latency_ms)
+
+    def record_failure(self):
+        self.failures += 1
+        self.consecutive_failures += 1
+        self._failures.inc()
+        if self.healthy and self.consecutive_failures >= settings.OLLAMA_EJECT_AFTER_FAILURES:
+            self.healthy = False
+            self._healthy.set(0)
+            print(f"Ejected Ollama backend {self.base} after {self.consecutive_failures} failures")
+
+    def admit(self, models: Set[str]):
+        self.models = models
+        self.consecutive_failures = 0
+        self.last_probe = time.time()
+        if not self.healthy:
+            print(f"Re-admitted Ollama backend {self.base}")
+        self.healthy = True
+        self._healthy.set(1)
+
+    def stats(self) -> dict:
+        return {
+            "base": self.base,
+            "healthy": self.healthy,
+            "outstanding": self.outstanding,
+            "requests": self.requests,
+            "failures": self.failures,
+            "consecutive_failures": self.consecutive_failures,
+            "avg_latency_ms": round(self.latency_ms or 0.0, 1),
+            "models": sorted(self.models) if self.models is not None else None,
+            "last_probe": self.last_probe,
+        }
+
+
+def _is_backend_failure(exc: BaseException) -> bool:
+    if isinstance(exc, httpx.TransportError):
+        return True
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response is not None and exc.response.status_code >= 500
+    return False
+
+
+class OllamaPool:
+    def __init__(self, bases: List[str]):
+        self.backends = [Backend(b) for b in bases]
+
+    def pick(self, model: str) -> Backend:
+        """Least-outstanding host that has ``model`` (ties broken randomly)."""
+        candidates = [b for b in self.backends if b.has_model(model)]
+        if not candidates:
+            raise NoBackendAvailable(f"No Ollama backend has model '{model}'")
+        healthy = [b for b in candidates if b.healthy] or candidates
+        least = min(b.outstanding for b in healthy)
+        return random.choice([b for b in healthy if b.outstanding == least])
+
+    @asynccontextmanager
+    async def acquire(self, model: str):
+        """Reserve a host for one request; yields its base URL and records the outcome."""
+        backend = self.pick(model)
+        backend.requests += 1
+        start = time.perf_counter()
+        with backend._outstanding.track():
+            try:
+                yield backend.base
+            except Exception as exc:
+                if _is_backend_failure(exc):
+                    backend.record_failure()
+                raise
+            else:
+                backend.record_success(time.perf_counter() - start)
+
+    def models(self) -> Set[str]:
+        """Every model available on an admitted host."""
+        return {m for b in self.backends if b.healthy and b.models for m in b.models}
+
+    async def probe(self, backend: Backend):
+        try:
+            r = await get_client("ollama").get(f"{backend.base}/api/tags", timeout=settings.OLLAMA_PROBE_TIMEOUT)
+            r.raise_for_status()
+            backend.admit({normalize_model(m["name"]) for m in r.json().get("models", [])})
+        except Exception as e:
+            print(f"Ollama health probe failed for {backend.base}: {e}")
+            backend.record_failure()
+
+    async def probe_all(self):
+        await asyncio.gather(*(self.probe(b) for b in self.backends))
+
+    async def run_health_checks(self):
+        while True:
+            await self.probe_all()
+            await asyncio.sleep(settings.OLLAMA_HEALTH_INTERVAL_SECONDS)
+
+    def stats(self) -> List[dict]:
+        return [b.stats() for b in self.backends]
+
+
+ollama_pool = OllamaPool(settings.OLLAMA_BASES or [settings.OLLAMA_BASE])
@@ -0,0 +1,141 @@
+"""
+Persistent second-tier response cache backed by SQLite in WAL mode.
+
+One file is shared by every uvicorn worker on the host and survives
+restarts. WAL lets readers proceed while another worker writes; any
+lock contention beyond a short busy timeout is treated as a miss (or a
+skipped write) rather than stalling the request.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from typing import Optional, Tuple
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS response_cache (
+    key TEXT PRIMARY KEY,
+    ts REAL NOT NULL,
+    size INTEGER NOT NULL,
+    val TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_response_cache_ts ON response_cache (ts);
+"""
+
+# Size limits are enforced every N writes to amortize the COUNT/SUM scan
+TRIM_EVERY_WRITES = 100
+
+
+class DiskCache:
+    """SQLite-backed cache; evicts oldest-written entries past its size limits."""
+
+    def __init__(self, path: str, max_entries: int, max_bytes: int, busy_timeout_ms: int = 200):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.busy_timeout_ms = busy_timeout_ms
+        self._local = threading.local()
+        self._writes = 0
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.busy_timeout_ms / 1000, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def get(self, k: str, ttl: int) -> Optional[dict]:
+        entry = self.get_entry(k, ttl)
+        return entry[1] if entry is not None else None
+
+    def get_entry(self, k: str, ttl: int) -> Optional[Tuple[float, dict]]:
+        """Return ``(written_at, value)`` so callers can keep the original TTL clock."""
+        try:
+            row = self._conn().execute(
+                "SELECT ts, val FROM response_cache WHERE key = ?", (k,)
+            ).fetchone()
+        except sqlite3.Error as e:
+            self.errors += 1
+            print(f"Disk cache read failed: {e}")
+            return None
+        if row is None or time.time() - row[0] > ttl:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return row[0], json.loads(row[1])
+
+    def set(self, k: str, val: dict):
+        data = json.dumps(val, default=str)
+        size = len(k) + len(data)
+        if size > self.max_bytes:
+            return
+        try:
+            conn = self._conn()
+            conn.execute(
+                "INSERT OR REPLACE INTO response_cache (key, ts, size, val) VALUES (?, ?, ?, ?)",
+                (k, time.time(), size, data),
+            )
+            self._writes += 1
+            if self._writes % TRIM_EVERY_WRITES == 0:
+                self.trim()
+        except sqlite3.Error as e:
+            self.errors += 1
+            print(f"Disk cache write failed: {e}")
+
+    def trim(self):
+        """Delete the oldest entries until both size limits are met."""
+        conn = self._conn()
+        while True:
+            count, total = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM response_cache"
+            ).fetchone()
+            if count <= self.max_entries and total <= self.max_bytes:
+                return
+            # Drop enough rows for the entry limit, then estimate the rest by average size
+            excess = max(count - self.max_entries, 0)
+            if total > self.max_bytes:
+                excess = max(excess, int((total - self.max_bytes) / (total / count)) + 1)
+            conn.execute(
+                "DELETE FROM response_cache WHERE key IN "
+                "(SELECT key FROM response_cache ORDER BY ts LIMIT ?)",
+                (excess,),
+            )
+
+    def sweep(self, ttl: int) -> int:
+        """Remove expired entries; returns the number removed."""
+        try:
+            cur = self._conn().execute(
+                "DELETE FROM response_cache WHERE ts < ?", (time.time() - ttl,)
+            )
+            return cur.rowcount
+        except sqlite3.Error as e:
+            self.errors += 1
+            print(f"Disk cache sweep failed: {e}")
+            return 0
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        try:
+            count, total = self._conn().execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM response_cache"
+            ).fetchone()
+        except sqlite3.Error:
+            count, total = None, None
+        return {
+            "path": self.path,
+            "entries": count,
+            "bytes": total,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "errors": self.errors,
+        }
@@ -0,0 +1,82 @@
+"""
+Keyset-paginated, filtered reads of the logs table for the dashboard.
+
+Pages are ordered by id descending and continue from a ``before_id``
+cursor, so every page is an index range scan no matter how deep it is.
+The large request/response Text columns are only read when listed in
+``fields``.
+"""
+
+from datetime import datetime, timezone
+from typing import List, Optional, Sequence, Tuple
+
+from sqlalchemy import text
+
+from . import log_store
+
+DEFAULT_FIELDS = (
+    "id", "route", "model", "confidence", "latency_ms",
+    "estimated_cost_usd", "estimated_cost_saved_usd", "created_at",
+)
+ALL_FIELDS = DEFAULT_FIELDS + ("prompt_hash", "request", "response")
+MAX_LIMIT = 1000
+_PAYLOAD_FIELDS = {"request", "response"}
+
+
+def parse_fields(fields: Optional[str]) -> Sequence[str]:
+    """Validate a comma-separated projection; ``id`` is always included for the cursor."""
+    if not fields:
+        return DEFAULT_FIELDS
+    names = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in names if f not in ALL_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return ["id"] + [f for f in dict.fromkeys(names) if f != "id"]
+
+
+def _db_time(value: datetime) -> str:
+    # created_at is stored by SQLite's CURRENT_TIMESTAMP: naive UTC text
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value.strftime("%Y-%m-%d %H:%M:%S")
+
+
+def query_logs(
+    db,
+    limit: int = 100,
+    before_id: Optional[int] = None,
+    route: Optional[str] = None,
+    model: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    min_confidence: Optional[float] = None,
+    max_confidence: Optional[float] = None,
+    fields: Sequence[str] = DEFAULT_FIELDS,
+) -> Tuple[List[dict], Optional[int]]:
+    """Return one page of rows (newest first) and the cursor for the next page."""
+    where, params = [], {"limit": max(1, min(limit, MAX_LIMIT))}
+    for clause, name, value in (
+        ("id < :before_id", "before_id", before_id),
+        ("route = :route", "route", route),
+        ("model = :model", "model", model),
+        ("created_at >= :since", "since", since and _db_time(since)),
+        ("created_at < :until", "until", until and _db_time(until)),
+        ("confidence >= :min_confidence", "min_confidence", min_confidence),
+        ("confidence <= :max_confidence", "max_confidence", max_confidence),
+    ):
+        if value is not None:
+            where.append(clause)
+            params[name] = value
+
+    # Payloads live compressed in *_blob columns; older rows only have the text column
+    columns = [c for f in fields for c in ((f, f"{f}_blob") if f in _PAYLOAD_FIELDS else (f,))]
+    # fields are validated against ALL_FIELDS, so interpolating them is safe
+    sql = f"SELECT {', '.join(columns)} FROM logs"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += " ORDER BY id DESC LIMIT :limit"
+    rows = [dict(r._mapping) for r in db.execute(text(sql), params).fetchall()]
+    if _PAYLOAD_FIELDS.intersection(fields):
+        rows = log_store.unpack(db, rows)
+    next_cursor = rows[-1]["id"] if len(rows) == params["limit"] else None
+    return rows, next_cursor
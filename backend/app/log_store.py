@@ -0,0 +1,180 @@
+"""
+Compressed, content-addressed storage for logged request/response payloads.
+
+Each message is stored once in ``log_messages`` under the sha256 of its
+canonical JSON; a log row keeps only the list of message hashes plus the
+other request fields, compressed into ``request_blob``. The answer in the
+response is stored the same way, so it is shared with the assistant turn
+that repeats it in the next request's history. ``unpack`` reassembles the
+original JSON text, and also reads rows written before this format
+(plain ``request``/``response`` text).
+
+Compression is LOG_COMPRESSION ("zlib" or "zstd"; zstd needs the
+zstandard package). Every blob starts with a one-byte codec tag, so rows
+written with different settings stay readable.
+
+``log_messages.last_used`` is refreshed at most once per
+TOUCH_INTERVAL_SECONDS per message (tracked per database, and only for
+writes that committed); retention deletes messages not used since the
+oldest remaining log row (minus that interval).
+"""
+
+import hashlib
+import json
+import time
+import zlib
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from .models import LogMessage
+from .settings import settings
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+_RAW, _ZLIB, _ZSTD = b"\x00", b"z", b"s"
+
+TOUCH_INTERVAL_SECONDS = 3600
+# Per database URL: message hashes this process committed recently (hash -> time)
+_MAX_RECENT = 50000
+_recent: Dict[str, "OrderedDict[str, float]"] = {}
+
+if settings.LOG_COMPRESSION == "zstd" and not ZSTD_AVAILABLE:
+    print("Warning: zstandard not installed. Log payloads will use zlib.")
+    print("Install with: pip install zstandard")
+
+
+def compress(data: bytes) -> bytes:
+    if settings.LOG_COMPRESSION == "zstd" and ZSTD_AVAILABLE:
+        return _ZSTD + zstandard.ZstdCompressor(level=3).compress(data)
+    if settings.LOG_COMPRESSION == "none":
+        return _RAW + data
+    return _ZLIB + zlib.compress(data, 6)
+
+
+def decompress(blob: bytes) -> bytes:
+    tag, body = blob[:1], blob[1:]
+    if tag == _ZLIB:
+        return zlib.decompress(body)
+    if tag == _ZSTD:
+        if not ZSTD_AVAILABLE:
+            raise RuntimeError("zstandard is required to read zstd-compressed log payloads")
+        return zstandard.ZstdDecompressor().decompress(body)
+    if tag == _RAW:
+        return body
+    raise ValueError(f"Unknown log payload codec {tag!r}")
+
+
+def _message_key(message: dict) -> Tuple[str, bytes]:
+    # Hash the canonical form, but keep the message's own key order in the body
+    canonical = json.dumps(message, sort_keys=True, separators=(",", ":")).encode()
+    return hashlib.sha256(canonical).hexdigest(), json.dumps(message, separators=(",", ":")).encode()
+
+
+def pack(row: dict, messages_out: Dict[str, bytes]) -> dict:
+    """Turn a row with ``request``/``response`` dicts into a storable row.
+
+    Messages that need writing are added to ``messages_out`` (hash -> message JSON).
+    """
+    row = dict(row)
+    request = dict(row.pop("request") or {})
+    response = row.pop("response") or {}
+
+    refs = []
+    for m in request.pop("messages", None) or []:
+        h, data = _message_key(m)
+        refs.append(h)
+        messages_out[h] = data
+    request["message_refs"] = refs
+
+    choices = []
+    for choice in response.get("choices") or []:
+        choice = dict(choice)
+        if isinstance(choice.get("message"), dict):
+            h, data = _message_key(choice["message"])
+            messages_out[h] = data
+            choice["message"] = {"$ref": h}
+        choices.append(choice)
+    response = {**response, "choices": choices}
+
+    row["request_blob"] = compress(json.dumps(request).encode())
+    row["response_blob"] = compress(json.dumps(response).encode())
+    return row
+
+
+def _recent_for(db) -> "OrderedDict[str, float]":
+    return _recent.setdefault(str(db.get_bind().url), OrderedDict())
+
+
+def write_messages(db, messages: Dict[str, bytes], now: Optional[float] = None) -> List[str]:
+    """Insert new message bodies and refresh ``last_used`` on stale ones.
+
+    The caller commits, then passes the returned hashes to ``mark_written``.
+    """
+    now = time.time() if now is None else now
+    recent = _recent_for(db)
+    pending = [(h, data) for h, data in messages.items()
+               if now - recent.get(h, 0.0) >= TOUCH_INTERVAL_SECONDS]
+    if not pending:
+        return []
+    stmt = sqlite_insert(LogMessage).values(
+        [{"hash": h, "body": compress(data), "last_used": int(now)} for h, data in pending]
+    )
+    db.execute(stmt.on_conflict_do_update(index_elements=["hash"], set_={"last_used": stmt.excluded.last_used}))
+    return [h for h, _ in pending]
+
+
+def mark_written(db, hashes: List[str], now: Optional[float] = None):
+    """Remember committed message writes so they are not re-touched for a while."""
+    now = time.time() if now is None else now
+    recent = _recent_for(db)
+    for h in hashes:
+        recent[h] = now
+        recent.move_to_end(h)
+    while len(recent) > _MAX_RECENT:
+        recent.popitem(last=False)
+
+
+def _fetch_messages(db, hashes: Iterable[str]) -> Dict[str, dict]:
+    hashes = list(set(hashes))
+    found: Dict[str, dict] = {}
+    # Stay under SQLite's bound-parameter limit
+    for i in range(0, len(hashes), 500):
+        rows = db.execute(select(LogMessage.hash, LogMessage.body).where(LogMessage.hash.in_(hashes[i:i + 500])))
+        for h, body in rows:
+            found[h] = json.loads(decompress(body))
+    return found
+
+
+def unpack(db, rows: List[dict]) -> List[dict]:
+    """Replace ``request_blob``/``response_blob`` with the original ``request``/``response`` JSON text."""
+    decoded = []
+    hashes: List[str] = []
+    for row in rows:
+        req_blob, resp_blob = row.pop("request_blob", None), row.pop("response_blob", None)
+        req = json.loads(decompress(req_blob)) if req_blob is not None else None
+        resp = json.loads(decompress(resp_blob)) if resp_blob is not None else None
+        if req is not None:
+            hashes += req.get("message_refs", [])
+        if resp is not None:
+            hashes += [c["message"]["$ref"] for c in resp.get("choices", []) if "$ref" in (c.get("message") or {})]
+        decoded.append((row, req, resp))
+
+    messages = _fetch_messages(db, hashes) if hashes else {}
+    for row, req, resp in decoded:
+        if req is not None:
+            refs = req.pop("message_refs", [])
+            row["request"] = json.dumps({"messages": [messages.get(h) for h in refs], **req})
+        if resp is not None:
+            for c in resp.get("choices", []):
+                ref = (c.get("message") or {}).get("$ref")
+                if ref is not None:
+                    c["message"] = messages.get(ref)
+            row["response"] = json.dumps(resp)
+    return rows
@@ -0,0 +1,131 @@
+"""
+Write-behind persistence for request logs.
+
+Requests hand their log row to a bounded in-memory queue and return
+immediately; a single background task drains the queue and inserts rows
+in batched transactions, so logging neither adds to request latency nor
+makes concurrent requests contend for the SQLite write lock. Each batch
+also updates the dashboard rollups (see rollups.py) in the same transaction.
+
+Backpressure: when the queue is full, LOG_QUEUE_FULL_POLICY decides
+whether the request drops its row ("drop", counted in stats) or waits for
+space ("block"). On shutdown the queue is flushed, bounded by
+LOG_SHUTDOWN_TIMEOUT_SECONDS.
+"""
+
+import asyncio
+import time
+from typing import Dict, List, Optional
+
+from sqlalchemy import insert
+
+from . import log_store, rollups
+from .db import SessionLocal
+from .metrics import STAGE_SECONDS
+from .models import LogEntry
+from .settings import settings
+
+_DB_WRITE_SECONDS = STAGE_SECONDS.labels("db_write")
+
+
+class LogWriter:
+    def __init__(self, session_factory=SessionLocal, max_queue: Optional[int] = None):
+        self.session_factory = session_factory
+        self.max_queue = max_queue or settings.LOG_QUEUE_MAX
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=self.max_queue)
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+        self.written = 0
+        self.dropped = 0
+        self.batches = 0
+        self.failed = 0
+        self.last_batch_ms = 0
+
+    def start(self):
+        if self._task is None:
+            self._closing = False
+            # Fresh queue bound to the running event loop
+            self.queue = asyncio.Queue(maxsize=self.max_queue)
+            self._task = asyncio.create_task(self._run())
+
+    async def submit(self, row: dict):
+        """Queue one log row for insertion.
+
+        Keys are LogEntry columns, except ``request`` and ``response`` which
+        are dicts; they are serialized and compressed on the writer thread.
+        """
+        if self._closing or self._task is None:
+            self.dropped += 1
+            return
+        if settings.LOG_QUEUE_FULL_POLICY == "block":
+            await self.queue.put(row)
+            return
+        try:
+            self.queue.put_nowait(row)
+        except asyncio.QueueFull:
+            self.dropped += 1
+
+    async def _run(self):
+        while True:
+            batch = [await self.queue.get()]
+            # Linger briefly so bursts share one transaction
+            deadline = time.monotonic() + settings.LOG_FLUSH_INTERVAL_SECONDS
+            while len(batch) < settings.LOG_BATCH_SIZE:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            await self._flush(batch)
+
+    async def _flush(self, batch: List[dict]):
+        start = time.time()
+        try:
+            await asyncio.to_thread(self._write_batch, batch)
+            self.written += len(batch)
+            _DB_WRITE_SECONDS.observe(time.time() - start)
+        except Exception as e:
+            self.failed += len(batch)
+            print(f"Log write failed, dropped {len(batch)} rows: {e}")
+        finally:
+            self.batches += 1
+            self.last_batch_ms = int((time.time() - start) * 1000)
+            for _ in batch:
+                self.queue.task_done()
+
+    def _write_batch(self, batch: List[dict]):
+        messages: Dict[str, bytes] = {}
+        rows = [log_store.pack(row, messages) for row in batch]
+        with self.session_factory() as db:
+            written = log_store.write_messages(db, messages)
+            db.execute(insert(LogEntry), rows)
+            rollups.record(db, batch)
+            db.commit()
+            log_store.mark_written(db, written)
+
+    async def close(self):
+        """Stop accepting rows and flush what is queued."""
+        self._closing = True
+        if self._task is None:
+            return
+        try:
+            await asyncio.wait_for(self.queue.join(), settings.LOG_SHUTDOWN_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            print(f"Log writer shutdown timed out with {self.queue.qsize()} rows unwritten")
+        self._task.cancel()
+        self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "queued": self.queue.qsize(),
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "batches": self.batches,
+            "last_batch_ms": self.last_batch_ms,
+        }
+
+
+log_writer = LogWriter()
@@ -1,44 +1,120 @@
-from fastapi import FastAPI, HTTPException, UploadFile, File, Form
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Request, Response, UploadFile, File, Form
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy import text
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from .schemas import ChatRequest, ChatResponse, Choice, ChoiceMsg
-from .router_service import try_local, call_cloud
+from .router_service import RoutingContext, EarlyAbort, early_aborts, try_local, call_cloud, stream_local, stream_cloud
 from .settings import settings
 from .policy import cloud_allowed
-from .cache import key_for_messages, cache_get, cache_set
-from .db import Base, engine, SessionLocal
-from .models import LogEntry
+from .cache import key_for_messages, cache_get, cache_set, cache_stats, run_cache_sweeper
+from .semantic_cache import semantic_cache
+from .singleflight import inflight
+from .speculation import speculation
+from .spillover import spillover
+from .prerouting import prerouter
+from .residency import residency
+from .circuit_breaker import breaker_stats
+from .db import SessionLocal, ensure_schema
+from .log_writer import log_writer
+from .retention import log_retention
+from . import log_query, rollups
 from .cost import estimate_cost
+from .services.web_search import get_web_search_service
+from .services.search_admission import search_admission
 from .services.ocr import extract_text_from_image, extract_text_from_base64, format_ocr_text_for_prompt
+from .clients import http
+from .clients.ollama_pool import ollama_pool
+from .metrics import CACHE_LOOKUPS, ESCALATIONS, ROUTES, registry
+from .profiler import profiler
+import asyncio
 import json
 import uuid
 import time
 import base64
+from datetime import datetime
+from typing import Optional
 
-app = FastAPI(title="Local-first AI Router")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    sweeper = asyncio.create_task(run_cache_sweeper())
+    log_writer.start()
+    prerouter.load()
+    retention = asyncio.create_task(log_retention.run_forever())
+    health_checks = asyncio.create_task(ollama_pool.run_health_checks())
+    model_residency = asyncio.create_task(residency.run_forever())
+    yield
+    sweeper.cancel()
+    retention.cancel()
+    health_checks.cancel()
+    model_residency.cancel()
+    await log_writer.close()
+    # Release pooled upstream connections
+    await http.close_all()
+
+
+app = FastAPI(title="Local-first AI Router", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
     allow_credentials=True,
     allow_methods=["*"],
-    allow_headers=["*"]
+    allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
+# Create database tables and add columns/indexes missing from older files
+ensure_schema()
+
+NO_CLOUD_KEY_DETAIL = (
+    "Cloud model requested but Anthropic API key is not configured. "
+    "Add your API key to the .env file: ANTHROPIC_API_KEY=sk-ant-... "
+    "Get your key from: https://console.anthropic.com/"
+)
 
 
 @app.post("/v1/chat/completions", response_model=ChatResponse)
-def chat(req: ChatRequest):
-    """OpenAI-compatible chat endpoint with local-first routing and OCR support."""
+async def chat(req: ChatRequest, request: Request, response: Response):
+    """OpenAI-compatible chat endpoint with local-first routing and OCR support.
+
+    Non-streaming responses carry a Server-Timing header with the per-stage
+    breakdown; send ``X-Profile: 1`` to sample-profile this request.
+    """
+    ctx = RoutingContext(tenant=req.user or "default")
+    forced = profiler.allow_forced(request.headers.get("x-profile") == "1")
+    if profiler.should_profile(forced):
+        ctx.profile = profiler.start(forced=forced)
+    try:
+        result = await _chat(req, ctx)
+    finally:
+        # A streamed answer is still being generated; _stream_chat ends the profile
+        if not ctx.streaming:
+            _end_profile(ctx)
+    if not isinstance(result, StreamingResponse):
+        response.headers["Server-Timing"] = ctx.server_timing()
+    return result
+
+
+def _end_profile(ctx: RoutingContext, request_id: str = "request"):
+    if ctx.profile is None:
+        return
+    path = profiler.stop(ctx.profile, request_id)
+    ctx.profile = None
+    if path:
+        print(f"Request profile written to {path} ({ctx.server_timing()})")
+
+
+async def _chat(req: ChatRequest, ctx: RoutingContext):
     messages = [m.dict() for m in req.messages]
-    
+
     # Process OCR if image is provided
     if req.image:
         print("Processing image with OCR...")
-        ocr_text, success = extract_text_from_base64(req.image)
+        with ctx.span("ocr"):
+            ocr_text, success = await asyncio.to_thread(extract_text_from_base64, req.image)
         if success and ocr_text:
+            ctx.ocr_texts.append(ocr_text)
             print(f"OCR extracted {len(ocr_text)} characters from image")
             # Get the last user message
             if messages and messages[-1].get("role") == "user":
@@ -59,8 +135,10 @@ def chat(req: ChatRequest):
     for msg in messages:
         if msg.get("image"):
             print("Processing image from message.image field...")
-            ocr_text, success = extract_text_from_base64(msg["image"])
+            with ctx.span("ocr"):
+                ocr_text, success = await asyncio.to_thread(extract_text_from_base64, msg["image"])
             if success and ocr_text:
+                ctx.ocr_texts.append(ocr_text)
                 print(f"OCR extracted {len(ocr_text)} characters from message image")
                 original_content = msg.get("content", "")
                 ocr_formatted = format_ocr_text_for_prompt(ocr_text, original_content)
@@ -88,19 +166,67 @@ def chat(req: ChatRequest):
                 elif req_lower.startswith("cloud"):
                     force_cloud = True
 
-    cache_hint = requested_model or ("cloud" if force_cloud else local_model or "default")
+    substituted = False
+    if not force_cloud:
+        serving_model = residency.pick(local_model)
+        substituted = serving_model != local_model
+        if substituted:
+            ctx.substitution = (local_model, serving_model)
+        local_model = serving_model
+
+    # Key on the model that actually answers, so a warm alternate's reply is
+    # never replayed to a later request that gets the requested model
+    cache_hint = local_model if substituted else requested_model or ("cloud" if force_cloud else local_model or "default")
     key = key_for_messages(messages, cache_hint)
     
     effective_temp = req.temperature if req.temperature is not None else settings.LOCAL_TEMPERATURE
     conversation_id = req.conversation_id or key
     
     # Check cache
-    cached = cache_get(key, settings.CACHE_TTL_SECONDS)
+    with ctx.span("cache_lookup"):
+        cached = await cache_get(key, settings.CACHE_TTL_SECONDS)
+        semantic_hit = False
+        if not cached and semantic_cache is not None:
+            cached = await semantic_cache.lookup(key, messages, cache_hint, settings.CACHE_TTL_SECONDS)
+            semantic_hit = cached is not None
+    CACHE_LOOKUPS.labels("semantic_hit" if semantic_hit else "hit" if cached else "miss").inc()
     if cached:
         cached_response = dict(cached)
         cached_response["conversation_id"] = conversation_id
+        if semantic_hit:
+            cached_response["usage"] = {**cached_response.get("usage", {}), "semantic_cache_hit": True}
+        if req.stream:
+            return _sse_response(_replay_cached(cached_response))
         return cached_response
 
+    if req.stream:
+        if force_cloud and not settings.ANTHROPIC_API_KEY:
+            raise HTTPException(status_code=503, detail=NO_CLOUD_KEY_DETAIL)
+        ctx.streaming = True
+        return _sse_response(_stream_chat(
+            messages, key, conversation_id, requested_model, local_model, force_cloud, effective_temp, ctx
+        ))
+
+    # Identical concurrent requests share one upstream execution
+    try:
+        resp = await inflight.do(
+            key,
+            lambda: _route(messages, key, conversation_id, requested_model, local_model, force_cloud, effective_temp, ctx),
+            settings.SINGLE_FLIGHT_TIMEOUT_SECONDS,
+        )
+    except asyncio.TimeoutError:
+        raise HTTPException(
+            status_code=504,
+            detail="Timed out waiting for an identical in-flight request to finish"
+        )
+    if resp["conversation_id"] != conversation_id:
+        resp = {**resp, "conversation_id": conversation_id}
+    return resp
+
+
+async def _route(messages, key, conversation_id, requested_model, local_model, force_cloud, effective_temp,
+                 ctx: RoutingContext):
+    """Route a non-streaming request local-first; returns the logged and cached response."""
     usage: dict = {}
     local_usage: dict = {}
     latency_ms = 0
@@ -109,18 +235,18 @@ def chat(req: ChatRequest):
     answer = ""
     route = "local"
 
+    # Spillover and pre-routing can send the request to cloud without a local attempt
+    direct = None
+    if not force_cloud:
+        decision = _decide_cloud_first(messages, local_model, conversation_id, ctx)
+        if decision is not None:
+            direct = await _cloud_first(messages, effective_temp, ctx, decision)
+
     if force_cloud:
         if not settings.ANTHROPIC_API_KEY:
-            raise HTTPException(
-                status_code=503,
-                detail=(
-                    "Cloud model requested but Anthropic API key is not configured. "
-                    "Add your API key to the .env file: ANTHROPIC_API_KEY=sk-ant-... "
-                    "Get your key from: https://console.anthropic.com/"
-                )
-            )
+            raise HTTPException(status_code=503, detail=NO_CLOUD_KEY_DETAIL)
         try:
-            answer, latency_ms, usage = call_cloud(messages, effective_temp)
+            answer, latency_ms, usage = await call_cloud(messages, effective_temp, ctx=ctx)
             confidence = 1.0
             route = "cloud"
         except Exception as cloud_error:
@@ -128,65 +254,166 @@ def chat(req: ChatRequest):
                 status_code=503,
                 detail=f"Cloud model unavailable: {str(cloud_error)}"
             )
+    elif direct is not None:
+        answer, latency_ms, usage = direct
+        confidence = 1.0
+        route = "cloud"
     else:
+        speculative = None
+        if cloud_allowed(messages) and settings.ANTHROPIC_API_KEY and speculation.should_speculate(
+            messages, local_model, conversation_id, ctx.tenant
+        ):
+            print("Escalation likely, starting speculative cloud call")
+            speculative = asyncio.ensure_future(call_cloud(messages, effective_temp, ctx=ctx))
+
+        async def escalate():
+            # A speculative call already in flight stands in for a fresh one
+            if speculative is not None:
+                return await speculative
+            return await call_cloud(messages, effective_temp, ctx=ctx)
+
         try:
-            parsed, local_ms, local_usage = try_local(messages, effective_temp, model=local_model)
-            confidence = parsed.get("confidence", 0.0)
-            answer = parsed.get("answer", "")
-            usage = local_usage or {}
-            latency_ms = local_ms
-        except Exception as local_error:
-            print(f"Local model failed: {local_error}")
-            if settings.ANTHROPIC_API_KEY and cloud_allowed(messages):
-                try:
-                    answer, latency_ms, usage = call_cloud(messages, effective_temp)
-                    confidence = 1.0
-                    route = "cloud"
-                except Exception as cloud_error:
+            try:
+                # The local answer always decides; a speculative call only stands in for the escalation
+                parsed, local_ms, local_usage = await try_local(messages, effective_temp, model=local_model, ctx=ctx)
+                confidence = parsed.get("confidence", 0.0)
+                answer = parsed.get("answer", "")
+                usage = local_usage or {}
+                latency_ms = local_ms
+            except Exception as local_error:
+                print(f"Local model failed: {local_error}")
+                if settings.ANTHROPIC_API_KEY and cloud_allowed(messages):
+                    try:
+                        answer, latency_ms, usage = await escalate()
+                        confidence = 1.0
+                        route = "cloud"
+                        ESCALATIONS.labels("local_error").inc()
+                    except Exception as cloud_error:
+                        raise HTTPException(
+                            status_code=503,
+                            detail=(
+                                "Local model (Ollama) unavailable and cloud fallback failed. "
+                                f"Ollama error: {str(local_error)} | "
+                                f"Cloud error: {str(cloud_error)}"
+                            )
+                        )
+                else:
                     raise HTTPException(
                         status_code=503,
-                        detail=(
-                            "Local model (Ollama) unavailable and cloud fallback failed. "
-                            f"Ollama error: {str(local_error)} | "
-                            f"Cloud error: {str(cloud_error)}"
-                        )
+                        detail=f"Local model (Ollama) unavailable: {str(local_error)}. "
+                               f"Make sure Ollama is running: 'ollama serve' and model is pulled: "
+                               f"'ollama pull {local_model}'"
                     )
-            else:
-                raise HTTPException(
-                    status_code=503,
-                    detail=f"Local model (Ollama) unavailable: {str(local_error)}. "
-                           f"Make sure Ollama is running: 'ollama serve' and model is pulled: "
-                           f"'ollama pull {local_model}'"
-                )
-
-        if route == "local" and confidence < settings.CONFIDENCE_THRESHOLD:
-            if cloud_allowed(messages) and settings.ANTHROPIC_API_KEY:
-                try:
-                    txt, cloud_ms, cloud_usage = call_cloud(messages, effective_temp)
-                    route = "cloud"
-                    confidence = 1.0
-                    answer = txt
-                    usage = cloud_usage or {}
-                    latency_ms = cloud_ms
-                except Exception as cloud_error:
-                    print(f"Cloud routing failed (confidence was {confidence:.2f}), using local answer: {str(cloud_error)}")
+
+            if route == "local" and confidence < settings.CONFIDENCE_THRESHOLD:
+                if cloud_allowed(messages) and settings.ANTHROPIC_API_KEY:
+                    try:
+                        txt, cloud_ms, cloud_usage = await escalate()
+                        route = "cloud"
+                        ESCALATIONS.labels("low_confidence").inc()
+                        confidence = 1.0
+                        answer = txt
+                        usage = cloud_usage or {}
+                        latency_ms = cloud_ms
+                    except Exception as cloud_error:
+                        print(f"Cloud routing failed (confidence was {confidence:.2f}), using local answer: {str(cloud_error)}")
+                        if ctx.early_abort:
+                            # The local generation was stopped early; finish it after all
+                            try:
+                                parsed, local_ms, local_usage = await try_local(
+                                    messages, effective_temp, model=local_model, ctx=ctx, early_abort=False
+                                )
+                            except Exception as local_error:
+                                raise HTTPException(
+                                    status_code=503,
+                                    detail=(
+                                        "Cloud escalation failed and the local model could not finish its answer. "
+                                        f"Cloud error: {str(cloud_error)} | "
+                                        f"Ollama error: {str(local_error)}"
+                                    )
+                                )
+                            confidence = parsed.get("confidence", 0.0)
+                            answer = parsed.get("answer", "")
+                        usage = local_usage or {}
+                        latency_ms = local_ms
+                else:
                     usage = local_usage or {}
                     latency_ms = local_ms
-            else:
+                    if not settings.ANTHROPIC_API_KEY:
+                        print(f"Low confidence ({confidence:.2f}) but no Anthropic key configured, using local answer anyway")
+            elif route == "local":
                 usage = local_usage or {}
                 latency_ms = local_ms
-                if not settings.ANTHROPIC_API_KEY:
-                    print(f"Low confidence ({confidence:.2f}) but no Anthropic key configured, using local answer anyway")
-        elif route == "local":
-            usage = local_usage or {}
-            latency_ms = local_ms
+        finally:
+            if speculative is not None:
+                speculation.settle(speculative, route == "cloud", messages, ctx.tenant)
+
+        escalated = route == "cloud"
+        speculation.predictor.record(messages, local_model, conversation_id, escalated=escalated)
+        # A kept low-confidence answer still counts as a would-be escalation
+        prerouter.record_outcome(ctx.prerouting, escalated or confidence < settings.CONFIDENCE_THRESHOLD, local_ms)
+
+    return await _finalize(
+        messages, key, conversation_id, requested_model, local_model, force_cloud,
+        route=route,
+        answer=answer,
+        confidence=confidence,
+        latency_ms=latency_ms,
+        usage=usage,
+        local_usage=local_usage,
+        ctx=ctx,
+    )
 
+
+def _decide_cloud_first(messages, local_model, conversation_id, ctx: RoutingContext) -> Optional[dict]:
+    """Record the spillover and pre-routing decisions; return the one that skips local, if any."""
+    ctx.spillover = spillover.decide(messages, local_model, ctx.tenant)
+    if ctx.spillover and ctx.spillover["spilled"]:
+        print(f"Predicted local latency {ctx.spillover['predicted_local_ms']}ms exceeds SLO, spilling to cloud")
+        return ctx.spillover
+    ctx.prerouting = prerouter.decide(
+        messages, "ocr" in ctx.timings, speculation.predictor.previous_route(conversation_id)
+    )
+    if ctx.prerouting and ctx.prerouting["enforced"]:
+        print(f"Local answer predicted to escalate (p={ctx.prerouting['p_escalate']}), routing to cloud")
+        return ctx.prerouting
+    return None
+
+
+def _cloud_first_decision(ctx: RoutingContext) -> Optional[dict]:
+    if ctx.spillover and ctx.spillover["spilled"]:
+        return ctx.spillover
+    if ctx.prerouting and ctx.prerouting["enforced"]:
+        return ctx.prerouting
+    return None
+
+
+async def _cloud_first(messages, effective_temp, ctx: RoutingContext, decision: dict):
+    """Answer on cloud without a local attempt; None falls back to local."""
+    try:
+        result = await call_cloud(messages, effective_temp, ctx=ctx)
+    except Exception as cloud_error:
+        print(f"Cloud-first routing failed, answering locally: {cloud_error}")
+        decision["error"] = str(cloud_error)
+        return None
+    if decision is ctx.spillover:
+        spillover.charge(ctx.tenant, result[2])
+    return result
+
+
+async def _finalize(messages, key, conversation_id, requested_model, local_model, force_cloud,
+                    route, answer, confidence, latency_ms, usage, local_usage, ctx: RoutingContext,
+                    completion_id=None):
+    """Build the response for a routed answer, then log and cache it."""
     # Ensure we have a valid answer
     if not answer or not answer.strip():
         answer = "I apologize, but I couldn't generate a proper response. Please try rephrasing your question."
         confidence = 0.0
         print(f"Warning: Empty answer after routing. Route was: {route}")
     
+    if ctx.early_abort:
+        early_aborts.settle(ctx.early_abort, escalated=route == "cloud")
+
     # Calculate costs
     est_cost = estimate_cost(usage) if route == "cloud" else 0.0
     # Naive saved cost: pretend same tokens would have gone to cloud
@@ -196,7 +423,7 @@ def chat(req: ChatRequest):
     response_local_model = None if force_cloud else local_model
 
     resp = ChatResponse(
-        id=str(uuid.uuid4())[:8],
+        id=completion_id or str(uuid.uuid4())[:8],
         choices=[Choice(index=0, message=ChoiceMsg(content=answer))],
         model=response_model_name,
         local_model=response_local_model,
@@ -209,53 +436,289 @@ def chat(req: ChatRequest):
         conversation_id=conversation_id
     ).dict()
 
-    # Persist log, cap size
-    with SessionLocal() as db:
-        le = LogEntry(
-            route=route,
-            prompt_hash=key,
-            confidence=float(confidence),
-            latency_ms=latency_ms,
-            estimated_cost_usd=resp["estimated_cost_usd"],
-            estimated_cost_saved_usd=resp["estimated_cost_saved_usd"],
-            request=json.dumps({
-                "conversation_id": conversation_id,
-                "messages": [m for m in messages],
-                "requested_model": requested_model or None,
-                "selected_local_model": None if force_cloud else local_model,
-                "forced_cloud": force_cloud
-            }),
-            response=json.dumps(resp)
-        )
-        db.add(le)
-        db.commit()
-        
-        # Prune old logs
-        db.execute(
-            text(
-                f"DELETE FROM logs WHERE id NOT IN "
-                f"(SELECT id FROM logs ORDER BY id DESC LIMIT {settings.MAX_LOG_ROWS})"
-            )
-        )
-        db.commit()
+    ROUTES.labels(route).inc()
+
+    # Persist log via the background writer (never blocks on the database)
+    await log_writer.submit(dict(
+        route=route,
+        model=resp["model"],
+        prompt_hash=key,
+        confidence=float(confidence),
+        latency_ms=latency_ms,
+        estimated_cost_usd=resp["estimated_cost_usd"],
+        estimated_cost_saved_usd=resp["estimated_cost_saved_usd"],
+        request={
+            "conversation_id": conversation_id,
+            "messages": [m for m in messages],
+            "requested_model": requested_model or None,
+            "selected_local_model": None if force_cloud else local_model,
+            "forced_cloud": force_cloud,
+            "timings_ms": ctx.timings,
+            "total_ms": int((time.time() - ctx.started) * 1000),
+            "reused_stages": ctx.reused,
+            "spillover": ctx.spillover,
+            "prerouting": ctx.prerouting,
+            "early_abort": ctx.early_abort,
+        },
+        response=resp,
+    ))
 
     # Cache the response
-    cache_set(key, resp)
+    await cache_set(key, resp)
+    if semantic_cache is not None:
+        semantic_cache.store(key, resp)
 
     return resp
 
 
+def _sse_response(events):
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _sse(data) -> str:
+    return f"data: {json.dumps(data)}\n\n"
+
+
+def _chunk(completion_id: str, created: int, model: str, delta: dict, finish_reason=None, **extra) -> str:
+    """Format an OpenAI-compatible ``chat.completion.chunk`` SSE event."""
+    return _sse({
+        "id": completion_id,
+        "object": "chat.completion.chunk",
+        "created": created,
+        "model": model,
+        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+        **extra,
+    })
+
+
+def _final_chunk(completion_id: str, created: int, resp: dict) -> str:
+    # Router metadata rides on the last chunk, mirroring the non-streaming response
+    return _chunk(
+        completion_id, created, resp["model"], {}, "stop",
+        local_model=resp["local_model"],
+        route=resp["route"],
+        confidence=resp["confidence"],
+        latency_ms=resp["latency_ms"],
+        estimated_cost_usd=resp["estimated_cost_usd"],
+        estimated_cost_saved_usd=resp["estimated_cost_saved_usd"],
+        usage=resp["usage"],
+        conversation_id=resp["conversation_id"],
+    )
+
+
+async def _replay_cached(resp: dict):
+    created = int(time.time())
+    yield _chunk(resp["id"], created, resp["model"], {"role": "assistant"})
+    yield _chunk(resp["id"], created, resp["model"], {"content": resp["choices"][0]["message"]["content"]})
+    yield _final_chunk(resp["id"], created, resp)
+    yield "data: [DONE]\n\n"
+
+
+async def _stream_chat(messages, key, conversation_id, requested_model, local_model, force_cloud, temperature,
+                       ctx: RoutingContext):
+    try:
+        async for chunk in _relay_stream(
+            messages, key, conversation_id, requested_model, local_model, force_cloud, temperature, ctx
+        ):
+            yield chunk
+    finally:
+        _end_profile(ctx, "stream")
+
+
+async def _relay_stream(messages, key, conversation_id, requested_model, local_model, force_cloud, temperature,
+                        ctx: RoutingContext):
+    """Relay a routed answer as SSE chunks, then log and cache the full response.
+
+    A streamed local answer cannot be retracted, so low confidence does not
+    escalate here; the local attempt only falls back to cloud when it fails
+    before any token has been sent.
+    """
+    completion_id = str(uuid.uuid4())[:8]
+    created = int(time.time())
+    route = "cloud" if force_cloud else "local"
+    if not force_cloud and _decide_cloud_first(messages, local_model, conversation_id, ctx) is not None:
+        route = "cloud"
+    yield _chunk(completion_id, created, settings.CLOUD_MODEL if route == "cloud" else local_model, {"role": "assistant"})
+
+    result = None
+    streamed = False
+    try:
+        while result is None:
+            model_name = settings.CLOUD_MODEL if route == "cloud" else local_model
+            if route == "cloud":
+                events = stream_cloud(messages, temperature, ctx=ctx)
+            else:
+                events = stream_local(messages, temperature, model=local_model, ctx=ctx,
+                                      early_abort=ctx.early_abort is None)
+            try:
+                async for event in events:
+                    if event.get("done"):
+                        result = event
+                    else:
+                        streamed = True
+                        yield _chunk(completion_id, created, model_name, {"content": event["delta"]})
+            except Exception as stream_error:
+                if route == "local" and not streamed and settings.ANTHROPIC_API_KEY and cloud_allowed(messages):
+                    print(f"Local model failed: {stream_error}")
+                    route = "cloud"
+                    ESCALATIONS.labels("low_confidence" if isinstance(stream_error, EarlyAbort) else "local_error").inc()
+                    continue
+                if route == "cloud" and ctx.early_abort and "error" not in ctx.early_abort and not streamed:
+                    print(f"Cloud escalation failed, finishing the local answer: {stream_error}")
+                    ctx.early_abort["error"] = str(stream_error)
+                    route = "local"
+                    continue
+                decision = _cloud_first_decision(ctx)
+                if route == "cloud" and decision and "error" not in decision and not streamed:
+                    print(f"Cloud-first routing failed, answering locally: {stream_error}")
+                    decision["error"] = str(stream_error)
+                    route = "local"
+                    continue
+                raise
+    except Exception as e:
+        print(f"Streaming {route} model failed: {e}")
+        yield _sse({"error": {"message": f"{route.capitalize()} model unavailable: {str(e)}", "type": "upstream_error"}})
+        yield "data: [DONE]\n\n"
+        return
+
+    if route == "cloud" and ctx.spillover and ctx.spillover["spilled"] and "error" not in ctx.spillover:
+        spillover.charge(ctx.tenant, result["usage"])
+    if route == "local":
+        prerouter.record_outcome(ctx.prerouting, result["confidence"] < settings.CONFIDENCE_THRESHOLD, result["latency_ms"])
+    if route == "local" and result["confidence"] < settings.CONFIDENCE_THRESHOLD:
+        print(f"Low confidence ({result['confidence']:.2f}) on a streamed answer; not escalating")
+
+    resp = await _finalize(
+        messages, key, conversation_id, requested_model, local_model, force_cloud,
+        route=route,
+        answer=result["answer"],
+        confidence=result["confidence"],
+        latency_ms=result["latency_ms"],
+        usage=result["usage"],
+        local_usage=result["usage"] if route == "local" else {},
+        ctx=ctx,
+        completion_id=completion_id,
+    )
+    if not streamed:
+        # No answer text could be extracted incrementally; send the final answer whole
+        yield _chunk(completion_id, created, resp["model"], {"content": resp["choices"][0]["message"]["content"]})
+    yield _final_chunk(completion_id, created, resp)
+    yield "data: [DONE]\n\n"
+
+
 @app.get("/api/logs")
-def logs():
-    """Get recent request logs for dashboard."""
+def logs(
+    response: Response,
+    limit: int = 100,
+    before_id: Optional[int] = None,
+    route: Optional[str] = None,
+    model: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    min_confidence: Optional[float] = None,
+    max_confidence: Optional[float] = None,
+    fields: Optional[str] = None,
+):
+    """Get request logs for dashboard, newest first.
+
+    Pass the X-Next-Cursor response header back as ``before_id`` for the
+    next page. ``fields`` is a comma-separated projection; request/response
+    bodies are only returned when listed.
+    """
+    try:
+        columns = log_query.parse_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     with SessionLocal() as db:
-        rows = db.execute(
-            text(
-                "SELECT id, route, confidence, latency_ms, estimated_cost_usd, "
-                "estimated_cost_saved_usd, created_at FROM logs ORDER BY id DESC LIMIT 100"
-            )
-        ).fetchall()
-        return [dict(r._mapping) for r in rows]
+        rows, next_cursor = log_query.query_logs(
+            db, limit=limit, before_id=before_id, route=route, model=model, since=since, until=until,
+            min_confidence=min_confidence, max_confidence=max_confidence, fields=columns,
+        )
+    if next_cursor is not None:
+        response.headers["X-Next-Cursor"] = str(next_cursor)
+    return rows
+
+
+@app.get("/api/stats")
+def stats(window: str = "1h"):
+    """Request totals, route mix and latency percentiles for a trailing window (e.g. 15m, 24h, 7d)."""
+    try:
+        seconds = rollups.parse_window(window)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    with SessionLocal() as db:
+        return rollups.summarize(db, seconds)
+
+
+@app.get("/api/cache")
+def cache():
+    """Response cache size and hit/miss/eviction counters."""
+    stats = cache_stats()
+    if semantic_cache is not None:
+        stats["semantic"] = semantic_cache.stats()
+    stats["coalescing"] = inflight.stats()
+    stats["speculation"] = speculation.stats()
+    stats["web_search"] = get_web_search_service().cache_stats()
+    stats["web_search"]["admission"] = search_admission.stats()
+    return stats
+
+
+@app.get("/api/log-writer")
+def log_writer_stats():
+    """Background log writer and retention counters."""
+    return {**log_writer.stats(), "retention": log_retention.stats()}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Prometheus text exposition of the router's metrics."""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/api/http-pools")
+def http_pools():
+    """Upstream connection pool counters (requests vs. connections opened)."""
+    return http.pool_stats()
+
+
+@app.get("/api/ollama-backends")
+def ollama_backends():
+    """Ollama hosts with health, in-flight requests and model inventory."""
+    return ollama_pool.stats()
+
+
+@app.get("/api/early-aborts")
+def early_abort_stats():
+    """Confidence-first generation: local generations stopped early and the tokens/latency saved."""
+    return early_aborts.stats()
+
+
+@app.get("/api/prerouting")
+def prerouting_stats():
+    """Pre-routing mode and shadow-mode accuracy of the escalation predictor."""
+    return prerouter.stats()
+
+
+@app.get("/api/spillover")
+def spillover_stats():
+    """SLO spillover counters and the per-model local throughput estimates."""
+    return spillover.stats()
+
+
+@app.get("/api/breakers")
+def breakers():
+    """Circuit breaker state and recent failure counts per upstream."""
+    return breaker_stats()
+
+
+@app.get("/api/residency")
+def model_residency_stats():
+    """Resident models per Ollama host, keep_alive policy and cold-load counters."""
+    return residency.stats()
 
 
 @app.get("/")
@@ -0,0 +1,188 @@
+"""
+Minimal in-process metrics registry with Prometheus text exposition.
+
+Pure Python with no dependencies, in the spirit of classifier.py. Metric
+updates are plain dict/list operations on the event loop thread, so the
+hot-path cost is a few hundred nanoseconds (see benchmarks/metrics_overhead.py).
+Label children should be bound once (``metric.labels(...)``) and reused.
+"""
+
+from bisect import bisect_left
+from typing import Dict, List, Sequence, Tuple
+
+# Seconds; spans a cache lookup (sub-ms) to a long local generation
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _fmt_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lookup: Dict[tuple, object] = {}
+        registry.register(self)
+
+    def labels(self, *values: str):
+        # Fast path keyed by the caller's raw values; _children holds the canonical series
+        child = self._lookup.get(values)
+        if child is None:
+            key = tuple(str(v) for v in values)
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            child = self._children.get(key)
+            if child is None:
+                child = self._children[key] = self._new_child()
+            self._lookup[values] = child
+        return child
+
+    def _default(self):
+        # Metrics without labels act as their own single child
+        return self.labels()
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for values, child in sorted(self._children.items()):
+            lines += child.render(self.name, self.labelnames, values)
+        return lines
+
+
+class _CounterChild:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0):
+        self.value += amount
+
+    def render(self, name, labelnames, values):
+        return [f"{name}_total{_fmt_labels(labelnames, values)} {self.value}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+    _new_child = _CounterChild
+
+    def inc(self, amount: float = 1.0):
+        self._default().inc(amount)
+
+
+class _GaugeChild:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0):
+        self.value += amount
+
+    def dec(self, amount: float = 1.0):
+        self.value -= amount
+
+    def set(self, value: float):
+        self.value = value
+
+    def track(self) -> "_GaugeChild":
+        """Count the enclosed ``with`` block as in progress."""
+        return self
+
+    def __enter__(self):
+        self.value += 1
+
+    def __exit__(self, *exc):
+        self.value -= 1
+
+    def render(self, name, labelnames, values):
+        return [f"{name}{_fmt_labels(labelnames, values)} {self.value}"]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+    _new_child = _GaugeChild
+
+    def set(self, value: float):
+        self._default().set(value)
+
+
+class _HistogramChild:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def render(self, name, labelnames, values):
+        lines = []
+        cumulative = 0
+        for bound, n in zip(list(self.buckets) + ["+Inf"], self.counts):
+            cumulative += n
+            le = f'le="{bound}"'
+            lines.append(f"{name}_bucket{_fmt_labels(labelnames, values, le)} {cumulative}")
+        lines.append(f"{name}_sum{_fmt_labels(labelnames, values)} {self.sum}")
+        lines.append(f"{name}_count{_fmt_labels(labelnames, values)} {self.count}")
+        return lines
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, help, labelnames)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float):
+        self._default().observe(value)
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} already registered")
+        self._metrics[metric.name] = metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines += metric.render()
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+STAGE_SECONDS = Histogram(
+    "router_stage_duration_seconds",
+    "Time spent per request stage (ocr, web_search, ollama, claude, cache_lookup, db_write)",
+    ["stage"],
+)
+ROUTES = Counter("router_route_decisions", "Requests answered per route", ["route"])
+ESCALATIONS = Counter("router_escalations", "Local attempts that ended on the cloud model", ["reason"])
+CACHE_LOOKUPS = Counter("router_cache_lookups", "Response cache lookups by result", ["result"])
+FALLBACKS = Counter("router_client_fallbacks", "Upstream calls served by a legacy fallback endpoint", ["path"])
+IN_FLIGHT = Gauge("router_backend_in_flight", "Upstream calls currently in progress", ["backend"])
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, Text, DateTime
+from sqlalchemy import Column, Integer, String, Float, Text, DateTime, LargeBinary, UniqueConstraint
 from sqlalchemy.sql import func
 from .db import Base
 
@@ -7,13 +7,40 @@ class LogEntry(Base):
     __tablename__ = "logs"
     
     id = Column(Integer, primary_key=True)
-    route = Column(String)  # local or cloud
+    route = Column(String, index=True)  # local or cloud
+    model = Column(String, index=True)  # model that produced the answer
     prompt_hash = Column(String, index=True)
     confidence = Column(Float)
     latency_ms = Column(Integer)
     estimated_cost_usd = Column(Float)
     estimated_cost_saved_usd = Column(Float)
-    request = Column(Text)
+    request = Column(Text)  # legacy plain JSON; new rows use request_blob
     response = Column(Text)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    request_blob = Column(LargeBinary)  # compressed, messages by reference (see log_store.py)
+    response_blob = Column(LargeBinary)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
 
+
+
+class LogRollup(Base):
+    """Per-minute/per-hour aggregates of the logs table, one row per route and bucket."""
+    __tablename__ = "log_rollups"
+    __table_args__ = (UniqueConstraint("granularity", "bucket_start", "route"),)
+
+    id = Column(Integer, primary_key=True)
+    granularity = Column(Integer)  # bucket width in seconds
+    bucket_start = Column(Integer)  # unix time
+    route = Column(String)
+    count = Column(Integer, default=0)
+    cost_usd = Column(Float, default=0.0)
+    saved_usd = Column(Float, default=0.0)
+    latency_sketch = Column(Text)  # LatencySketch JSON
+
+
+class LogMessage(Base):
+    """Deduplicated, compressed message bodies referenced from log rows."""
+    __tablename__ = "log_messages"
+
+    hash = Column(String, primary_key=True)  # sha256 of the canonical message JSON
+    body = Column(LargeBinary)
+    last_used = Column(Integer, index=True)  # unix time, refreshed at most hourly
@@ -0,0 +1,111 @@
+"""
+Pre-routing: send requests whose local answer is predicted to escalate
+straight to cloud, skipping a local generation that would be thrown away.
+
+The predictor is a LogisticModel (see classifier.py) over cheap features:
+hashed n-grams of the last user turn, prompt length, history depth, OCR
+presence and the conversation's previous route. It is trained offline from
+the logs table with scripts/train_router.py and loaded at startup.
+
+PREROUTING_MODE:
+- "off": no prediction
+- "shadow": predict and log, but always try local; the actual outcome is
+  compared with the prediction so accuracy can be checked before enforcing
+- "enforce": predictions >= PREROUTING_THRESHOLD go directly to cloud when
+  cloud is allowed and the Anthropic breaker is not open
+"""
+
+import math
+import os
+from typing import Dict, List, Optional
+
+from .circuit_breaker import claude_breaker
+from .classifier import LogisticModel
+from .metrics import Counter
+from .policy import cloud_allowed
+from .settings import settings
+
+PREROUTED = Counter("router_prerouted", "Requests sent to cloud because local was predicted to escalate")
+
+
+def routing_features(model: LogisticModel, messages: List[dict], has_ocr: bool,
+                     previous_route: Optional[str]) -> Dict[int, float]:
+    """Features for one request; shared by the router and scripts/train_router.py."""
+    last_user = next((m.get("content", "") for m in reversed(messages) if m.get("role") == "user"), "")
+    chars = sum(len(m.get("content", "")) for m in messages)
+    extra = {
+        "prompt_len": math.log1p(chars) / 10,
+        "history_depth": min(len(messages) - 1, 20) / 20,
+        "ocr": 1.0 if has_ocr else 0.0,
+        "prev_cloud": 1.0 if previous_route == "cloud" else 0.0,
+        "prev_local": 1.0 if previous_route == "local" else 0.0,
+    }
+    return model.features(last_user, extra)
+
+
+class PreRouter:
+    def __init__(self):
+        self.model: Optional[LogisticModel] = None
+        self.enforced = 0
+        # Shadow-mode confusion counts (positive = escalated)
+        self.tp = self.fp = self.tn = self.fn = 0
+        self.local_ms_skippable = 0  # local time spent on correctly predicted escalations
+
+    def load(self):
+        if settings.PREROUTING_MODE == "off":
+            return
+        path = settings.PREROUTING_MODEL_PATH
+        if os.path.exists(path):
+            self.model = LogisticModel.load(path)
+            print(f"Loaded pre-routing model from {path} ({settings.PREROUTING_MODE} mode)")
+        else:
+            print(f"Pre-routing model not found at {path}; pre-routing disabled")
+
+    def decide(self, messages: List[dict], has_ocr: bool, previous_route: Optional[str]) -> Optional[dict]:
+        """Prediction for the log row; ``decision["enforced"]`` routes to cloud."""
+        if settings.PREROUTING_MODE == "off" or self.model is None:
+            return None
+        p = self.model.predict_proba(routing_features(self.model, messages, has_ocr, previous_route))
+        decision = {
+            "mode": settings.PREROUTING_MODE,
+            "p_escalate": round(p, 4),
+            "predicted": p >= settings.PREROUTING_THRESHOLD,
+            "enforced": False,
+        }
+        if (decision["predicted"] and settings.PREROUTING_MODE == "enforce" and cloud_allowed(messages)
+                and settings.ANTHROPIC_API_KEY and not claude_breaker.is_open()):
+            decision["enforced"] = True
+            self.enforced += 1
+            PREROUTED.inc()
+        return decision
+
+    def record_outcome(self, decision: Optional[dict], escalated: bool, local_ms: int):
+        """Score a prediction against what the local attempt actually did."""
+        if not decision or decision["enforced"]:
+            return
+        if decision["predicted"] and escalated:
+            self.tp += 1
+            self.local_ms_skippable += local_ms
+        elif decision["predicted"]:
+            self.fp += 1
+        elif escalated:
+            self.fn += 1
+        else:
+            self.tn += 1
+
+    def stats(self) -> dict:
+        scored = self.tp + self.fp + self.tn + self.fn
+        return {
+            "mode": settings.PREROUTING_MODE,
+            "model_loaded": self.model is not None,
+            "threshold": settings.PREROUTING_THRESHOLD,
+            "enforced": self.enforced,
+            "scored": scored,
+            "accuracy": round((self.tp + self.tn) / scored, 4) if scored else 0.0,
+            "precision": round(self.tp / (self.tp + self.fp), 4) if self.tp + self.fp else 0.0,
+            "recall": round(self.tp / (self.tp + self.fn), 4) if self.tp + self.fn else 0.0,
+            "local_ms_skippable": self.local_ms_skippable,
+        }
+
+
+prerouter = PreRouter()
@@ -0,0 +1,158 @@
+"""
+Opt-in sampling profiler for slow requests.
+
+A request is profiled when it sends ``X-Profile: 1`` (if
+PROFILE_ALLOW_HEADER, at most PROFILE_HEADER_PER_MINUTE times a minute)
+or is picked at random with PROFILE_SAMPLE_RATE.
+While at least one profiled request is running, a daemon thread samples
+every PROFILE_INTERVAL_MS:
+- the Python stack of every thread (event loop, to_thread workers running
+  OCR, DDGS and database writes)
+- the await chain of every suspended asyncio task on the loop, which shows
+  where a request is waiting (e.g. on Ollama) rather than computing
+
+When a profiled request finishes slower than PROFILE_SLOW_MS (or was
+forced by header) its samples are written to PROFILE_DIR in folded-stack
+format, ready for flamegraph.pl or speedscope. Dumps stop once the
+directory holds PROFILE_MAX_FILES profiles. Samples are process-wide,
+so with concurrent requests a profile also contains their stacks.
+"""
+
+import asyncio
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter, deque
+from typing import Deque, Dict, Optional
+
+from .settings import settings
+
+
+def _frame_name(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})"
+
+
+def _thread_stack(frame) -> str:
+    names = []
+    while frame is not None:
+        names.append(_frame_name(frame))
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class Profile:
+    def __init__(self, forced: bool):
+        self.forced = forced
+        self.started = time.time()
+        self.samples: Counter = Counter()
+
+
+class SamplingProfiler:
+    def __init__(self):
+        self._active: Dict[int, Profile] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._forced_at: Deque[float] = deque()
+        self.profiled = 0
+        self.dumped = 0
+        self.forced_rejected = 0
+        self.dumps_skipped = 0
+
+    def allow_forced(self, header_requested: bool) -> bool:
+        """Whether an ``X-Profile: 1`` request may be force-profiled right now."""
+        if not (header_requested and settings.PROFILE_ALLOW_HEADER):
+            return False
+        now = time.monotonic()
+        with self._lock:
+            while self._forced_at and now - self._forced_at[0] >= 60:
+                self._forced_at.popleft()
+            if len(self._forced_at) >= settings.PROFILE_HEADER_PER_MINUTE:
+                self.forced_rejected += 1
+                return False
+            self._forced_at.append(now)
+        return True
+
+    def should_profile(self, forced: bool) -> bool:
+        if forced:
+            return True
+        return settings.PROFILE_SAMPLE_RATE > 0 and random.random() < settings.PROFILE_SAMPLE_RATE
+
+    def start(self, forced: bool = False) -> Profile:
+        """Begin collecting samples for one request (call on the event loop)."""
+        profile = Profile(forced)
+        self._loop = asyncio.get_running_loop()
+        with self._lock:
+            self._active[id(profile)] = profile
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+                self._thread.start()
+        self.profiled += 1
+        return profile
+
+    def stop(self, profile: Profile, request_id: str) -> Optional[str]:
+        """Stop sampling for a request; returns the folded-stack file if it was dumped."""
+        with self._lock:
+            self._active.pop(id(profile), None)
+        elapsed_ms = (time.time() - profile.started) * 1000
+        if not profile.samples or not (profile.forced or elapsed_ms >= settings.PROFILE_SLOW_MS):
+            return None
+        os.makedirs(settings.PROFILE_DIR, exist_ok=True)
+        if len(os.listdir(settings.PROFILE_DIR)) >= settings.PROFILE_MAX_FILES:
+            self.dumps_skipped += 1
+            return None
+        path = os.path.join(settings.PROFILE_DIR, f"{int(profile.started)}-{request_id}-{int(elapsed_ms)}ms.folded")
+        with open(path, "w") as f:
+            for stack, count in profile.samples.most_common():
+                f.write(f"{stack} {count}\n")
+        self.dumped += 1
+        return path
+
+    def _run(self):
+        me = threading.get_ident()
+        while True:
+            with self._lock:
+                if not self._active:
+                    self._thread = None
+                    return
+                profiles = list(self._active.values())
+            stacks = self._sample(me)
+            for profile in profiles:
+                profile.samples.update(stacks)
+            time.sleep(settings.PROFILE_INTERVAL_MS / 1000)
+
+    def _sample(self, skip_thread: int) -> list:
+        names = {t.ident: t.name for t in threading.enumerate()}
+        stacks = [
+            f"thread:{names.get(tid, tid)};{_thread_stack(frame)}"
+            for tid, frame in sys._current_frames().items() if tid != skip_thread
+        ]
+        loop = self._loop
+        if loop is not None:
+            try:
+                tasks = list(asyncio.all_tasks(loop))
+            except RuntimeError:
+                # The task set changed while we copied it; skip tasks this round
+                tasks = []
+            for task in tasks:
+                frames = task.get_stack()
+                if frames:
+                    stacks.append(f"task:{task.get_name()};" + ";".join(_frame_name(f) for f in frames))
+        return stacks
+
+    def stats(self) -> dict:
+        return {
+            "active": len(self._active),
+            "profiled": self.profiled,
+            "dumped": self.dumped,
+            "dumps_skipped": self.dumps_skipped,
+            "forced_rejected": self.forced_rejected,
+            "sample_rate": settings.PROFILE_SAMPLE_RATE,
+            "slow_ms": settings.PROFILE_SLOW_MS,
+        }
+
+
+profiler = SamplingProfiler()
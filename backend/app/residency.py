@@ -0,0 +1,137 @@
+"""
+Keeps LOCAL_MODELS loaded on the Ollama hosts.
+
+Ollama unloads a model after it has been idle for its keep_alive (5m by
+default), and the next request pays a multi-second load. At startup the
+configured models are preloaded on every host that has them, and each
+local request carries a keep_alive (OLLAMA_KEEP_ALIVE, overridable per
+model). Which models are resident is refreshed from /api/ps; when a model
+is cold and one of its LOCAL_MODEL_ALTERNATES is warm, the alternate can
+answer instead.
+"""
+
+import asyncio
+from typing import Dict, Optional, Set, Union
+
+from .clients.http import get_client
+from .clients.ollama_pool import normalize_model, ollama_pool
+from .metrics import Counter, Histogram
+from .settings import settings
+
+COLD_LOADS = Counter("router_ollama_cold_loads", "Local requests that waited for Ollama to load the model", ["model"])
+COLD_LOAD_SECONDS = Histogram("router_ollama_cold_load_seconds", "Time Ollama spent loading a cold model", ["model"])
+SUBSTITUTIONS = Counter("router_warm_model_substitutions", "Cold model requests answered by a warm alternate", ["requested", "served"])
+
+# Ollama reports a few milliseconds of load_duration even for a resident model
+_COLD_LOAD_MS = 500
+
+
+def keep_alive_for(model: str) -> Optional[Union[str, int]]:
+    """keep_alive to send for ``model``; numbers are seconds (-1 keeps it loaded)."""
+    overrides = {normalize_model(k): v for k, v in settings.OLLAMA_KEEP_ALIVE_OVERRIDES.items()}
+    value = overrides.get(normalize_model(model), settings.OLLAMA_KEEP_ALIVE)
+    if not value:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        return value  # a duration such as "30m"
+
+
+class ModelResidency:
+    def __init__(self, pool):
+        self.pool = pool
+        self._loaded: Dict[str, Set[str]] = {}  # host -> models resident at the last /api/ps or request
+        self.cold_loads = 0
+        self.substitutions = 0
+        self.warmups = 0
+        self.warmup_failures = 0
+
+    def is_warm(self, model: str) -> bool:
+        model = normalize_model(model)
+        return any(model in models for models in self._loaded.values())
+
+    def pick(self, model: str) -> str:
+        """``model``, or a warm alternate when it is cold (no side effects)."""
+        alternates = {normalize_model(k): v for k, v in settings.LOCAL_MODEL_ALTERNATES.items()}
+        candidates = alternates.get(normalize_model(model))
+        if not candidates or self.is_warm(model):
+            return model
+        return next((alt for alt in candidates if self.is_warm(alt)), model)
+
+    def record_substitution(self, requested: str, served: str):
+        """Count a local call that a warm alternate answered for a cold model."""
+        self.substitutions += 1
+        SUBSTITUTIONS.labels(requested, served).inc()
+        print(f"Model {requested} is cold; answering with warm {served}")
+
+    def observe(self, base: str, model: str, load_ms: Optional[int]):
+        """Record a finished request; a long load_duration means the model was cold."""
+        model = normalize_model(model)
+        if load_ms and load_ms >= _COLD_LOAD_MS:
+            self.cold_loads += 1
+            COLD_LOADS.labels(model).inc()
+            COLD_LOAD_SECONDS.labels(model).observe(load_ms / 1000)
+        self._loaded.setdefault(base, set()).add(model)
+
+    async def refresh(self):
+        """Re-read the resident models of every host from /api/ps."""
+        async def ps(backend):
+            try:
+                r = await get_client("ollama").get(f"{backend.base}/api/ps", timeout=settings.OLLAMA_PROBE_TIMEOUT)
+                r.raise_for_status()
+                self._loaded[backend.base] = {normalize_model(m["name"]) for m in r.json().get("models", [])}
+            except Exception as e:
+                print(f"Ollama /api/ps failed for {backend.base}: {e}")
+                self._loaded.pop(backend.base, None)
+
+        await asyncio.gather(*(ps(b) for b in self.pool.backends))
+
+    async def warm_up(self):
+        """Preload LOCAL_MODELS on every host that has them, one model at a time per host."""
+        await self.pool.probe_all()
+        models = list(dict.fromkeys(settings.LOCAL_MODELS or [settings.LOCAL_MODEL]))
+
+        async def load(backend):
+            for model in models:
+                if not (backend.healthy and backend.has_model(model)):
+                    continue
+                payload = {"model": model}
+                keep_alive = keep_alive_for(model)
+                if keep_alive is not None:
+                    payload["keep_alive"] = keep_alive
+                try:
+                    # A generate call without a prompt only loads the model
+                    r = await get_client("ollama").post(
+                        f"{backend.base}/api/generate", json=payload, timeout=settings.OLLAMA_TIMEOUT
+                    )
+                    r.raise_for_status()
+                    load_ms = int(r.json().get("load_duration", 0) / 1e6)
+                    self.observe(backend.base, model, load_ms)
+                    self.warmups += 1
+                    print(f"Warmed {model} on {backend.base} in {load_ms}ms")
+                except Exception as e:
+                    self.warmup_failures += 1
+                    print(f"Warm-up of {model} on {backend.base} failed: {e}")
+
+        await asyncio.gather(*(load(b) for b in self.pool.backends))
+
+    async def run_forever(self):
+        if settings.OLLAMA_WARMUP_ON_STARTUP:
+            await self.warm_up()
+        while True:
+            await self.refresh()
+            await asyncio.sleep(settings.OLLAMA_PS_INTERVAL_SECONDS)
+
+    def stats(self) -> dict:
+        return {
+            "loaded": {base: sorted(models) for base, models in self._loaded.items()},
+            "keep_alive": settings.OLLAMA_KEEP_ALIVE,
+            "cold_loads": self.cold_loads,
+            "substitutions": self.substitutions,
+            "warmups": self.warmups,
+            "warmup_failures": self.warmup_failures,
+        }
+
+
+residency = ModelResidency(ollama_pool)
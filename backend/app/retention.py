@@ -0,0 +1,137 @@
+"""
+Background log retention.
+
+Instead of a DELETE ... NOT IN (...) rewrite after every insert, a
+periodic task computes an id watermark and deletes everything at or
+below it in small batches, so each transaction holds the write lock only
+briefly. The watermark is the higher of:
+- the row-count limit: the id MAX_LOG_ROWS rows back from the newest
+- the age limit: the newest id older than LOG_MAX_AGE_DAYS (0 disables)
+
+Pruned rows can be appended to gzip-compressed JSONL files in
+LOG_ARCHIVE_DIR before they are deleted. Dashboard rollups are pruned on
+their own, longer schedule so /api/stats outlives the raw rows, and
+deduplicated message bodies are dropped once no remaining row can use them.
+"""
+
+import asyncio
+import gzip
+import json
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy import text
+
+from . import log_store
+from .db import SessionLocal
+from .rollups import HOUR, MINUTE
+from .settings import settings
+
+
+class LogRetention:
+    def __init__(self, session_factory=SessionLocal):
+        self.session_factory = session_factory
+        self.runs = 0
+        self.deleted = 0
+        self.archived = 0
+        self.last_watermark: Optional[int] = None
+        self.last_run_ms = 0
+
+    def watermark(self, db) -> Optional[int]:
+        """Highest id that falls outside the retention limits, if any."""
+        marks = []
+        if settings.MAX_LOG_ROWS > 0:
+            marks.append(db.execute(
+                text("SELECT id FROM logs ORDER BY id DESC LIMIT 1 OFFSET :n"),
+                {"n": settings.MAX_LOG_ROWS},
+            ).scalar())
+        if settings.LOG_MAX_AGE_DAYS > 0:
+            cutoff = datetime.now(timezone.utc) - timedelta(days=settings.LOG_MAX_AGE_DAYS)
+            marks.append(db.execute(
+                text("SELECT MAX(id) FROM logs WHERE created_at < :cutoff"),
+                {"cutoff": cutoff.strftime("%Y-%m-%d %H:%M:%S")},
+            ).scalar())
+        marks = [m for m in marks if m is not None]
+        return max(marks) if marks else None
+
+    def run_once(self) -> int:
+        """Prune (and optionally archive) expired rows; returns rows deleted."""
+        start = time.time()
+        deleted = 0
+        with self.session_factory() as db:
+            mark = self.watermark(db)
+            self.last_watermark = mark
+            while mark is not None:
+                ids = [r[0] for r in db.execute(
+                    text("SELECT id FROM logs WHERE id <= :mark ORDER BY id LIMIT :batch"),
+                    {"mark": mark, "batch": settings.LOG_RETENTION_BATCH_SIZE},
+                ).fetchall()]
+                if not ids:
+                    break
+                if settings.LOG_ARCHIVE_DIR:
+                    self._archive(db, ids[0], ids[-1])
+                db.execute(text("DELETE FROM logs WHERE id BETWEEN :lo AND :hi"), {"lo": ids[0], "hi": ids[-1]})
+                db.commit()
+                deleted += len(ids)
+            self._prune_rollups(db)
+            self._prune_messages(db)
+        self.runs += 1
+        self.deleted += deleted
+        self.last_run_ms = int((time.time() - start) * 1000)
+        return deleted
+
+    def _prune_rollups(self, db):
+        now = int(time.time())
+        db.execute(
+            text("DELETE FROM log_rollups WHERE (granularity = :m AND bucket_start < :m_cutoff) "
+                 "OR (granularity = :h AND bucket_start < :h_cutoff)"),
+            {"m": MINUTE, "m_cutoff": now - settings.ROLLUP_MINUTE_RETENTION_HOURS * 3600,
+             "h": HOUR, "h_cutoff": now - settings.ROLLUP_HOUR_RETENTION_DAYS * 86400},
+        )
+        db.commit()
+
+    def _prune_messages(self, db):
+        # Every message a remaining row references was touched no earlier than
+        # that row's write time minus the touch interval
+        oldest = db.execute(text(
+            "SELECT CAST(strftime('%s', created_at) AS INTEGER) FROM logs ORDER BY id LIMIT 1"
+        )).scalar()
+        cutoff = (oldest if oldest is not None else int(time.time())) - log_store.TOUCH_INTERVAL_SECONDS
+        db.execute(text("DELETE FROM log_messages WHERE last_used < :cutoff"), {"cutoff": cutoff})
+        db.commit()
+
+    def _archive(self, db, lo: int, hi: int):
+        rows = log_store.unpack(db, [dict(r._mapping) for r in db.execute(
+            text("SELECT * FROM logs WHERE id BETWEEN :lo AND :hi ORDER BY id"), {"lo": lo, "hi": hi},
+        )])
+        os.makedirs(settings.LOG_ARCHIVE_DIR, exist_ok=True)
+        path = os.path.join(settings.LOG_ARCHIVE_DIR, f"logs-{datetime.now(timezone.utc):%Y%m%d}.jsonl.gz")
+        # Appending creates a new gzip member; readers see one continuous stream
+        with gzip.open(path, "at", encoding="utf-8") as f:
+            for r in rows:
+                f.write(json.dumps(r, default=str) + "\n")
+        self.archived += len(rows)
+
+    async def run_forever(self):
+        while True:
+            try:
+                await asyncio.to_thread(self.run_once)
+            except Exception as e:
+                print(f"Log retention run failed: {e}")
+            await asyncio.sleep(settings.LOG_RETENTION_INTERVAL_SECONDS)
+
+    def stats(self) -> dict:
+        return {
+            "runs": self.runs,
+            "deleted": self.deleted,
+            "archived": self.archived,
+            "last_watermark": self.last_watermark,
+            "last_run_ms": self.last_run_ms,
+            "max_rows": settings.MAX_LOG_ROWS,
+            "max_age_days": settings.LOG_MAX_AGE_DAYS,
+        }
+
+
+log_retention = LogRetention()
@@ -0,0 +1,118 @@
+"""
+Incrementally maintained dashboard rollups.
+
+The log writer folds every batch into per-minute and per-hour buckets
+(request count by route, summed cost and saved cost, and a latency sketch)
+in the same transaction as the insert. /api/stats then reads at most a
+bounded number of buckets for its window, however large the logs table is.
+"""
+
+import re
+import time
+from typing import Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import and_, or_, select
+
+from .models import LogRollup
+from .sketch import LatencySketch
+
+MINUTE = 60
+HOUR = 3600
+GRANULARITIES = (MINUTE, HOUR)
+
+# Windows up to this long are answered from minute buckets
+_MINUTE_WINDOW_MAX = 3 * HOUR
+
+_WINDOW = re.compile(r"^(\d+)([mhd])$")
+_UNIT_SECONDS = {"m": MINUTE, "h": HOUR, "d": 24 * HOUR}
+
+
+def parse_window(window: str) -> int:
+    """Parse "15m", "1h", "7d" into seconds; raises ValueError otherwise."""
+    match = _WINDOW.match(window.strip().lower())
+    if not match or int(match.group(1)) == 0:
+        raise ValueError(f"Invalid window {window!r}; use e.g. 15m, 1h, 7d")
+    return int(match.group(1)) * _UNIT_SECONDS[match.group(2)]
+
+
+def record(db, rows: Iterable[dict], now: Optional[float] = None):
+    """Fold log rows into their minute and hour buckets (caller commits)."""
+    now = time.time() if now is None else now
+    deltas: Dict[Tuple[int, int, str], list] = {}
+    for row in rows:
+        for g in GRANULARITIES:
+            key = (g, int(now) // g * g, row.get("route") or "unknown")
+            d = deltas.get(key)
+            if d is None:
+                d = deltas[key] = [0, 0.0, 0.0, LatencySketch()]
+            d[0] += 1
+            d[1] += row.get("estimated_cost_usd") or 0.0
+            d[2] += row.get("estimated_cost_saved_usd") or 0.0
+            d[3].add(row.get("latency_ms") or 0)
+
+    existing = {
+        (r.granularity, r.bucket_start, r.route): r
+        for r in db.execute(select(LogRollup).where(or_(*(
+            and_(LogRollup.granularity == g, LogRollup.bucket_start == b, LogRollup.route == route)
+            for g, b, route in deltas
+        )))).scalars()
+    }
+    for key, (count, cost, saved, sketch) in deltas.items():
+        r = existing.get(key)
+        if r is None:
+            db.add(LogRollup(granularity=key[0], bucket_start=key[1], route=key[2], count=count,
+                             cost_usd=cost, saved_usd=saved, latency_sketch=sketch.to_json()))
+        else:
+            r.count += count
+            r.cost_usd += cost
+            r.saved_usd += saved
+            r.latency_sketch = LatencySketch.from_json(r.latency_sketch).merge(sketch).to_json()
+
+
+def _latency(sketch: LatencySketch) -> dict:
+    return {f"p{int(q * 100)}": round(v) if (v := sketch.quantile(q)) is not None else None
+            for q in (0.5, 0.95, 0.99)}
+
+
+def summarize(db, window_seconds: int, now: Optional[float] = None) -> dict:
+    """Totals, route mix and latency percentiles over the trailing window."""
+    now = time.time() if now is None else now
+    g = MINUTE if window_seconds <= _MINUTE_WINDOW_MAX else HOUR
+    # Whole buckets only, so the window can start up to one bucket early
+    start = (int(now) - window_seconds) // g * g
+    rows = db.execute(select(LogRollup).where(
+        LogRollup.granularity == g, LogRollup.bucket_start >= start,
+    )).scalars()
+
+    total = LatencySketch()
+    routes: Dict[str, dict] = {}
+    for r in rows:
+        route = routes.setdefault(r.route, {"requests": 0, "cost_usd": 0.0, "saved_usd": 0.0,
+                                            "sketch": LatencySketch()})
+        route["requests"] += r.count
+        route["cost_usd"] += r.cost_usd
+        route["saved_usd"] += r.saved_usd
+        sketch = LatencySketch.from_json(r.latency_sketch)
+        route["sketch"].merge(sketch)
+        total.merge(sketch)
+
+    requests = sum(r["requests"] for r in routes.values())
+    return {
+        "window_seconds": window_seconds,
+        "granularity_seconds": g,
+        "since": start,
+        "requests": requests,
+        "cost_usd": round(sum(r["cost_usd"] for r in routes.values()), 6),
+        "saved_usd": round(sum(r["saved_usd"] for r in routes.values()), 6),
+        "latency_ms": _latency(total),
+        "routes": {
+            name: {
+                "requests": r["requests"],
+                "share": round(r["requests"] / requests, 4) if requests else 0.0,
+                "cost_usd": round(r["cost_usd"], 6),
+                "saved_usd": round(r["saved_usd"], 6),
+                "latency_ms": _latency(r["sketch"]),
+            }
+            for name, r in routes.items()
+        },
+    }
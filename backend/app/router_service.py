@@ -1,11 +1,25 @@
+import asyncio
 import json
 import re
 import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
 from .settings import settings
 from .clients import ollama_client, claude_client
 from .policy import cloud_allowed
 from .cache import key_for_messages, cache_get, cache_set
 from .services.web_search import detect_search_needed, perform_search_and_format
+from .services.search_admission import search_admission
+from .metrics import Counter, IN_FLIGHT, STAGE_SECONDS
+from .circuit_breaker import claude_breaker, ollama_breaker
+from .spillover import spillover
+from .residency import residency
+
+_OLLAMA_IN_FLIGHT = IN_FLIGHT.labels("ollama")
+_CLAUDE_IN_FLIGHT = IN_FLIGHT.labels("claude")
+_SEARCH_IN_FLIGHT = IN_FLIGHT.labels("web_search")
+_EARLY_ABORTS = Counter("router_early_aborts", "Local generations stopped early on a low leading confidence")
+_EARLY_ABORT_TOKENS = Counter("router_early_abort_tokens_saved", "Estimated local tokens not generated thanks to early aborts")
 
 CONF_SYS = {
     "role": "system",
@@ -52,6 +66,116 @@ CONF_SYS = {
 }
 
 
+# Same contract with the fields swapped, so a low confidence shows up before the answer is written
+_conf_sys_rules, _ = CONF_SYS["content"].split("EXAMPLE:\n")
+CONF_FIRST_SYS = {
+    "role": "system",
+    "content": (
+        _conf_sys_rules.replace(
+            "  \"answer\": \"...\",\n  \"confidence\": <number between 0 and 1>\n",
+            "  \"confidence\": <number between 0 and 1>,\n  \"answer\": \"...\"\n",
+        ).replace(
+            "- Always fill both fields.\n",
+            "- Always fill both fields.\n- Write \"confidence\" first: decide how sure you are before answering.\n",
+        )
+        + "EXAMPLE:\n"
+        "{\n"
+        "  \"confidence\": 0.9,\n"
+        "  \"answer\": \"The quadratic formula is $x = \\\\frac{-b \\\\pm \\\\sqrt{b^2 - 4ac}}{2a}$. This is a fundamental result in algebra...\"\n"
+        "}\n"
+    )
+}
+
+_LEADING_CONFIDENCE = re.compile(r'"confidence"\s*:\s*"?(\d+(?:\.\d+)?|\.\d+)"?\s*[,}\n]')
+_ANSWER_KEY = re.compile(r'"answer"\s*:')
+
+
+def leading_confidence(text: str):
+    """Read a confidence written before the answer from partial model output.
+
+    Returns ``(decided, confidence)``: ``decided`` is False while more text
+    is needed, and ``confidence`` is None once it is clear the model did not
+    put a complete confidence first.
+    """
+    conf = _LEADING_CONFIDENCE.search(text)
+    answer = _ANSWER_KEY.search(text)
+    if conf and (answer is None or conf.start() < answer.start()):
+        return True, float(conf.group(1))
+    if answer is not None or len(text) > 200:
+        return True, None
+    return False, None
+
+
+class EarlyAborts:
+    """Totals for local generations stopped by a low leading confidence."""
+
+    def __init__(self):
+        self.aborts = 0
+        self.tokens_generated = 0
+        self.tokens_saved = 0
+        self.latency_avoided_ms = 0
+
+    def record(self, model: str, confidence: float, tokens_generated: int) -> dict:
+        """Count an abort and estimate its savings; they are booked by ``settle``."""
+        tokens_saved = latency_avoided_ms = 0
+        expected = spillover.latency.expected_completion(model)
+        if expected:
+            typical_tokens, eval_tps = expected
+            tokens_saved = int(max(typical_tokens - tokens_generated, 0))
+            latency_avoided_ms = int(tokens_saved / eval_tps * 1000)
+        self.aborts += 1
+        self.tokens_generated += tokens_generated
+        _EARLY_ABORTS.inc()
+        print(f"Local confidence {confidence:.2f} below threshold after {tokens_generated} tokens; "
+              f"stopped generation to escalate")
+        return {
+            "confidence": confidence,
+            "tokens_generated": tokens_generated,
+            "tokens_saved": tokens_saved,
+            "latency_avoided_ms": latency_avoided_ms,
+        }
+
+    def settle(self, info: dict, escalated: bool):
+        """Book an abort's savings once the escalation answered.
+
+        If the cloud call failed and the local answer was regenerated in
+        full, nothing was saved and the estimate is zeroed instead.
+        """
+        if not escalated:
+            info["tokens_saved"] = info["latency_avoided_ms"] = 0
+            return
+        self.tokens_saved += info["tokens_saved"]
+        self.latency_avoided_ms += info["latency_avoided_ms"]
+        _EARLY_ABORT_TOKENS.inc(info["tokens_saved"])
+
+    def stats(self) -> dict:
+        return {
+            "enabled": settings.CONFIDENCE_FIRST,
+            "aborts": self.aborts,
+            "tokens_generated": self.tokens_generated,
+            "tokens_saved": self.tokens_saved,
+            "latency_avoided_ms": self.latency_avoided_ms,
+        }
+
+
+early_aborts = EarlyAborts()
+
+
+class EarlyAbort(Exception):
+    """A streamed local answer started below CONFIDENCE_THRESHOLD and was stopped."""
+
+
+def _record_substitution(ctx: "RoutingContext"):
+    # Counted once, when the warm alternate is actually called
+    if ctx.substitution:
+        residency.record_substitution(*ctx.substitution)
+        ctx.substitution = None
+
+
+def _can_escalate(messages) -> bool:
+    return bool(settings.ANTHROPIC_API_KEY) and cloud_allowed(messages) and not claude_breaker.is_open()
+
+
 def parse_json_block(text: str):
     """Extract JSON from model response, handling various formats."""
     m = re.search(r"\{.*\}", text, re.S)
@@ -94,56 +218,335 @@ def parse_json_block(text: str):
         }
 
 
-def try_local(messages, temperature=None, model=None):
-    """Try local model with confidence-aware system prompt and deterministic web search."""
-    start = time.time()
-    temp = temperature if temperature is not None else settings.LOCAL_TEMPERATURE
-    max_tokens = settings.LOCAL_MAX_TOKENS
-    web_search_used = False
-    
+class AnswerStreamParser:
+    """Incrementally extract the "answer" string from a streamed CONF_SYS envelope.
+
+    Feed raw model text as it arrives; ``feed`` returns only the newly decoded
+    answer characters. Output that does not look like a JSON envelope is
+    passed through unchanged.
+    """
+
+    _ANSWER_KEY = re.compile(r'"answer"\s*:\s*"')
+    _ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+
+    def __init__(self):
+        self.text = ""
+        self.mode = None  # None (undecided), "raw" or "json"
+        self._pos = 0  # scan position in self.text
+        self._state = "seek"  # seek -> string -> done
+        self._escape = None  # characters seen after a backslash, if inside an escape
+        self._high_surrogate = None
+
+    def feed(self, chunk: str) -> str:
+        self.text += chunk
+        if self.mode is None:
+            head = self.text.lstrip()
+            if not head:
+                return ""
+            if head[0] == "{":
+                self.mode = "json"
+            elif head[0] == "`":
+                # Markdown code fence around the JSON: wait for the brace
+                if "{" not in head:
+                    return "" if len(head) < 16 else self._to_raw()
+                self.mode = "json"
+            else:
+                return self._to_raw()
+        if self.mode == "raw":
+            return chunk
+        return self._scan()
+
+    def _to_raw(self) -> str:
+        self.mode = "raw"
+        return self.text
+
+    def _scan(self) -> str:
+        out = []
+        text = self.text
+        while self._pos < len(text) and self._state != "done":
+            if self._state == "seek":
+                m = self._ANSWER_KEY.search(text, self._pos)
+                if not m:
+                    # Keep a tail so a key split across chunks is still found
+                    self._pos = max(self._pos, len(text) - 16)
+                    return ""
+                self._pos = m.end()
+                self._state = "string"
+                continue
+            ch = text[self._pos]
+            if self._escape is not None:
+                self._escape += ch
+                self._pos += 1
+                decoded = self._decode_escape()
+                if decoded is not None:
+                    out.append(decoded)
+                continue
+            self._pos += 1
+            if ch == "\\":
+                self._escape = ""
+            elif ch == '"':
+                self._state = "done"
+            else:
+                out.append(ch)
+        return "".join(out)
+
+    def _decode_escape(self):
+        esc = self._escape
+        if esc[0] == "u":
+            if len(esc) < 5:
+                return None
+            self._escape = None
+            try:
+                code = int(esc[1:5], 16)
+            except ValueError:
+                return "\\" + esc
+            if 0xD800 <= code < 0xDC00:
+                self._high_surrogate = code
+                return ""
+            if 0xDC00 <= code < 0xE000 and self._high_surrogate is not None:
+                code = 0x10000 + ((self._high_surrogate - 0xD800) << 10) + (code - 0xDC00)
+                self._high_surrogate = None
+            return chr(code)
+        self._escape = None
+        # Be lenient with invalid escapes (e.g. LaTeX "\\s"): keep them verbatim
+        return self._ESCAPES.get(esc, "\\" + esc)
+
+    @property
+    def answer_complete(self) -> bool:
+        return self._state == "done"
+
+
+class RoutingContext:
+    """Per-request state carried through the routing stages.
+
+    Holds the web search result and OCR text for one request so an
+    escalation from ``try_local`` to ``call_cloud`` reuses them instead of
+    searching again, and collects per-stage timings in milliseconds.
+    """
+
+    def __init__(self, tenant: str = "default"):
+        self.tenant = tenant
+        self.search_query: Optional[str] = None
+        self.search_results: Optional[str] = None
+        self.search_skipped: Optional[str] = None  # admission reason when search was skipped
+        self.ocr_texts: List[str] = []
+        self.timings: Dict[str, int] = {}
+        self.started = time.time()
+        self.streaming = False
+        self.profile = None  # profiler.Profile while this request is sampled
+        self.reused: List[str] = []
+        self.spillover: Optional[dict] = None  # SLO spillover decision, logged with the request
+        self.prerouting: Optional[dict] = None  # pre-routing prediction, logged with the request
+        self.early_abort: Optional[dict] = None  # set when a local generation was stopped early
+        self.substitution: Optional[Tuple[str, str]] = None  # (cold model, warm alternate) until the local call
+        self._search_task: Optional[asyncio.Task] = None
+
+    async def search(self, query: str) -> Optional[str]:
+        """Formatted search results for ``query``, searching at most once per request.
+
+        Concurrent callers (a local attempt and a speculative cloud call)
+        share the same search task.
+        """
+        reused = self.search_query == query and self._search_task is not None
+        if not reused:
+            self.search_query = query
+            self._search_task = asyncio.ensure_future(self._run_search(query))
+        # Shielded so a cancelled caller doesn't cancel the search for the other
+        results = await asyncio.shield(self._search_task)
+        if reused and not self.search_skipped and "web_search" not in self.reused:
+            self.reused.append("web_search")
+        return results
+
+    async def _run_search(self, query: str) -> Optional[str]:
+        admit, reason = search_admission.admit(query)
+        if not admit:
+            self.search_skipped = reason
+            print(f"Web search skipped by admission ({reason})")
+            return None
+        print(f"Performing web search for query: {query[:100]}...")
+        start = time.time()
+        with search_admission.track(), _SEARCH_IN_FLIGHT.track():
+            self.search_results = await perform_search_and_format(query, settings.WEB_SEARCH_MAX_RESULTS)
+        self.add_timing("web_search", start)
+        search_admission.record_latency(self.timings["web_search"])
+        return self.search_results
+
+    def add_timing(self, stage: str, start: float):
+        """Record a stage that began at ``start`` in the timings and the stage histogram."""
+        elapsed = time.time() - start
+        self.timings[stage] = self.timings.get(stage, 0) + int(elapsed * 1000)
+        STAGE_SECONDS.labels(stage).observe(elapsed)
+
+    @contextmanager
+    def span(self, stage: str):
+        """Time the enclosed block as ``stage``."""
+        start = time.time()
+        try:
+            yield
+        finally:
+            self.add_timing(stage, start)
+
+    def add_upstream_timings(self, prefix: str, timings: Optional[Dict[str, int]]):
+        """Record durations an upstream reported itself (e.g. Ollama's prompt_eval) as ``prefix_stage``."""
+        for stage, ms in (timings or {}).items():
+            key = f"{prefix}_{stage}"
+            self.timings[key] = self.timings.get(key, 0) + ms
+
+    def server_timing(self) -> str:
+        """The timings as a Server-Timing header value, with the request total."""
+        total = int((time.time() - self.started) * 1000)
+        return ", ".join(f"{stage};dur={ms}" for stage, ms in [*self.timings.items(), ("total", total)])
+
+    def annotate(self, usage: dict) -> dict:
+        """Report reused and skipped stages in a response's usage dict."""
+        if self.reused:
+            usage["reused_stages"] = list(self.reused)
+        if self.search_skipped:
+            usage["web_search_skipped"] = self.search_skipped
+        return usage
+
+
+def _with_search_results(messages, search_results: str, guidance: str):
+    """Insert formatted search results as a system message before the last user turn."""
+    return messages[:-1] + [
+        {
+            "role": "system",
+            "content": f"Web search was performed to get current and relevant information. Here are the search results:\n\n{search_results}\n\n{guidance}"
+        },
+        messages[-1]  # Original user message
+    ]
+
+
+async def _local_messages(messages, ctx: RoutingContext):
+    """Run deterministic web search and build the local model's message list."""
     # Always perform web search before calling model
     enhanced_messages = messages.copy()
-    
+    web_search_used = False
+
     if settings.ENABLE_WEB_SEARCH and messages:
         last_message = messages[-1]
         if last_message.get("role") == "user":
             user_query = last_message.get("content", "")
-            # Always perform web search for every query
-            print(f"Performing web search for query: {user_query[:100]}...")
-            search_query = user_query
-            # Perform search automatically
-            search_results = perform_search_and_format(search_query, settings.WEB_SEARCH_MAX_RESULTS)
+            # Search admission decides whether this query is worth searching
+            search_results = await ctx.search(user_query)
             if search_results:
-                # Inject search results as system message before user query
-                enhanced_messages = messages[:-1] + [
-                    {
-                        "role": "system",
-                        "content": f"Web search was performed to get current and relevant information. Here are the search results:\n\n{search_results}\n\nUse this information to provide an accurate, up-to-date answer to the user's question. If the search results don't contain relevant information for the question, you can still answer based on your knowledge."
-                    },
-                    messages[-1]  # Original user message
-                    ]
+                enhanced_messages = _with_search_results(
+                    messages,
+                    search_results,
+                    "Use this information to provide an accurate, up-to-date answer to the user's question. If the search results don't contain relevant information for the question, you can still answer based on your knowledge.",
+                )
                 web_search_used = True
                 print(f"Web search results injected into prompt ({len(search_results)} characters)")
-            else:
+            elif not ctx.search_skipped:
                 print("Web search returned no results, proceeding without search results")
-    
+
+    # Combine system prompt with enhanced messages (search results already included if needed)
+    system = CONF_FIRST_SYS if settings.CONFIDENCE_FIRST else CONF_SYS
+    return [system] + enhanced_messages, web_search_used
+
+
+async def _cloud_messages(messages, ctx: RoutingContext):
+    """Run web search and build the cloud model's message list."""
+    enhanced_messages = messages.copy()
+    web_search_used = False
+
+    if settings.ENABLE_WEB_SEARCH and messages:
+        last_message = messages[-1]
+        if last_message.get("role") == "user":
+            query = last_message.get("content", "")
+            # Same admission as the local path (reused after a local attempt)
+            search_results = await ctx.search(query)
+            if search_results:
+                enhanced_messages = _with_search_results(
+                    messages,
+                    search_results,
+                    "Use this information to provide an accurate, up-to-date answer. If the search results don't contain relevant information, you can still answer based on your knowledge.",
+                )
+                web_search_used = True
+                print(f"Web search results added to Claude prompt")
+            elif not ctx.search_skipped:
+                print("Web search returned no results for Claude, proceeding without search results")
+
+    return enhanced_messages, web_search_used
+
+
+async def _confidence_first_chat(final_messages, temp, max_tokens, model, ctx: RoutingContext):
+    """Stream a local generation and stop it as soon as a low leading confidence appears.
+
+    Returns the same shape as ``ollama_client.chat``; when stopped early the
+    content is empty and ``ctx.early_abort`` describes the abort.
+    """
+    text = ""
+    chunks = 0
+    decided = False
+    res = {"usage": {}, "timings_ms": {}}
+    events = ollama_client.stream_chat(messages=final_messages, temperature=temp, max_tokens=max_tokens, model=model)
     try:
-        # Combine system prompt with enhanced messages (search results already included if needed)
-        final_messages = [CONF_SYS] + enhanced_messages
-        res = ollama_client.chat(
-            messages=final_messages,
-            temperature=temp,
-            max_tokens=max_tokens,
-            model=model or settings.LOCAL_MODEL
-        )
-        
+        async for event in events:
+            if "usage" in event:
+                res["usage"], res["timings_ms"] = event["usage"], event.get("timings_ms") or {}
+            if not event["delta"]:
+                continue
+            text += event["delta"]
+            chunks += 1
+            if decided:
+                continue
+            decided, confidence = leading_confidence(text)
+            if confidence is not None and confidence < settings.CONFIDENCE_THRESHOLD:
+                # Ollama streams about one token per chunk
+                ctx.early_abort = early_aborts.record(model, confidence, chunks)
+                res["usage"] = {"completion_tokens": chunks}
+                text = json.dumps({"confidence": confidence, "answer": ""})
+                break
+    finally:
+        # Closing the stream drops the connection, which stops the generation in Ollama
+        await events.aclose()
+    res["choices"] = [{"message": {"content": text}}]
+    return res
+
+
+async def try_local(messages, temperature=None, model=None, ctx: Optional[RoutingContext] = None,
+                    early_abort: bool = True):
+    """Try local model with confidence-aware system prompt and deterministic web search.
+
+    With CONFIDENCE_FIRST, a generation whose leading confidence is below
+    CONFIDENCE_THRESHOLD is stopped early (when it could escalate) and
+    returned with an empty answer.
+    """
+    start = time.time()
+    temp = temperature if temperature is not None else settings.LOCAL_TEMPERATURE
+    max_tokens = settings.LOCAL_MAX_TOKENS
+    model = model or settings.LOCAL_MODEL
+
+    ctx = ctx or RoutingContext()
+    # Fail fast before spending time on web search for a backend that is down
+    ollama_breaker.check()
+    _record_substitution(ctx)
+    final_messages, web_search_used = await _local_messages(messages, ctx)
+
+    try:
+        with ctx.span("ollama"), _OLLAMA_IN_FLIGHT.track():
+            if settings.CONFIDENCE_FIRST and early_abort and _can_escalate(messages):
+                res = await _confidence_first_chat(final_messages, temp, max_tokens, model, ctx)
+            else:
+                res = await ollama_client.chat(
+                    messages=final_messages,
+                    temperature=temp,
+                    max_tokens=max_tokens,
+                    model=model
+                )
+        ctx.add_upstream_timings("ollama", res.get("timings_ms"))
+        spillover.latency.observe(model, res.get("usage"), res.get("timings_ms"))
+
         txt = res["choices"][0]["message"]["content"]
         print(f"Local model response: {txt[:200]}...")  # Debug log
-        parsed = parse_json_block(txt)
+        with ctx.span("parse"):
+            parsed = parse_json_block(txt)
         latency = int((time.time() - start) * 1000)
         usage = res.get("usage", {})
         if web_search_used:
             usage["web_search_used"] = True
+        ctx.annotate(usage)
         print(f"Parsed: answer length={len(parsed.get('answer', ''))}, confidence={parsed.get('confidence')}, search_used={web_search_used}")
         return parsed, latency, usage
     except Exception as e:
@@ -151,45 +554,124 @@ def try_local(messages, temperature=None, model=None):
         raise
 
 
-def call_cloud(messages, temperature=None):
+async def stream_local(messages, temperature=None, model=None, ctx: Optional[RoutingContext] = None,
+                       early_abort: bool = True):
+    """Stream the local model's answer, forwarding only the envelope's answer text.
+
+    Yields ``{"delta": str}`` events, then a final event with ``done=True``,
+    the parsed ``answer``/``confidence``, ``usage`` and ``latency_ms``.
+
+    With CONFIDENCE_FIRST the confidence arrives before any answer text, so a
+    low one raises EarlyAbort before anything has been sent (when the
+    request could escalate).
+    """
+    start = time.time()
+    temp = temperature if temperature is not None else settings.LOCAL_TEMPERATURE
+    model = model or settings.LOCAL_MODEL
+
+    ctx = ctx or RoutingContext()
+    ollama_breaker.check()
+    _record_substitution(ctx)
+    final_messages, web_search_used = await _local_messages(messages, ctx)
+
+    parser = AnswerStreamParser()
+    usage = {}
+    chunks = 0
+    decided = not (settings.CONFIDENCE_FIRST and early_abort and _can_escalate(messages))
+    with ctx.span("ollama"), _OLLAMA_IN_FLIGHT.track():
+        events = ollama_client.stream_chat(
+            messages=final_messages,
+            temperature=temp,
+            max_tokens=settings.LOCAL_MAX_TOKENS,
+            model=model,
+        )
+        try:
+            async for event in events:
+                delta = parser.feed(event["delta"]) if event["delta"] else ""
+                chunks += 1 if event["delta"] else 0
+                if not decided and event["delta"]:
+                    decided, confidence = leading_confidence(parser.text)
+                    if confidence is not None and confidence < settings.CONFIDENCE_THRESHOLD:
+                        ctx.early_abort = early_aborts.record(model, confidence, chunks)
+                        raise EarlyAbort(f"local confidence {confidence:.2f} is below the threshold")
+                if delta:
+                    yield {"delta": delta}
+                if "usage" in event:
+                    usage = event["usage"]
+                    ctx.add_upstream_timings("ollama", event.get("timings_ms"))
+                    spillover.latency.observe(model, usage, event.get("timings_ms"))
+        finally:
+            await events.aclose()
+
+    parsed = parse_json_block(parser.text)
+    if web_search_used:
+        usage["web_search_used"] = True
+    ctx.annotate(usage)
+    yield {
+        "done": True,
+        "answer": parsed["answer"],
+        "confidence": parsed["confidence"],
+        "usage": usage,
+        "latency_ms": int((time.time() - start) * 1000),
+    }
+
+
+async def call_cloud(messages, temperature=None, ctx: Optional[RoutingContext] = None):
     """Call cloud model with optional web search support."""
     start = time.time()
     temp = temperature if temperature is not None else 0.2
-    
-    # Check if web search might be needed and enhance prompt
-    enhanced_messages = messages.copy()
-    web_search_used = False
-    
-    if settings.ENABLE_WEB_SEARCH and messages:
-        last_message = messages[-1]
-        if last_message.get("role") == "user":
-            query = last_message.get("content", "")
-            # Always perform web search for Claude as well
-            print(f"Performing web search for Claude query: {query[:100]}...")
-            search_results = perform_search_and_format(query, settings.WEB_SEARCH_MAX_RESULTS)
-            if search_results:
-                # Add search results as context before user message
-                enhanced_messages = messages[:-1] + [
-                    {
-                        "role": "system",
-                        "content": f"Web search was performed to get current and relevant information. Here are the search results:\n\n{search_results}\n\nUse this information to provide an accurate, up-to-date answer. If the search results don't contain relevant information, you can still answer based on your knowledge."
-                    },
-                    messages[-1]
-                ]
-                web_search_used = True
-                print(f"Web search results added to Claude prompt")
-            else:
-                print("Web search returned no results for Claude, proceeding without search results")
-    
-    res = claude_client.chat(
-        messages=enhanced_messages,
-        temperature=temp,
-        max_tokens=settings.CLOUD_MAX_TOKENS,
-    )
+
+    ctx = ctx or RoutingContext()
+    # Fail fast before spending time on web search for a backend that is down
+    claude_breaker.check()
+    enhanced_messages, web_search_used = await _cloud_messages(messages, ctx)
+
+    with ctx.span("claude"), _CLAUDE_IN_FLIGHT.track():
+        res = await claude_client.chat(
+            messages=enhanced_messages,
+            temperature=temp,
+            max_tokens=settings.CLOUD_MAX_TOKENS,
+        )
     txt = res["choices"][0]["message"]["content"]
     latency = int((time.time() - start) * 1000)
     usage = res.get("usage", {})
     if web_search_used:
         usage["web_search_used"] = True
+    ctx.annotate(usage)
     return txt, latency, usage
 
+
+async def stream_cloud(messages, temperature=None, ctx: Optional[RoutingContext] = None):
+    """Stream the cloud model's answer; same event shape as ``stream_local``."""
+    start = time.time()
+    temp = temperature if temperature is not None else 0.2
+
+    ctx = ctx or RoutingContext()
+    # Fail fast before spending time on web search for a backend that is down
+    claude_breaker.check()
+    enhanced_messages, web_search_used = await _cloud_messages(messages, ctx)
+
+    parts = []
+    usage = {}
+    with ctx.span("claude"), _CLAUDE_IN_FLIGHT.track():
+        async for event in claude_client.stream_chat(
+            messages=enhanced_messages,
+            temperature=temp,
+            max_tokens=settings.CLOUD_MAX_TOKENS,
+        ):
+            if event["delta"]:
+                parts.append(event["delta"])
+                yield {"delta": event["delta"]}
+            if "usage" in event:
+                usage = event["usage"]
+
+    if web_search_used:
+        usage["web_search_used"] = True
+    ctx.annotate(usage)
+    yield {
+        "done": True,
+        "answer": "".join(parts).strip(),
+        "confidence": 1.0,
+        "usage": usage,
+        "latency_ms": int((time.time() - start) * 1000),
+    }
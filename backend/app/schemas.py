@@ -15,6 +15,7 @@ class ChatRequest(BaseModel):
     stream: Optional[bool] = False
     conversation_id: Optional[str] = None
     image: Optional[str] = None  # Base64-encoded image for the last message
+    user: Optional[str] = None  # Tenant/end-user id (OpenAI-compatible), used for per-tenant budgets
 
 
 class ChoiceMsg(BaseModel):
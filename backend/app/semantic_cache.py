@@ -0,0 +1,166 @@
+"""
+Opt-in semantic cache: answers near-duplicate prompts from earlier responses.
+
+The final user turn is embedded with a local Ollama embedding model and
+matched by cosine similarity against a NumPy index. Indexes are scoped by
+model hint plus a hash of the earlier conversation turns, so only the last
+question is compared "fuzzily" and the context it was asked in must match
+exactly.
+"""
+
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Optional
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+    print("Warning: numpy not installed. Semantic cache will be disabled.")
+    print("Install with: pip install numpy")
+
+from .clients import ollama_client
+from .settings import settings
+
+# Vectors computed during lookup, held until the response is stored
+_MAX_PENDING = 1024
+
+
+class _ScopeIndex:
+    """Fixed-capacity vector index for one scope; evicts the least recently used slot."""
+
+    def __init__(self, dim: int, capacity: int):
+        self.capacity = capacity
+        self.vectors = np.zeros((min(capacity, 64), dim), dtype=np.float32)
+        self.values: list = []
+        self.created = np.zeros(len(self.vectors))
+        self.last_used = np.zeros(len(self.vectors))
+
+    def search(self, q):
+        n = len(self.values)
+        if n == 0:
+            return -1, 0.0
+        sims = self.vectors[:n] @ q
+        idx = int(np.argmax(sims))
+        return idx, float(sims[idx])
+
+    def add(self, vec, val) -> bool:
+        """Insert a vector; returns True if an existing entry was evicted."""
+        n = len(self.values)
+        now = time.time()
+        if n < self.capacity:
+            if n == len(self.vectors):
+                grow = min(len(self.vectors) * 2, self.capacity)
+                self.vectors = np.resize(self.vectors, (grow, self.vectors.shape[1]))
+                self.created = np.resize(self.created, grow)
+                self.last_used = np.resize(self.last_used, grow)
+            slot, evicted = n, False
+            self.values.append(val)
+        else:
+            slot, evicted = int(np.argmin(self.last_used)), True
+            self.values[slot] = val
+        self.vectors[slot] = vec
+        self.created[slot] = now
+        self.last_used[slot] = now
+        return evicted
+
+
+class SemanticCache:
+    def __init__(self, threshold: float, max_entries_per_scope: int, max_scopes: int):
+        self.threshold = threshold
+        self.max_entries_per_scope = max_entries_per_scope
+        self.max_scopes = max_scopes
+        self._scopes: "OrderedDict[str, _ScopeIndex]" = OrderedDict()
+        self._pending: "OrderedDict[str, tuple[str, object]]" = OrderedDict()
+        self.lookups = 0
+        self.hits = 0
+        self.evictions = 0
+        self.embed_errors = 0
+
+    @staticmethod
+    def scope_for(messages: list[dict], model_hint: str) -> str:
+        history = "\n".join(f"{m.get('role', '')}|{m.get('content', '')}" for m in messages[:-1])
+        return hashlib.sha256(f"{model_hint}\n{history}".encode()).hexdigest()
+
+    async def lookup(self, key: str, messages: list[dict], model_hint: str, ttl: int) -> Optional[dict]:
+        """Return a cached response for a similar final user turn, if any.
+
+        The embedding is remembered under ``key`` so ``store`` can index the
+        eventual response without embedding the prompt a second time.
+        """
+        if not messages or messages[-1].get("role") != "user":
+            return None
+        self.lookups += 1
+        try:
+            vec = np.asarray(
+                await ollama_client.embed(messages[-1].get("content", ""), settings.SEMANTIC_CACHE_MODEL),
+                dtype=np.float32,
+            )
+        except Exception as e:
+            self.embed_errors += 1
+            print(f"Semantic cache embedding failed: {e}")
+            return None
+        norm = float(np.linalg.norm(vec))
+        if norm == 0.0:
+            return None
+        vec /= norm
+
+        scope = self.scope_for(messages, model_hint)
+        self._pending[key] = (scope, vec)
+        while len(self._pending) > _MAX_PENDING:
+            self._pending.popitem(last=False)
+
+        index = self._scopes.get(scope)
+        if index is None or index.vectors.shape[1] != vec.shape[0]:
+            return None
+        self._scopes.move_to_end(scope)
+        idx, sim = index.search(vec)
+        if idx < 0 or sim < self.threshold or time.time() - index.created[idx] > ttl:
+            return None
+        index.last_used[idx] = time.time()
+        self.hits += 1
+        return index.values[idx]
+
+    def store(self, key: str, val: dict):
+        """Index a response under the embedding computed by ``lookup``."""
+        pending = self._pending.pop(key, None)
+        if pending is None:
+            return
+        scope, vec = pending
+        index = self._scopes.get(scope)
+        if index is None or index.vectors.shape[1] != vec.shape[0]:
+            index = _ScopeIndex(vec.shape[0], self.max_entries_per_scope)
+            self._scopes[scope] = index
+            while len(self._scopes) > self.max_scopes:
+                _, dropped = self._scopes.popitem(last=False)
+                self.evictions += len(dropped.values)
+        self._scopes.move_to_end(scope)
+        if index.add(vec, val):
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        misses = self.lookups - self.hits
+        return {
+            "scopes": len(self._scopes),
+            "entries": sum(len(i.values) for i in self._scopes.values()),
+            "threshold": self.threshold,
+            "lookups": self.lookups,
+            "hits": self.hits,
+            "misses": misses,
+            "hit_rate": round(self.hits / self.lookups, 4) if self.lookups else 0.0,
+            "evictions": self.evictions,
+            "embed_errors": self.embed_errors,
+        }
+
+
+semantic_cache: Optional[SemanticCache] = (
+    SemanticCache(
+        settings.SEMANTIC_CACHE_THRESHOLD,
+        settings.SEMANTIC_CACHE_MAX_ENTRIES,
+        settings.SEMANTIC_CACHE_MAX_SCOPES,
+    )
+    if settings.SEMANTIC_CACHE_ENABLED and NUMPY_AVAILABLE
+    else None
+)
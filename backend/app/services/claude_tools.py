@@ -31,7 +31,7 @@ def build_tools_list(enable_web_search: bool = True) -> List[Dict]:
     return tools
 
 
-def handle_tool_use(tool_name: str, tool_input: Dict) -> Dict:
+async def handle_tool_use(tool_name: str, tool_input: Dict) -> Dict:
     """
     Handle tool/function calls from Claude.
     
@@ -41,7 +41,7 @@ def handle_tool_use(tool_name: str, tool_input: Dict) -> Dict:
         from .web_search import get_web_search_service
         query = tool_input.get("query", "")
         service = get_web_search_service()
-        results = service.search(query, max_results=5)
+        results = await service.search(query, max_results=5)
         
         if not results:
             return {
@@ -0,0 +1,105 @@
+"""
+Search admission: decides per request whether web search is worth running.
+
+Modes (SEARCH_ADMISSION_MODE):
+- "always": search every query (previous behavior)
+- "keyword": the detect_search_needed heuristic
+- "learned": a hashed n-gram classifier trained offline from the logs table
+  (see scripts/train_search_admission.py); falls back to "keyword" if the
+  model file is missing
+
+Independently of the mode, search is shed when too many searches are
+already in flight. Additional modes can be added with register_policy.
+"""
+
+import os
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional, Tuple
+
+from ..classifier import LogisticModel
+from ..settings import settings
+from .web_search import detect_search_needed
+
+Policy = Callable[[str], Tuple[bool, str]]
+
+_policies: Dict[str, Policy] = {}
+
+
+def register_policy(name: str, policy: Policy):
+    """Register an admission mode: ``policy(query) -> (admit, reason)``."""
+    _policies[name] = policy
+
+
+register_policy("always", lambda query: (True, "always"))
+register_policy("keyword", lambda query: (True, "keyword") if detect_search_needed(query) else (False, "keyword"))
+
+
+class SearchAdmission:
+    def __init__(self):
+        self.in_flight = 0
+        self.admitted = 0
+        self.skipped: Dict[str, int] = {}
+        # EWMA of live search latency; used to estimate time saved by skips
+        self.search_latency_ms: Optional[float] = None
+        self._model: Optional[LogisticModel] = None
+        self._model_loaded = False
+
+    def _learned(self, query: str) -> Tuple[bool, str]:
+        if not self._model_loaded:
+            self._model_loaded = True
+            path = settings.SEARCH_ADMISSION_MODEL_PATH
+            if os.path.exists(path):
+                self._model = LogisticModel.load(path)
+            else:
+                print(f"Search admission model not found at {path}; using keyword heuristic")
+        if self._model is None:
+            return _policies["keyword"](query)
+        p = self._model.predict_proba(self._model.features(query))
+        return p >= settings.SEARCH_ADMISSION_THRESHOLD, "learned"
+
+    def admit(self, query: str) -> Tuple[bool, str]:
+        """Return (admit, reason) for a search on ``query``."""
+        limit = settings.SEARCH_ADMISSION_MAX_CONCURRENT
+        if limit and self.in_flight >= limit:
+            admit, reason = False, "load"
+        elif settings.SEARCH_ADMISSION_MODE == "learned":
+            admit, reason = self._learned(query)
+        else:
+            policy = _policies.get(settings.SEARCH_ADMISSION_MODE, _policies["always"])
+            admit, reason = policy(query)
+        if admit:
+            self.admitted += 1
+        else:
+            self.skipped[reason] = self.skipped.get(reason, 0) + 1
+        return admit, reason
+
+    @contextmanager
+    def track(self):
+        """Count a running search toward the load limit."""
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+
+    def record_latency(self, ms: int):
+        alpha = 0.2
+        prev = self.search_latency_ms
+        self.search_latency_ms = ms if prev is None else prev + alpha * (ms - prev)
+
+    def stats(self) -> dict:
+        skipped = sum(self.skipped.values())
+        decisions = skipped + self.admitted
+        return {
+            "mode": settings.SEARCH_ADMISSION_MODE,
+            "in_flight": self.in_flight,
+            "admitted": self.admitted,
+            "skipped": skipped,
+            "skipped_by_reason": dict(self.skipped),
+            "skip_rate": round(skipped / decisions, 4) if decisions else 0.0,
+            "avg_search_latency_ms": round(self.search_latency_ms or 0.0, 1),
+            "estimated_latency_saved_ms": int(skipped * (self.search_latency_ms or 0.0)),
+        }
+
+
+search_admission = SearchAdmission()
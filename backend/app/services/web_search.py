@@ -3,9 +3,14 @@ Web search service using DuckDuckGo (free, no API key required).
 Provides web search functionality for both local and cloud models.
 """
 
-import requests
-from typing import List, Dict, Optional
+import asyncio
+import re
 import time
+from collections import OrderedDict
+from typing import List, Dict, Optional, Tuple
+
+from ..clients.http import get_client
+from ..settings import settings
 
 try:
     from ddgs import DDGS
@@ -20,14 +25,26 @@ except ImportError:
         print("Install with: pip install ddgs")
 
 
+def normalize_query(query: str) -> str:
+    """Fold case, punctuation and whitespace so trivially different queries share a cache entry."""
+    return " ".join(re.sub(r"[^\w\s]", " ", query.lower()).split())
+
+
 class WebSearchService:
     """Web search service using DuckDuckGo search library."""
     
     def __init__(self):
         self.agent = "local-first-router/1.0"
         self.ddgs_available = DDGS_AVAILABLE
+        # normalized query + max_results -> (expires_at, found, results); the prompt
+        # block quotes the caller's wording, so it is formatted per call
+        self._cache: "OrderedDict[str, Tuple[float, bool, List[Dict[str, str]]]]" = OrderedDict()
+        self.cache_hits = 0
+        self.cache_negative_hits = 0
+        self.cache_misses = 0
+        self.cache_evictions = 0
     
-    def search(self, query: str, max_results: int = 5) -> List[Dict[str, str]]:
+    async def search(self, query: str, max_results: int = 5) -> List[Dict[str, str]]:
         """
         Perform a web search and return results.
         
@@ -38,29 +55,82 @@ class WebSearchService:
         Returns:
             List of dictionaries with 'title', 'url', 'snippet' keys
         """
+        results, _ = await self.search_and_format(query, max_results)
+        return results
+
+    async def search_and_format(self, query: str, max_results: int = 5) -> Tuple[List[Dict[str, str]], Optional[str]]:
+        """
+        Search with caching; returns the raw results and the formatted prompt block.
+
+        Empty or placeholder results are cached too (negative caching) but for
+        a shorter WEB_SEARCH_NEGATIVE_TTL_SECONDS, so an outage is retried soon.
+        """
+        key = f"{max_results}|{normalize_query(query)}"
+        entry = self._cache.get(key)
+        if entry is not None:
+            expires_at, found, results = entry
+            if time.time() < expires_at:
+                self._cache.move_to_end(key)
+                self.cache_hits += 1
+                if not found:
+                    self.cache_negative_hits += 1
+                    if results:
+                        results = self._placeholder_results(query)
+                return results, self.format_results_for_prompt(query, results) if results else None
+            del self._cache[key]
+        self.cache_misses += 1
+
+        results, found = await self._search_uncached(query, max_results)
+        ttl = settings.WEB_SEARCH_CACHE_TTL_SECONDS if found else settings.WEB_SEARCH_NEGATIVE_TTL_SECONDS
+        if ttl > 0:
+            self._cache[key] = (time.time() + ttl, found, results)
+            while len(self._cache) > settings.WEB_SEARCH_CACHE_MAX_ENTRIES:
+                self._cache.popitem(last=False)
+                self.cache_evictions += 1
+        return results, self.format_results_for_prompt(query, results) if results else None
+
+    @staticmethod
+    def _placeholder_results(query: str) -> List[Dict[str, str]]:
+        """A single search link, used when no real results were found."""
+        return [{
+            "title": f"Search: {query}",
+            "url": f"https://duckduckgo.com/?q={query.replace(' ', '+')}",
+            "snippet": f"Search performed for '{query}'. Visit the URL for results."
+        }]
+
+    async def _search_uncached(self, query: str, max_results: int) -> Tuple[List[Dict[str, str]], bool]:
+        """Run the live search; the flag is False when nothing real was found."""
         try:
             # Use duckduckgo-search library if available (better results)
             if self.ddgs_available:
-                results = self._ddgs_search(query, max_results)
+                # DDGS is a blocking library; keep it off the event loop
+                results = await asyncio.to_thread(self._ddgs_search, query, max_results)
                 if results:
-                    return results
+                    return results, True
             
             # Fallback to HTML scraping
-            results = self._html_search(query, max_results)
+            results = await self._html_search(query, max_results)
             if results:
-                return results
+                return results, True
             
             # Last resort: return search link
-            return [{
-                "title": f"Search: {query}",
-                "url": f"https://duckduckgo.com/?q={query.replace(' ', '+')}",
-                "snippet": f"Search performed for '{query}'. Visit the URL for results."
-            }]
+            return self._placeholder_results(query), False
         except Exception as e:
             print(f"Web search error: {e}")
             import traceback
             traceback.print_exc()
-            return []
+            return [], False
+
+    def cache_stats(self) -> dict:
+        lookups = self.cache_hits + self.cache_misses
+        return {
+            "entries": len(self._cache),
+            "hits": self.cache_hits,
+            "negative_hits": self.cache_negative_hits,
+            "misses": self.cache_misses,
+            "hit_rate": round(self.cache_hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.cache_evictions,
+        }
     
     def _ddgs_search(self, query: str, max_results: int) -> List[Dict[str, str]]:
         """Search using duckduckgo-search library (best method)."""
@@ -80,7 +150,7 @@ class WebSearchService:
             print(f"DDGS search error: {e}")
             return []
     
-    def _html_search(self, query: str, max_results: int) -> List[Dict[str, str]]:
+    async def _html_search(self, query: str, max_results: int) -> List[Dict[str, str]]:
         """Fallback HTML search method."""
         try:
             # Simple search using DuckDuckGo HTML interface
@@ -90,7 +160,9 @@ class WebSearchService:
                 "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36"
             }
             
-            response = requests.get(url, params=params, headers=headers, timeout=10)
+            response = await get_client("web_search").get(
+                url, params=params, headers=headers, timeout=settings.WEB_SEARCH_TIMEOUT
+            )
             response.raise_for_status()
             
             # Simple parsing (basic extraction)
@@ -247,13 +319,13 @@ def detect_search_needed(query: str) -> bool:
     return False
 
 
-def perform_search_and_format(query: str, max_results: int = 5) -> Optional[str]:
+async def perform_search_and_format(query: str, max_results: int = 5) -> Optional[str]:
     """Perform web search and return formatted results."""
     service = get_web_search_service()
-    results = service.search(query, max_results)
+    results, formatted = await service.search_and_format(query, max_results)
     
     if not results:
         return None
     
-    return service.format_results_for_prompt(query, results)
+    return formatted
 
@@ -1,11 +1,23 @@
 from pydantic_settings import BaseSettings
-from typing import Optional, List
+from typing import Dict, Optional, List
 
 
 class Settings(BaseSettings):
     OLLAMA_BASE: str = "http://localhost:11434"
+    # Several Ollama hosts, balanced by outstanding requests (empty = just OLLAMA_BASE)
+    OLLAMA_BASES: List[str] = []
+    OLLAMA_HEALTH_INTERVAL_SECONDS: float = 10.0
+    OLLAMA_PROBE_TIMEOUT: float = 2.0
+    OLLAMA_EJECT_AFTER_FAILURES: int = 3
     LOCAL_MODELS: List[str] = ["llama3.1:8b-instruct-q4_K_M", "llama3.2:latest"]
     LOCAL_MODEL: str = "llama3.1:8b-instruct-q4_K_M"
+    # Model residency: preload LOCAL_MODELS at startup and keep them loaded between requests
+    OLLAMA_WARMUP_ON_STARTUP: bool = True
+    OLLAMA_KEEP_ALIVE: str = "30m"  # sent with local requests ("" = Ollama's default)
+    OLLAMA_KEEP_ALIVE_OVERRIDES: Dict[str, str] = {}  # per model, e.g. {"llama3.2:latest": "-1"} to never unload
+    OLLAMA_PS_INTERVAL_SECONDS: float = 15.0
+    # Warm models that may answer when the requested one is cold, in preference order
+    LOCAL_MODEL_ALTERNATES: Dict[str, List[str]] = {}
     LOCAL_TEMPERATURE: float = 0.7
     LOCAL_MAX_TOKENS: Optional[int] = None
     ANTHROPIC_BASE: str = "https://api.anthropic.com"
@@ -14,15 +26,96 @@ class Settings(BaseSettings):
     CLOUD_MODEL: str = "claude-3-haiku-20240307"
     CLOUD_MAX_TOKENS: Optional[int] = 1024
     CONFIDENCE_THRESHOLD: float = 0.7
+    # Prompt for confidence before the answer and stop local generations that start below the threshold
+    CONFIDENCE_FIRST: bool = False
+    # Speculative cloud call alongside the local one when escalation is likely
+    SPECULATIVE_CLOUD_ENABLED: bool = False
+    SPECULATIVE_ESCALATION_THRESHOLD: float = 0.6
+    SPECULATIVE_BUDGET_USD_PER_HOUR: float = 1.0  # per tenant, for discarded speculative calls
+    SPECULATIVE_BUDGET_USD_PER_HOUR_TOTAL: float = 5.0  # all tenants; tenant ids are client-supplied
+    # Spill to cloud when predicted local latency (queue + prompt eval + generation) exceeds this (0 = off)
+    LOCAL_SLO_MS: int = 0
+    LOCAL_PARALLEL_PER_HOST: int = 1  # Ollama's OLLAMA_NUM_PARALLEL
+    SPILLOVER_BUDGET_USD_PER_HOUR: float = 1.0  # per tenant
+    SPILLOVER_BUDGET_USD_PER_HOUR_TOTAL: float = 5.0  # all tenants; tenant ids are client-supplied
+    # Pre-routing: skip local attempts predicted to escalate ("off", "shadow" = measure only, "enforce")
+    PREROUTING_MODE: str = "off"
+    PREROUTING_MODEL_PATH: str = "./prerouting.json"
+    PREROUTING_THRESHOLD: float = 0.8
     DB_URL: str = "sqlite:///./router.db"
     CACHE_TTL_SECONDS: int = 300
+    CACHE_MAX_ENTRIES: int = 10000
+    CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    CACHE_SWEEP_INTERVAL_SECONDS: int = 30
+    # Optional persistent tier shared by all workers on the host
+    CACHE_DISK_ENABLED: bool = False
+    CACHE_DISK_PATH: str = "./router_cache.db"
+    CACHE_DISK_MAX_ENTRIES: int = 100000
+    CACHE_DISK_MAX_BYTES: int = 512 * 1024 * 1024
+    # Max time a coalesced request waits on an identical in-flight one
+    SINGLE_FLIGHT_TIMEOUT_SECONDS: float = 180.0
+    # Optional semantic cache (embedding similarity on the final user turn)
+    SEMANTIC_CACHE_ENABLED: bool = False
+    SEMANTIC_CACHE_MODEL: str = "nomic-embed-text"
+    SEMANTIC_CACHE_THRESHOLD: float = 0.92
+    SEMANTIC_CACHE_MAX_ENTRIES: int = 2000  # per scope (model hint + earlier turns)
+    SEMANTIC_CACHE_MAX_SCOPES: int = 1000
     MAX_LOG_ROWS: int = 5000
+    DB_BUSY_TIMEOUT_MS: int = 5000
+    # Background log retention (row-count and age limits)
+    LOG_MAX_AGE_DAYS: int = 0  # 0 = no age limit
+    LOG_RETENTION_INTERVAL_SECONDS: int = 60
+    LOG_RETENTION_BATCH_SIZE: int = 5000
+    LOG_ARCHIVE_DIR: str = ""  # write pruned rows to gzip JSONL here ("" = no archive)
+    LOG_COMPRESSION: str = "zlib"  # "zlib", "zstd" (needs zstandard) or "none"
+    ROLLUP_MINUTE_RETENTION_HOURS: int = 48
+    ROLLUP_HOUR_RETENTION_DAYS: int = 90
+    # Background log writer
+    LOG_QUEUE_MAX: int = 10000
+    LOG_QUEUE_FULL_POLICY: str = "drop"  # "drop" the row or "block" the request until there is room
+    LOG_BATCH_SIZE: int = 200
+    LOG_FLUSH_INTERVAL_SECONDS: float = 0.5
+    LOG_SHUTDOWN_TIMEOUT_SECONDS: float = 10.0
     PRICE_PER_1K_INPUT: float = 0.005   # default estimate for cloud model
     PRICE_PER_1K_OUTPUT: float = 0.015
     
     # Web Search
     ENABLE_WEB_SEARCH: bool = True
     WEB_SEARCH_MAX_RESULTS: int = 5
+    WEB_SEARCH_CACHE_TTL_SECONDS: int = 900
+    WEB_SEARCH_NEGATIVE_TTL_SECONDS: int = 60
+    WEB_SEARCH_CACHE_MAX_ENTRIES: int = 5000
+    # Search admission: "always", "keyword" or "learned"
+    SEARCH_ADMISSION_MODE: str = "always"
+    SEARCH_ADMISSION_MODEL_PATH: str = "./search_admission.json"
+    SEARCH_ADMISSION_THRESHOLD: float = 0.5
+    SEARCH_ADMISSION_MAX_CONCURRENT: int = 32  # shed search above this many in flight (0 = no limit)
+
+    # Upstream HTTP connection pools (one pool per upstream service)
+    HTTP_MAX_CONNECTIONS: int = 200
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 50
+    HTTP_KEEPALIVE_EXPIRY: float = 30.0
+    HTTP_POOL_TIMEOUT: Optional[float] = None  # wait for a free connection slot
+    OLLAMA_TIMEOUT: float = 120.0
+    # Circuit breakers per upstream ("ollama", "claude"): fail fast while a backend is down
+    BREAKER_WINDOW_SECONDS: float = 30.0
+    BREAKER_MIN_REQUESTS: int = 5
+    BREAKER_ERROR_RATE: float = 0.5
+    BREAKER_SLOW_RATE: float = 0.8
+    BREAKER_SLOW_MS: Dict[str, int] = {"ollama": 60000, "claude": 30000}
+    BREAKER_OPEN_SECONDS: float = 15.0
+    BREAKER_HALF_OPEN_PROBES: int = 1
+    ANTHROPIC_TIMEOUT: float = 90.0
+    WEB_SEARCH_TIMEOUT: float = 10.0
+
+    # Sampling profiler for slow requests (folded stacks for flamegraphs)
+    PROFILE_SAMPLE_RATE: float = 0.0  # fraction of requests to profile
+    PROFILE_ALLOW_HEADER: bool = False  # "X-Profile: 1" profiles a single request
+    PROFILE_HEADER_PER_MINUTE: int = 6  # cap on header-forced profiles across all clients
+    PROFILE_MAX_FILES: int = 200  # stop dumping once PROFILE_DIR holds this many profiles
+    PROFILE_SLOW_MS: int = 5000  # only dump sampled requests slower than this
+    PROFILE_INTERVAL_MS: int = 10
+    PROFILE_DIR: str = "./profiles"
 
     class Config:
         env_file = ".env"
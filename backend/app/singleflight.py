@@ -0,0 +1,60 @@
+"""
+Single-flight deduplication of identical concurrent requests.
+
+The first request for a key (the leader) runs the upstream work in its own
+task; requests for the same key that arrive while it is running (followers)
+await that task instead of repeating the work, and receive its result or
+its exception.
+"""
+
+import asyncio
+from typing import Awaitable, Callable, Dict
+
+
+class SingleFlight:
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.leaders = 0
+        self.followers = 0
+        self.follower_timeouts = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable], timeout: float):
+        """Run ``fn`` once per key at a time; concurrent callers share the result.
+
+        Followers give up with ``asyncio.TimeoutError`` after ``timeout``
+        seconds; the leader's task keeps running for the leader itself.
+        """
+        task = self._inflight.get(key)
+        if task is not None:
+            self.followers += 1
+            try:
+                return await asyncio.wait_for(asyncio.shield(task), timeout)
+            except asyncio.TimeoutError:
+                self.follower_timeouts += 1
+                raise
+
+        self.leaders += 1
+        # A separate task so a cancelled leader request doesn't cancel its followers
+        task = asyncio.ensure_future(fn())
+        self._inflight[key] = task
+        task.add_done_callback(lambda t: self._done(key, t))
+        return await asyncio.shield(task)
+
+    def _done(self, key: str, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            # Mark the exception retrieved even if every waiter went away
+            task.exception()
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": len(self._inflight),
+            "leaders": self.leaders,
+            "followers": self.followers,
+            "upstream_calls_avoided": self.followers - self.follower_timeouts,
+            "follower_timeouts": self.follower_timeouts,
+        }
+
+
+inflight = SingleFlight()
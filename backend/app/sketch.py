@@ -0,0 +1,63 @@
+"""
+Mergeable latency sketch with bounded relative error.
+
+Values go into logarithmic buckets (bucket i covers (gamma^(i-1), gamma^i]),
+so any quantile is reported within ``relative_accuracy`` of the true value
+and two sketches merge by adding bucket counts. That makes per-minute
+sketches cheap to store and to combine into hour or day percentiles.
+"""
+
+import json
+import math
+from typing import Dict, Optional
+
+
+class LatencySketch:
+    def __init__(self, relative_accuracy: float = 0.02, bins: Optional[Dict[int, int]] = None, zeros: int = 0):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.bins: Dict[int, int] = bins or {}
+        self.zeros = zeros
+
+    @property
+    def count(self) -> int:
+        return self.zeros + sum(self.bins.values())
+
+    def add(self, value: float, n: int = 1):
+        if value <= 0:
+            self.zeros += n
+            return
+        idx = math.ceil(math.log(value) / self._log_gamma)
+        self.bins[idx] = self.bins.get(idx, 0) + n
+
+    def merge(self, other: "LatencySketch") -> "LatencySketch":
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Cannot merge sketches with different accuracy")
+        for idx, n in other.bins.items():
+            self.bins[idx] = self.bins.get(idx, 0) + n
+        self.zeros += other.zeros
+        return self
+
+    def quantile(self, q: float) -> Optional[float]:
+        total = self.count
+        if total == 0:
+            return None
+        rank = q * (total - 1)
+        seen = self.zeros
+        if rank < seen:
+            return 0.0
+        for idx in sorted(self.bins):
+            seen += self.bins[idx]
+            if seen > rank:
+                # Midpoint of the bucket in relative terms
+                return 2 * self.gamma ** idx / (self.gamma + 1)
+        return 2 * self.gamma ** max(self.bins) / (self.gamma + 1)
+
+    def to_json(self) -> str:
+        return json.dumps({"a": self.relative_accuracy, "z": self.zeros, "b": self.bins})
+
+    @classmethod
+    def from_json(cls, data: str) -> "LatencySketch":
+        d = json.loads(data)
+        return cls(d["a"], {int(k): v for k, v in d["b"].items()}, d["z"])
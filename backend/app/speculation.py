@@ -0,0 +1,171 @@
+"""
+Speculative cloud calls for prompts that are likely to escalate.
+
+When enabled, a cheap predictor estimates the chance that the local answer
+will come back below CONFIDENCE_THRESHOLD. Above
+SPECULATIVE_ESCALATION_THRESHOLD the Claude call starts alongside the
+local one, so an escalation costs max(local, cloud) rather than their sum.
+Cloud spend on speculative calls whose answer is discarded is capped per
+tenant by SPECULATIVE_BUDGET_USD_PER_HOUR and across all tenants by
+SPECULATIVE_BUDGET_USD_PER_HOUR_TOTAL.
+"""
+
+import asyncio
+import math
+import time
+from collections import OrderedDict, deque
+from typing import Deque, Dict, Optional, Tuple
+
+from .cost import estimate_cost
+from .settings import settings
+
+# Conversations remembered for sticky escalation
+_MAX_CONVERSATIONS = 10000
+# Tenants tracked by a spend window (the global total still covers evicted ones)
+_MAX_TENANTS = 10000
+
+
+class EscalationPredictor:
+    """Online P(escalate) per local model and prompt-length bucket.
+
+    Each bucket keeps an EWMA of observed escalations; a conversation whose
+    previous turn went to cloud is treated as likely to escalate again.
+    """
+
+    def __init__(self, alpha: float = 0.1):
+        self.alpha = alpha
+        self._rates: Dict[Tuple[str, int], float] = {}
+        self._last_route: "OrderedDict[str, str]" = OrderedDict()
+
+    @staticmethod
+    def _bucket(messages: list[dict]) -> int:
+        chars = sum(len(m.get("content", "")) for m in messages)
+        return int(math.log2(chars + 1))
+
+    def previous_route(self, conversation_id: Optional[str]) -> Optional[str]:
+        return self._last_route.get(conversation_id) if conversation_id else None
+
+    def predict(self, messages: list[dict], model: str, conversation_id: Optional[str]) -> float:
+        p = self._rates.get((model, self._bucket(messages)), 0.0)
+        if conversation_id and self._last_route.get(conversation_id) == "cloud":
+            p = max(p, 0.8)
+        return p
+
+    def record(self, messages: list[dict], model: str, conversation_id: Optional[str], escalated: bool):
+        key = (model, self._bucket(messages))
+        prev = self._rates.get(key)
+        y = 1.0 if escalated else 0.0
+        self._rates[key] = y if prev is None else prev + self.alpha * (y - prev)
+        if conversation_id:
+            self._last_route[conversation_id] = "cloud" if escalated else "local"
+            self._last_route.move_to_end(conversation_id)
+            while len(self._last_route) > _MAX_CONVERSATIONS:
+                self._last_route.popitem(last=False)
+
+
+class SpendWindow:
+    """Sliding one-hour window of spend per tenant and across all tenants.
+
+    Tenant ids come from the client-supplied ``user`` field, so a caller can
+    mint new ones at will; the all-tenant total is the cap that always
+    holds. Tenants whose window has emptied are dropped and the map is
+    bounded like the predictor's conversation map.
+    """
+
+    def __init__(self):
+        self._spend: "OrderedDict[str, Deque[Tuple[float, float]]]" = OrderedDict()
+        self._total: Deque[Tuple[float, float]] = deque()
+
+    @staticmethod
+    def _expire(window: Deque[Tuple[float, float]], cutoff: float) -> float:
+        while window and window[0][0] < cutoff:
+            window.popleft()
+        return sum(cost for _, cost in window)
+
+    def spent(self, tenant: str) -> float:
+        window = self._spend.get(tenant)
+        if not window:
+            return 0.0
+        total = self._expire(window, time.time() - 3600)
+        if not window:
+            del self._spend[tenant]
+        return total
+
+    def spent_total(self) -> float:
+        return self._expire(self._total, time.time() - 3600)
+
+    def allows(self, tenant: str, cost: float, tenant_limit: float, total_limit: float) -> bool:
+        """Whether ``cost`` more fits both the tenant's and the global hourly budget."""
+        return self.spent(tenant) + cost <= tenant_limit and self.spent_total() + cost <= total_limit
+
+    def charge(self, tenant: str, cost: float):
+        if cost <= 0:
+            return
+        now = time.time()
+        self._spend.setdefault(tenant, deque()).append((now, cost))
+        self._spend.move_to_end(tenant)
+        self._total.append((now, cost))
+        # Least recently charged first: drop tenants with nothing left in the window
+        cutoff = now - 3600
+        while self._spend:
+            oldest, window = next(iter(self._spend.items()))
+            if window[-1][0] >= cutoff and len(self._spend) <= _MAX_TENANTS:
+                break
+            del self._spend[oldest]
+
+
+def estimated_input_cost(messages: list[dict]) -> float:
+    # ~4 characters per token is close enough for a budget guard
+    chars = sum(len(m.get("content", "")) for m in messages)
+    return estimate_cost({"prompt_tokens": chars // 4})
+
+
+class Speculation:
+    def __init__(self):
+        self.predictor = EscalationPredictor()
+        self.budget = SpendWindow()
+        self.started = 0
+        self.used = 0
+        self.wasted = 0
+        self.wasted_usd = 0.0
+        self.skipped_budget = 0
+
+    def should_speculate(self, messages: list[dict], model: str, conversation_id: Optional[str], tenant: str) -> bool:
+        if not settings.SPECULATIVE_CLOUD_ENABLED:
+            return False
+        if self.predictor.predict(messages, model, conversation_id) < settings.SPECULATIVE_ESCALATION_THRESHOLD:
+            return False
+        if not self.budget.allows(tenant, estimated_input_cost(messages), settings.SPECULATIVE_BUDGET_USD_PER_HOUR,
+                                  settings.SPECULATIVE_BUDGET_USD_PER_HOUR_TOTAL):
+            self.skipped_budget += 1
+            return False
+        self.started += 1
+        return True
+
+    def settle(self, task: asyncio.Task, used: bool, messages: list[dict], tenant: str):
+        """Cancel an unused speculative call and charge what it cost to the tenant."""
+        if used:
+            self.used += 1
+            return
+        self.wasted += 1
+        cost = estimated_input_cost(messages)
+        if not task.done():
+            task.cancel()
+        elif not task.cancelled() and task.exception() is None:
+            # Completed but discarded: the full call was billed
+            cost = estimate_cost(task.result()[2])
+        self.wasted_usd += cost
+        self.budget.charge(tenant, cost)
+
+    def stats(self) -> dict:
+        return {
+            "enabled": settings.SPECULATIVE_CLOUD_ENABLED,
+            "started": self.started,
+            "used": self.used,
+            "wasted": self.wasted,
+            "wasted_usd": round(self.wasted_usd, 6),
+            "skipped_budget": self.skipped_budget,
+        }
+
+
+speculation = Speculation()
@@ -0,0 +1,140 @@
+"""
+Latency-SLO spillover from the local model to cloud.
+
+For each local model an EWMA of Ollama's eval rate, prompt-eval rate,
+answer length and server-side service time is kept from the timings Ollama
+reports. A new request's local completion time is predicted as the wait
+behind requests already in flight on the least-loaded host plus its own
+prompt evaluation and generation. When that exceeds LOCAL_SLO_MS the
+request goes straight to cloud, provided cloud is allowed (#no_cloud), the
+Anthropic breaker is not open and both the tenant and all tenants together
+are within budget (SPILLOVER_BUDGET_USD_PER_HOUR and
+SPILLOVER_BUDGET_USD_PER_HOUR_TOTAL).
+"""
+
+from typing import Dict, Optional, Tuple
+
+from .circuit_breaker import claude_breaker
+from .clients.ollama_pool import ollama_pool
+from .cost import estimate_cost
+from .metrics import Counter
+from .policy import cloud_allowed
+from .settings import settings
+from .speculation import SpendWindow, estimated_input_cost
+
+SPILLOVERS = Counter("router_spillovers", "Requests sent to cloud because local would miss LOCAL_SLO_MS")
+
+
+class LocalLatencyModel:
+    """Per-model EWMAs of Ollama throughput, fed by completed local requests."""
+
+    def __init__(self, alpha: float = 0.2):
+        self.alpha = alpha
+        self._stats: Dict[str, Dict[str, float]] = {}
+
+    def _update(self, stats: Dict[str, float], name: str, value: float):
+        prev = stats.get(name)
+        stats[name] = value if prev is None else prev + self.alpha * (value - prev)
+
+    def observe(self, model: str, usage: Optional[dict], timings_ms: Optional[dict]):
+        usage = usage or {}
+        timings_ms = timings_ms or {}
+        stats = self._stats.setdefault(model, {})
+        completion, eval_ms = usage.get("completion_tokens"), timings_ms.get("eval")
+        if completion and eval_ms:
+            self._update(stats, "eval_tps", completion / eval_ms * 1000)
+            self._update(stats, "completion_tokens", completion)
+        prompt, prompt_ms = usage.get("prompt_tokens"), timings_ms.get("prompt_eval")
+        if prompt and prompt_ms:
+            self._update(stats, "prompt_tps", prompt / prompt_ms * 1000)
+        service_ms = sum(timings_ms.values())
+        if service_ms:
+            self._update(stats, "service_ms", service_ms)
+
+    def predict_ms(self, model: str, prompt_tokens: int, queued: int) -> Optional[float]:
+        """Predicted time to finish a new request, or None before enough has been observed."""
+        stats = self._stats.get(model)
+        if not stats or "eval_tps" not in stats or "service_ms" not in stats:
+            return None
+        prompt_ms = prompt_tokens / stats["prompt_tps"] * 1000 if "prompt_tps" in stats else 0.0
+        generate_ms = stats["completion_tokens"] / stats["eval_tps"] * 1000
+        wait_ms = queued / max(settings.LOCAL_PARALLEL_PER_HOST, 1) * stats["service_ms"]
+        return wait_ms + prompt_ms + generate_ms
+
+    def expected_completion(self, model: str) -> Optional[Tuple[float, float]]:
+        """(typical answer tokens, eval tokens/sec) for ``model`` once observed."""
+        stats = self._stats.get(model)
+        if not stats or "eval_tps" not in stats:
+            return None
+        return stats["completion_tokens"], stats["eval_tps"]
+
+    def stats(self) -> dict:
+        return {model: {k: round(v, 1) for k, v in s.items()} for model, s in self._stats.items()}
+
+
+def _queued(model: str) -> int:
+    """Requests ahead of a new one on the host the pool would pick."""
+    candidates = [b for b in ollama_pool.backends if b.has_model(model)]
+    healthy = [b for b in candidates if b.healthy] or candidates
+    return min((b.outstanding for b in healthy), default=0)
+
+
+class Spillover:
+    def __init__(self):
+        self.latency = LocalLatencyModel()
+        self.budget = SpendWindow()
+        self.evaluated = 0
+        self.spilled = 0
+        self.blocked: Dict[str, int] = {}
+
+    def decide(self, messages: list[dict], model: str, tenant: str) -> Optional[dict]:
+        """Spillover decision for the log row; ``decision["spilled"]`` routes to cloud."""
+        if settings.LOCAL_SLO_MS <= 0:
+            return None
+        queued = _queued(model)
+        # ~4 characters per token, as for the budget estimates
+        prompt_tokens = sum(len(m.get("content", "")) for m in messages) // 4
+        predicted = self.latency.predict_ms(model, prompt_tokens, queued)
+        if predicted is None:
+            return None
+        self.evaluated += 1
+        decision = {
+            "predicted_local_ms": int(predicted),
+            "slo_ms": settings.LOCAL_SLO_MS,
+            "queued": queued,
+            "spilled": False,
+        }
+        if predicted <= settings.LOCAL_SLO_MS:
+            return decision
+        if not cloud_allowed(messages):
+            reason = "no_cloud"
+        elif not settings.ANTHROPIC_API_KEY:
+            reason = "no_cloud_key"
+        elif claude_breaker.is_open():
+            reason = "breaker_open"
+        elif not self.budget.allows(tenant, estimated_input_cost(messages), settings.SPILLOVER_BUDGET_USD_PER_HOUR,
+                                    settings.SPILLOVER_BUDGET_USD_PER_HOUR_TOTAL):
+            reason = "budget"
+        else:
+            decision["spilled"] = True
+            self.spilled += 1
+            SPILLOVERS.inc()
+            return decision
+        decision["blocked"] = reason
+        self.blocked[reason] = self.blocked.get(reason, 0) + 1
+        return decision
+
+    def charge(self, tenant: str, usage: dict):
+        self.budget.charge(tenant, estimate_cost(usage or {}))
+
+    def stats(self) -> dict:
+        return {
+            "slo_ms": settings.LOCAL_SLO_MS,
+            "evaluated": self.evaluated,
+            "spilled": self.spilled,
+            "blocked": dict(self.blocked),
+            "models": self.latency.stats(),
+        }
+
+
+spillover = Spillover()
@@ -0,0 +1 @@
+# Benchmarks for local-first router
@@ -0,0 +1,68 @@
+"""
+Memory benchmark for the response cache under a unique-prompt workload.
+
+Every request uses a new prompt, so nothing is ever read back: the
+pre-LRU module-level dict grew without bound here, while ResponseCache
+must stay flat once its budget is reached.
+
+Run from backend/:  python -m benchmarks.cache_memory --requests 50000
+"""
+
+import argparse
+import json
+import tracemalloc
+import uuid
+
+from app.cache import ResponseCache, key_for_messages
+
+
+def _fake_response(prompt: str) -> dict:
+    return {
+        "id": uuid.uuid4().hex[:8],
+        "object": "chat.completion",
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": prompt * 8}}],
+        "usage": {"prompt_tokens": 40, "completion_tokens": 200, "total_tokens": 240},
+        "route": "local",
+        "confidence": 0.9,
+    }
+
+
+def run(requests: int, max_entries: int, max_bytes: int, samples: int = 10) -> dict:
+    cache = ResponseCache(max_entries, max_bytes)
+    step = max(requests // samples, 1)
+    points = []
+
+    tracemalloc.start()
+    base, _ = tracemalloc.get_traced_memory()
+    for i in range(requests):
+        prompt = f"unique prompt {i} {uuid.uuid4().hex}"
+        key = key_for_messages([{"role": "user", "content": prompt}], "bench")
+        cache.get(key, 300)
+        cache.set(key, _fake_response(prompt))
+        if (i + 1) % step == 0:
+            current, _ = tracemalloc.get_traced_memory()
+            points.append({"requests": i + 1, "traced_bytes": current - base, "entries": cache.stats()["entries"]})
+    tracemalloc.stop()
+
+    first_full = next((p for p in points if p["entries"] >= min(max_entries, requests)), points[-1])
+    return {
+        "requests": requests,
+        "max_entries": max_entries,
+        "max_bytes": max_bytes,
+        "samples": points,
+        "growth_after_full_bytes": points[-1]["traced_bytes"] - first_full["traced_bytes"],
+        "cache": cache.stats(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=50000)
+    parser.add_argument("--max-entries", type=int, default=5000)
+    parser.add_argument("--max-bytes", type=int, default=16 * 1024 * 1024)
+    args = parser.parse_args()
+    print(json.dumps(run(args.requests, args.max_entries, args.max_bytes), indent=2))
+
+
+if __name__ == "__main__":
+    main()
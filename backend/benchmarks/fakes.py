@@ -0,0 +1,126 @@
+"""
+In-process stand-ins for the router's upstreams, for load tests.
+
+Each fake is a small FastAPI app meant to be mounted with
+``http.set_transport(name, httpx.ASGITransport(app=...))``, so the
+router's real clients, pools and parsers run unchanged. Latency follows a
+simple token model: prompt tokens (~4 chars each) are processed at
+``prompt_tps`` and answer tokens are generated at ``tps``.
+
+Prompts containing ``[escalate]`` get a low-confidence local answer, so
+the router escalates them to the fake Anthropic API.
+"""
+
+import asyncio
+import json
+from dataclasses import dataclass
+
+from fastapi import FastAPI, Request
+from fastapi.responses import HTMLResponse, StreamingResponse
+
+ESCALATE_MARKER = "[escalate]"
+
+
+@dataclass
+class UpstreamProfile:
+    base_ms: float = 5.0  # fixed overhead per call
+    prompt_tps: float = 4000.0  # prompt tokens processed per second
+    tps: float = 200.0  # generated tokens per second
+    answer_tokens: int = 40
+
+
+def _prompt_tokens(messages) -> int:
+    return sum(len(str(m.get("content", ""))) for m in messages) // 4
+
+
+def _answer_words(n: int) -> list:
+    return [f"word{i % 50}" for i in range(n)]
+
+
+def fake_ollama(profile: UpstreamProfile) -> FastAPI:
+    app = FastAPI()
+
+    @app.post("/api/chat")
+    async def chat(request: Request):
+        body = await request.json()
+        messages = body.get("messages", [])
+        last = str(messages[-1].get("content", "")) if messages else ""
+        confidence = 0.2 if ESCALATE_MARKER in last else 0.92
+        prompt_tokens = _prompt_tokens(messages)
+        prompt_s = profile.base_ms / 1000 + prompt_tokens / profile.prompt_tps
+        words = _answer_words(profile.answer_tokens)
+        system = str(messages[0].get("content", "")) if messages else ""
+        if '"confidence" first' in system:
+            envelope = json.dumps({"confidence": confidence, "answer": " ".join(words)})
+        else:
+            envelope = json.dumps({"answer": " ".join(words), "confidence": confidence})
+        done = {
+            "done": True,
+            "prompt_eval_count": prompt_tokens,
+            "eval_count": len(words),
+            "prompt_eval_duration": int(prompt_s * 1e9),
+            "eval_duration": int(len(words) / profile.tps * 1e9),
+        }
+
+        if not body.get("stream"):
+            await asyncio.sleep(prompt_s + len(words) / profile.tps)
+            return {"message": {"role": "assistant", "content": envelope}, **done}
+
+        async def lines():
+            await asyncio.sleep(prompt_s)
+            # One token per line, roughly as Ollama streams
+            step = max(len(envelope) // len(words), 1)
+            for i in range(0, len(envelope), step):
+                await asyncio.sleep(1 / profile.tps)
+                yield json.dumps({"message": {"content": envelope[i:i + step]}, "done": False}) + "\n"
+            yield json.dumps({"message": {"content": ""}, **done}) + "\n"
+
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+    @app.get("/api/tags")
+    async def tags():
+        return {"models": [{"name": "llama3.1:8b-instruct-q4_K_M"}]}
+
+    @app.post("/api/generate")
+    async def preload():
+        return {"response": "", "done": True, "load_duration": 0}
+
+    @app.get("/api/ps")
+    async def ps():
+        return {"models": [{"name": "llama3.1:8b-instruct-q4_K_M"}]}
+
+    return app
+
+
+def fake_anthropic(profile: UpstreamProfile) -> FastAPI:
+    app = FastAPI()
+
+    @app.post("/v1/messages")
+    async def messages(request: Request):
+        body = await request.json()
+        prompt_tokens = _prompt_tokens(body.get("messages", [])) + len(body.get("system", "")) // 4
+        words = _answer_words(profile.answer_tokens)
+        await asyncio.sleep(profile.base_ms / 1000 + prompt_tokens / profile.prompt_tps + len(words) / profile.tps)
+        return {
+            "content": [{"type": "text", "text": " ".join(words)}],
+            "usage": {"input_tokens": prompt_tokens, "output_tokens": len(words)},
+        }
+
+    return app
+
+
+def fake_search(latency_ms: float, results: int = 5) -> FastAPI:
+    """DuckDuckGo's HTML endpoint, in the markup SimpleResultParser reads."""
+    app = FastAPI()
+
+    @app.get("/html/")
+    async def html(q: str = ""):
+        await asyncio.sleep(latency_ms / 1000)
+        items = "".join(
+            f'<a class="result__a" href="https://example.com/{i}">Result {i} for {q}</a>'
+            f'<a class="result__snippet">Snippet {i} about {q}.</a>'
+            for i in range(results)
+        )
+        return HTMLResponse(f"<html><body>{items}</body></html>")
+
+    return app
@@ -0,0 +1,226 @@
+"""
+End-to-end load test of /v1/chat/completions against in-process fakes.
+
+The router app and fake Ollama, Anthropic and DuckDuckGo servers (see
+fakes.py) all run in this process over httpx.ASGITransport, so a run
+exercises the real routing, caching, search, logging and HTTP client code
+with controlled upstream latency and no network. Requests are drawn from a
+workload mix of scenarios:
+
+- cache_hit: one of a small pool of repeated prompts
+- local: a new short prompt answered confidently by the local model
+- escalation: a new prompt the local model is unsure of (goes to cloud)
+- long_history: a new question at the end of a 30-turn conversation
+- ocr: a new prompt with an attached image
+- stream: a new prompt with ``"stream": true``
+
+Results (throughput, p50/p95/p99 latency overall and per scenario, errors,
+memory and upstream call counts) are printed as JSON.
+
+Run from backend/:  python -m benchmarks.loadtest --requests 500 --concurrency 32 --mix default
+"""
+
+import argparse
+import asyncio
+import base64
+import contextlib
+import io
+import json
+import os
+import random
+import resource
+import tempfile
+import time
+import uuid
+
+# The router reads its settings at import time, so configure it first
+_DB_DIR = tempfile.mkdtemp(prefix="router-loadtest-")
+os.environ.update({
+    "DB_URL": f"sqlite:///{os.path.join(_DB_DIR, 'router.db')}",
+    "ANTHROPIC_API_KEY": "loadtest-key",
+    "ENABLE_WEB_SEARCH": "true",
+    "SEARCH_ADMISSION_MODE": "always",
+    "PROFILE_DIR": os.path.join(_DB_DIR, "profiles"),
+})
+
+import httpx  # noqa: E402
+
+from app import main  # noqa: E402
+from app.clients import http  # noqa: E402
+from app.services.web_search import get_web_search_service  # noqa: E402
+
+from .fakes import ESCALATE_MARKER, UpstreamProfile, fake_anthropic, fake_ollama, fake_search  # noqa: E402
+
+MIXES = {
+    "default": {"cache_hit": 30, "local": 35, "escalation": 15, "long_history": 10, "ocr": 5, "stream": 5},
+    "cache-heavy": {"cache_hit": 80, "local": 20},
+    "escalation-heavy": {"local": 30, "escalation": 50, "long_history": 20},
+}
+
+_CACHED_PROMPTS = [f"What is the capital of country number {i}?" for i in range(20)]
+
+
+def _image_b64() -> str:
+    try:
+        from PIL import Image, ImageDraw
+    except ImportError:
+        return base64.b64encode(b"not an image").decode()
+    img = Image.new("RGB", (400, 80), "white")
+    ImageDraw.Draw(img).text((10, 30), "Invoice total: 42.00 EUR", fill="black")
+    buf = io.BytesIO()
+    img.save(buf, format="PNG")
+    return base64.b64encode(buf.getvalue()).decode()
+
+
+def _history(turns: int) -> list:
+    messages = []
+    for i in range(turns):
+        messages.append({"role": "user", "content": f"Turn {i}: " + "tell me more about the topic. " * 15})
+        messages.append({"role": "assistant", "content": f"Answer {i}: " + "here are further details. " * 15})
+    return messages
+
+
+def build_request(scenario: str, rng: random.Random, image: str) -> dict:
+    unique = uuid.UUID(int=rng.getrandbits(128)).hex[:12]
+    if scenario == "cache_hit":
+        return {"messages": [{"role": "user", "content": rng.choice(_CACHED_PROMPTS)}]}
+    if scenario == "escalation":
+        return {"messages": [{"role": "user", "content": f"{ESCALATE_MARKER} Prove conjecture {unique}"}]}
+    if scenario == "long_history":
+        return {"messages": _history(15) + [{"role": "user", "content": f"And what about {unique}?"}]}
+    if scenario == "ocr":
+        return {"messages": [{"role": "user", "content": f"What does this receipt {unique} say?"}], "image": image}
+    if scenario == "stream":
+        return {"messages": [{"role": "user", "content": f"Explain topic {unique}"}], "stream": True}
+    return {"messages": [{"role": "user", "content": f"Explain topic {unique}"}]}
+
+
+def _percentiles(values: list) -> dict:
+    if not values:
+        return {"p50": None, "p95": None, "p99": None, "max": None}
+    values = sorted(values)
+
+    def pick(q):
+        return round(values[min(int(q * len(values)), len(values) - 1)], 1)
+
+    return {"p50": pick(0.5), "p95": pick(0.95), "p99": pick(0.99), "max": round(values[-1], 1)}
+
+
+def _rss_mb() -> float:
+    try:
+        with open("/proc/self/statm") as f:
+            return round(int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20, 1)
+    except OSError:
+        return 0.0
+
+
+async def _send(client: httpx.AsyncClient, body: dict) -> bool:
+    if body.get("stream"):
+        async with client.stream("POST", "/v1/chat/completions", json=body) as r:
+            text = "".join([chunk async for chunk in r.aiter_text()])
+            return r.status_code == 200 and "[DONE]" in text and '"error"' not in text
+    r = await client.post("/v1/chat/completions", json=body)
+    return r.status_code == 200
+
+
+async def run(requests: int, concurrency: int, mix: dict, seed: int, ollama: UpstreamProfile,
+              claude: UpstreamProfile, search_ms: float) -> dict:
+    http.set_transport("ollama", httpx.ASGITransport(app=fake_ollama(ollama)))
+    http.set_transport("anthropic", httpx.ASGITransport(app=fake_anthropic(claude)))
+    http.set_transport("web_search", httpx.ASGITransport(app=fake_search(search_ms)))
+    # DDGS makes its own (blocking) requests; use the pooled HTML path the fake serves
+    get_web_search_service().ddgs_available = False
+
+    rng = random.Random(seed)
+    image = _image_b64()
+    names, weights = zip(*mix.items())
+    plan = [(s, build_request(s, rng, image)) for s in rng.choices(names, weights, k=requests)]
+    latencies = {name: [] for name in names}
+    errors = {name: 0 for name in names}
+    queue = iter(plan)
+
+    rss_before = _rss_mb()
+    async with main.lifespan(main.app):
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://router", timeout=None) as client:
+
+            async def worker():
+                for scenario, body in queue:
+                    start = time.perf_counter()
+                    try:
+                        ok = await _send(client, body)
+                    except Exception:
+                        ok = False
+                    if ok:
+                        latencies[scenario].append((time.perf_counter() - start) * 1000)
+                    else:
+                        errors[scenario] += 1
+
+            started = time.perf_counter()
+            await asyncio.gather(*(worker() for _ in range(concurrency)))
+            elapsed = time.perf_counter() - started
+        upstream = http.pool_stats()
+
+    all_latencies = [v for vs in latencies.values() for v in vs]
+    return {
+        "config": {
+            "requests": requests,
+            "concurrency": concurrency,
+            "mix": mix,
+            "seed": seed,
+            "ollama": vars(ollama),
+            "claude": vars(claude),
+            "search_latency_ms": search_ms,
+        },
+        "overall": {
+            "completed": len(all_latencies),
+            "errors": sum(errors.values()),
+            "elapsed_s": round(elapsed, 3),
+            "throughput_rps": round(len(all_latencies) / elapsed, 2) if elapsed else 0.0,
+            "latency_ms": _percentiles(all_latencies),
+        },
+        "scenarios": {
+            name: {"completed": len(latencies[name]), "errors": errors[name], "latency_ms": _percentiles(latencies[name])}
+            for name in names
+        },
+        "memory": {
+            "rss_before_mb": rss_before,
+            "rss_after_mb": _rss_mb(),
+            "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        },
+        "upstream_requests": {name: s["requests"] for name, s in upstream.items()},
+        "early_aborts": main.early_aborts.stats(),
+    }
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--mix", choices=sorted(MIXES), default="default")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--ollama-tps", type=float, default=200.0, help="fake Ollama generation tokens/s")
+    parser.add_argument("--ollama-prompt-tps", type=float, default=4000.0)
+    parser.add_argument("--claude-tps", type=float, default=400.0)
+    parser.add_argument("--claude-base-ms", type=float, default=150.0, help="fake Anthropic fixed latency")
+    parser.add_argument("--search-ms", type=float, default=100.0)
+    parser.add_argument("--output", help="also write the JSON results to this file")
+    args = parser.parse_args()
+
+    # The router logs every request with print(); keep the results readable
+    with contextlib.redirect_stdout(io.StringIO()):
+        results = asyncio.run(run(
+            args.requests, args.concurrency, MIXES[args.mix], args.seed,
+            UpstreamProfile(prompt_tps=args.ollama_prompt_tps, tps=args.ollama_tps),
+            UpstreamProfile(base_ms=args.claude_base_ms, tps=args.claude_tps),
+            args.search_ms,
+        ))
+    out = json.dumps(results, indent=2)
+    print(out)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(out + "\n")
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,192 @@
+"""
+Micro-benchmarks for per-request CPU hot spots, with regression gating.
+
+Covers the functions that run on every request and scale with the
+conversation: key_for_messages, cloud_allowed, parse_json_block (valid
+envelopes and the lenient fallback for malformed ones) and
+ChatResponse(...).dict(), over synthetic conversations from 1 to 200 turns
+and 1 KB to 1 MB of content.
+
+Each case reports the best per-call time over several repeats. Times are
+also divided by a fixed pure-Python calibration loop measured in the same
+run; a case counts as slower only if both its raw and its calibrated time
+are, so a slower machine (raw only) or a noisy calibration (calibrated
+only) does not fail the run.
+Without --update-baseline the run exits non-zero if any case is slower
+than its stored baseline by more than --threshold, after re-measuring
+apparent regressions (--retries) to filter out scheduler noise.
+
+Run from backend/:  python -m benchmarks.micro            (compare)
+                    python -m benchmarks.micro --update-baseline
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import timeit
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.cache import key_for_messages
+from app.policy import cloud_allowed
+from app.router_service import parse_json_block
+from app.schemas import ChatResponse, Choice, ChoiceMsg
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "micro_baseline.json")
+
+# (turns, total content bytes)
+SIZES: List[Tuple[int, int]] = [(1, 1_000), (10, 10_000), (50, 100_000), (200, 1_000_000)]
+
+
+def _label(turns: int, size: int) -> str:
+    return f"{turns}t_{size // 1000}kb"
+
+
+def _conversation(turns: int, size: int) -> List[dict]:
+    per_turn = max(size // turns, 1)
+    text = ("The quick brown fox jumps over the lazy dog. " * (per_turn // 45 + 1))[:per_turn]
+    return [{"role": "user" if i % 2 == 0 else "assistant", "content": text} for i in range(turns)]
+
+
+def _envelope(size: int, malformed: bool) -> str:
+    body = ("Use $x = \\frac{-b}{2a}$ here. " if malformed else "Plain explanatory text here. ") * (size // 30 + 1)
+    answer = body[:size]
+    if malformed:
+        # Single backslashes are invalid JSON escapes and force the lenient path
+        return '{"answer": "' + answer + '", "confidence": 0.8}'
+    return json.dumps({"answer": answer, "confidence": 0.8})
+
+
+def _response(size: int) -> Callable[[], dict]:
+    answer = ("Generated answer text. " * (size // 23 + 1))[:size]
+    usage = {"prompt_tokens": size // 4, "completion_tokens": size // 4, "total_tokens": size // 2}
+
+    def build():
+        return ChatResponse(
+            id="bench", choices=[Choice(index=0, message=ChoiceMsg(content=answer))], model="m",
+            route="local", confidence=0.9, latency_ms=10, estimated_cost_usd=0.0,
+            estimated_cost_saved_usd=0.0, usage=usage, conversation_id="c",
+        ).dict()
+
+    return build
+
+
+def cases() -> Dict[str, Callable[[], object]]:
+    out: Dict[str, Callable[[], object]] = {}
+    for turns, size in SIZES:
+        messages = _conversation(turns, size)
+        label = _label(turns, size)
+        out[f"key_for_messages/{label}"] = lambda m=messages: key_for_messages(m, "llama")
+        out[f"cloud_allowed/{label}"] = lambda m=messages: cloud_allowed(m)
+    for _, size in SIZES:
+        kb = f"{size // 1000}kb"
+        for malformed in (False, True):
+            text = _envelope(size, malformed)
+            out[f"parse_json_block/{'malformed' if malformed else 'valid'}_{kb}"] = lambda t=text: parse_json_block(t)
+        out[f"chat_response_dict/{kb}"] = _response(size)
+    return out
+
+
+def _calibrate() -> Callable[[], object]:
+    def work():
+        total = 0
+        for i in range(2000):
+            total += i * i % 7
+        return "".join(str(i) for i in range(200))
+    return work
+
+
+def measure(fn: Callable[[], object], repeat: int) -> float:
+    """Best time per call in microseconds."""
+    timer = timeit.Timer(fn)
+    number = 1
+    # Enough calls per repeat to run ~20 ms, so timer resolution doesn't matter
+    while timer.timeit(number) < 0.02:
+        number *= 2
+    return min(timer.repeat(repeat=repeat, number=number)) / number * 1e6
+
+
+def run(repeat: int, only: Optional[List[str]] = None) -> dict:
+    calibrate = _calibrate()
+    calibration = measure(calibrate, repeat)
+    results = {}
+    for name, fn in cases().items():
+        if only is None or name in only:
+            results[name] = measure(fn, repeat)
+    # Best of before/after, so a noisy moment doesn't skew every case
+    calibration = min(calibration, measure(calibrate, repeat))
+    return {
+        "calibration_us": round(calibration, 2),
+        "cases": {name: {"us": round(us, 2), "normalized": round(us / calibration, 4)} for name, us in results.items()},
+    }
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> List[str]:
+    """Names of cases whose normalized time exceeds the baseline by more than ``threshold``."""
+    slower = []
+    for name, result in current["cases"].items():
+        base = baseline["cases"].get(name)
+        if base is None or not base["normalized"] or not base["us"]:
+            continue
+        # A real regression shows up both raw and relative to the calibration loop;
+        # requiring both filters out noise in either measurement and machine speed changes
+        result["vs_baseline"] = round(min(result["us"] / base["us"], result["normalized"] / base["normalized"]), 3)
+        if result["vs_baseline"] > 1 + threshold:
+            slower.append(name)
+    return slower
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--threshold", type=float, default=0.3, help="allowed slowdown, e.g. 0.3 = 30%%")
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--retries", type=int, default=2, help="re-measure apparent regressions this many times")
+    args = parser.parse_args()
+
+    if args.update_baseline:
+        # Median of several runs, so one lucky or unlucky run doesn't set the bar
+        runs = [run(args.repeat) for _ in range(3)]
+        current = {
+            "calibration_us": statistics.median(r["calibration_us"] for r in runs),
+            "cases": {
+                name: {k: statistics.median(r["cases"][name][k] for r in runs) for k in ("us", "normalized")}
+                for name in runs[0]["cases"]
+            },
+        }
+        with open(args.baseline, "w") as f:
+            json.dump(current, f, indent=2)
+            f.write("\n")
+        print(json.dumps({"baseline_written": args.baseline, **current}, indent=2))
+        return
+
+    current = run(args.repeat)
+    if not os.path.exists(args.baseline):
+        raise SystemExit(f"No baseline at {args.baseline}; run with --update-baseline first.")
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    slower = compare(current, baseline, args.threshold)
+    for _ in range(args.retries):
+        if not slower:
+            break
+        # Shared machines are noisy: a case only fails if it stays slow when re-measured
+        retry = run(args.repeat, only=slower)
+        for name in slower:
+            if retry["cases"][name]["normalized"] < current["cases"][name]["normalized"]:
+                current["cases"][name] = retry["cases"][name]
+        slower = compare(current, baseline, args.threshold)
+    regressions = [
+        {"case": name, "ratio": current["cases"][name]["vs_baseline"], "us": current["cases"][name]["us"],
+         "baseline_us": baseline["cases"][name]["us"]}
+        for name in slower
+    ]
+    print(json.dumps({**current, "threshold": args.threshold, "regressions": regressions}, indent=2))
+    if regressions:
+        print(f"{len(regressions)} micro-benchmark regression(s) above {args.threshold:.0%}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+# Offline maintenance scripts for local-first router
@@ -0,0 +1,73 @@
+"""
+Train the pre-routing escalation predictor from the logs table.
+
+Label: a request is positive when the local answer escalated to cloud or
+stayed below CONFIDENCE_THRESHOLD. Rows that never had a local attempt
+(forced cloud, SLO spillover, enforced pre-routing) carry no signal and
+are ignored. Rows are replayed oldest first so each request sees its
+conversation's previous route, as the router does.
+
+Run from backend/:  python -m scripts.train_router --output prerouting.json
+"""
+
+import argparse
+import json
+import random
+
+from app.classifier import LogisticModel, evaluate
+from app.prerouting import routing_features
+from app.settings import settings
+from scripts.train_search_admission import iter_logs
+
+
+def load_examples():
+    """(messages, has_ocr, previous_route, label) per usable row, oldest first."""
+    rows = list(iter_logs())
+    rows.reverse()
+    last_route = {}
+    examples = []
+    for route, confidence, request, _ in rows:
+        try:
+            req = json.loads(request or "{}")
+        except ValueError:
+            continue
+        messages = req.get("messages") or []
+        conversation_id = req.get("conversation_id")
+        previous_route = last_route.get(conversation_id)
+        if conversation_id:
+            last_route[conversation_id] = route
+        skipped_local = (req.get("spillover") or {}).get("spilled") or (req.get("prerouting") or {}).get("enforced")
+        if req.get("forced_cloud") or skipped_local or not messages:
+            continue
+        escalated = route == "cloud" or (confidence or 0.0) < settings.CONFIDENCE_THRESHOLD
+        has_ocr = "ocr" in (req.get("timings_ms") or {})
+        examples.append((messages, has_ocr, previous_route, int(escalated)))
+    return examples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", default=settings.PREROUTING_MODEL_PATH)
+    parser.add_argument("--buckets", type=int, default=4096)
+    parser.add_argument("--epochs", type=int, default=10)
+    parser.add_argument("--holdout", type=float, default=0.2)
+    args = parser.parse_args()
+
+    examples = load_examples()
+    if len(examples) < 20:
+        raise SystemExit(f"Only {len(examples)} usable log rows; need at least 20 to train.")
+    random.Random(0).shuffle(examples)
+    split = int(len(examples) * (1 - args.holdout))
+
+    model = LogisticModel(args.buckets)
+    feats = [routing_features(model, messages, ocr, prev) for messages, ocr, prev, _ in examples]
+    labels = [y for *_, y in examples]
+    model.fit(feats[:split], labels[:split], epochs=args.epochs)
+    metrics = evaluate(model, feats[split:], labels[split:], settings.PREROUTING_THRESHOLD)
+    model.meta = {"trained_on": split, "holdout": metrics, "positive_rate": round(sum(labels) / len(labels), 4)}
+    model.save(args.output)
+    print(json.dumps({"output": args.output, **model.meta}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Train the "learned" search admission classifier from the logs table.
+
+Label (a proxy, since the logs don't record a counterfactual): a request
+where web search ran is positive when the local model then answered with
+confidence >= CONFIDENCE_THRESHOLD, negative when it still had to escalate
+or stayed below the threshold. Rows where search was skipped, or where
+cloud was forced, carry no signal and are ignored.
+
+Run from backend/:  python -m scripts.train_search_admission --output search_admission.json
+"""
+
+import argparse
+import json
+import random
+
+from app import log_query
+from app.classifier import LogisticModel, evaluate
+from app.db import SessionLocal
+from app.settings import settings
+
+
+def iter_logs():
+    """Yield (route, confidence, request JSON, response JSON) for every log row."""
+    fields = log_query.parse_fields("route,confidence,request,response")
+    cursor = None
+    with SessionLocal() as db:
+        while True:
+            rows, cursor = log_query.query_logs(db, limit=log_query.MAX_LIMIT, before_id=cursor, fields=fields)
+            for r in rows:
+                yield r["route"], r["confidence"], r.get("request"), r.get("response")
+            if cursor is None:
+                break
+
+
+def load_examples():
+    examples = []
+    for route, confidence, request, response in iter_logs():
+        try:
+            req = json.loads(request or "{}")
+            resp = json.loads(response or "{}")
+        except ValueError:
+            continue
+        usage = resp.get("usage") or {}
+        messages = req.get("messages") or []
+        if req.get("forced_cloud") or usage.get("web_search_skipped") or not messages:
+            continue
+        if messages[-1].get("role") != "user":
+            continue
+        helped = bool(usage.get("web_search_used")) and route == "local" \
+            and (confidence or 0.0) >= settings.CONFIDENCE_THRESHOLD
+        examples.append((messages[-1].get("content", ""), int(helped)))
+    return examples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", default=settings.SEARCH_ADMISSION_MODEL_PATH)
+    parser.add_argument("--buckets", type=int, default=4096)
+    parser.add_argument("--epochs", type=int, default=10)
+    parser.add_argument("--holdout", type=float, default=0.2)
+    args = parser.parse_args()
+
+    examples = load_examples()
+    if len(examples) < 20:
+        raise SystemExit(f"Only {len(examples)} usable log rows; need at least 20 to train.")
+    random.Random(0).shuffle(examples)
+    split = int(len(examples) * (1 - args.holdout))
+
+    model = LogisticModel(args.buckets)
+    feats = [model.features(q) for q, _ in examples]
+    labels = [y for _, y in examples]
+    model.fit(feats[:split], labels[:split], epochs=args.epochs)
+    metrics = evaluate(model, feats[split:], labels[split:], settings.SEARCH_ADMISSION_THRESHOLD)
+    model.meta = {"trained_on": split, "holdout": metrics, "positive_rate": round(sum(labels) / len(labels), 4)}
+    model.save(args.output)
+    print(json.dumps({"output": args.output, **model.meta}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
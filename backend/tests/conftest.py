@@ -0,0 +1,14 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db import Base
+
+
+@pytest.fixture
+def log_db(tmp_path):
+    """Fresh SQLite log database with the full schema: ``(engine, session_factory)``."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'logs.db'}")
+    Base.metadata.create_all(bind=engine)
+    yield engine, sessionmaker(bind=engine)
+    engine.dispose()
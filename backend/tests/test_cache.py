@@ -0,0 +1,80 @@
+import asyncio
+import time
+
+from app import cache as cache_module
+from app.cache import ResponseCache, key_for_messages
+from app.disk_cache import DiskCache
+
+
+def test_key_depends_on_model_hint():
+    """Test that the same messages under different model hints get different keys."""
+    messages = [{"role": "user", "content": "hi"}]
+    assert key_for_messages(messages, "a") != key_for_messages(messages, "b")
+
+
+def test_lru_evicts_least_recently_used():
+    """Test that the entry budget evicts the least recently read key."""
+    cache = ResponseCache(max_entries=2, max_bytes=10_000)
+    cache.set("a", {"v": 1})
+    cache.set("b", {"v": 2})
+    assert cache.get("a", 60) == {"v": 1}
+    cache.set("c", {"v": 3})
+    assert cache.get("b", 60) is None
+    assert cache.get("a", 60) == {"v": 1}
+    assert cache.stats()["evictions"] == 1
+
+
+def test_byte_budget_is_enforced():
+    """Test that total accounted bytes never exceed max_bytes."""
+    cache = ResponseCache(max_entries=1000, max_bytes=500)
+    for i in range(50):
+        cache.set(f"k{i}", {"answer": "x" * 50})
+    stats = cache.stats()
+    assert stats["bytes"] <= 500
+    assert stats["entries"] < 50
+
+
+def test_sweep_removes_expired_entries():
+    """Test that the background sweep drops entries older than the TTL."""
+    cache = ResponseCache(max_entries=10, max_bytes=10_000)
+    cache.set("old", {"v": 1})
+    time.sleep(0.01)
+    assert cache.sweep(ttl=0) == 1
+    assert cache.stats()["entries"] == 0
+
+
+def test_disk_cache_persists_and_enforces_ttl(tmp_path):
+    """Test that the disk tier is shared across instances and honors the TTL."""
+    path = str(tmp_path / "cache.db")
+    DiskCache(path, max_entries=10, max_bytes=10_000).set("k", {"answer": "hi"})
+
+    other_worker = DiskCache(path, max_entries=10, max_bytes=10_000)
+    assert other_worker.get("k", ttl=60) == {"answer": "hi"}
+    time.sleep(0.01)
+    assert other_worker.get("k", ttl=0) is None
+
+
+def test_disk_cache_trims_oldest_entries(tmp_path):
+    """Test that trimming keeps the disk tier within its entry limit."""
+    cache = DiskCache(str(tmp_path / "cache.db"), max_entries=3, max_bytes=10_000)
+    for i in range(5):
+        cache.set(f"k{i}", {"v": i})
+    cache.trim()
+    assert cache.stats()["entries"] == 3
+    assert cache.get("k0", ttl=60) is None
+    assert cache.get("k4", ttl=60) == {"v": 4}
+
+
+def test_disk_promotion_keeps_original_timestamp(tmp_path, monkeypatch):
+    """Test that an entry promoted from disk expires on the disk row's clock, not a fresh one."""
+    disk = DiskCache(str(tmp_path / "cache.db"), max_entries=10, max_bytes=10_000)
+    memory = ResponseCache(max_entries=10, max_bytes=10_000)
+    monkeypatch.setattr(cache_module, "_disk_cache", disk)
+    monkeypatch.setattr(cache_module, "_cache", memory)
+    disk.set("k", {"answer": "hi"})
+    written_at = disk.get_entry("k", ttl=60)[0]
+
+    assert asyncio.run(cache_module.cache_get("k", 60)) == {"answer": "hi"}
+    assert memory._items["k"][0] == written_at
+    time.sleep(0.01)
+    assert memory.get("k", ttl=0) is None
@@ -0,0 +1,113 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app import circuit_breaker
+from app.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError
+from app.clients import http, ollama_client
+from app.settings import settings
+
+
+def _fail(breaker, exc=None):
+    with pytest.raises(Exception):
+        with breaker.call():
+            raise exc or httpx.ConnectError("refused")
+
+
+def test_breaker_opens_fails_fast_and_recovers(monkeypatch):
+    """Test closed -> open on errors, fast rejection, then half-open probe -> closed."""
+    monkeypatch.setattr(settings, "BREAKER_MIN_REQUESTS", 4)
+    monkeypatch.setattr(settings, "BREAKER_OPEN_SECONDS", 10)
+    now = [1000.0]
+    monkeypatch.setattr(circuit_breaker.time, "monotonic", lambda: now[0])
+    breaker = CircuitBreaker("test_recover")
+
+    bad_request = httpx.HTTPStatusError("bad", request=httpx.Request("POST", "http://x"), response=httpx.Response(400))
+    for _ in range(4):
+        _fail(breaker, bad_request)  # client errors do not count
+    assert breaker.state == CLOSED
+
+    for _ in range(4):
+        _fail(breaker)
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.call()
+
+    now[0] += 11
+    probe = breaker.call()
+    assert breaker.state == HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.call()  # only one probe at a time
+    with probe:
+        pass
+    assert breaker.state == CLOSED
+    assert breaker.stats()["times_opened"] == 1
+    assert breaker.stats()["rejected"] == 2
+
+
+def test_breaker_trips_on_slow_calls(monkeypatch):
+    """Test that a window of slow successful calls opens the breaker."""
+    monkeypatch.setattr(settings, "BREAKER_MIN_REQUESTS", 3)
+    monkeypatch.setattr(settings, "BREAKER_SLOW_MS", {"test_slow": 100})
+    now = [0.0]
+    monkeypatch.setattr(circuit_breaker.time, "monotonic", lambda: now[0])
+    breaker = CircuitBreaker("test_slow")
+
+    for _ in range(3):
+        with breaker.call():
+            now[0] += 0.5
+    assert breaker.state == OPEN
+
+
+def test_open_ollama_breaker_skips_upstream(monkeypatch):
+    """Test that an open Ollama breaker fails a chat call without touching the network."""
+    calls = []
+
+    def handler(request: httpx.Request):
+        calls.append(request)
+        return httpx.Response(500)
+
+    monkeypatch.setattr(settings, "BREAKER_MIN_REQUESTS", 2)
+    breaker = circuit_breaker.ollama_breaker
+    monkeypatch.setattr(breaker, "state", CLOSED)
+    http.set_transport("ollama", httpx.MockTransport(handler))
+    try:
+        for _ in range(2):
+            with pytest.raises(httpx.HTTPStatusError):
+                asyncio.run(ollama_client.chat([{"role": "user", "content": "hi"}]))
+        with pytest.raises(CircuitOpenError):
+            asyncio.run(ollama_client.chat([{"role": "user", "content": "hi"}]))
+    finally:
+        http.set_transport("ollama", None)
+        breaker._close()
+    assert len(calls) == 2
+
+
+def test_open_claude_breaker_skips_web_search(monkeypatch):
+    """Test that call_cloud fails fast before web search, and an expired breaker stops reporting open."""
+    from app import router_service
+
+    searched = []
+
+    async def fake_cloud_messages(messages, ctx):
+        searched.append(messages)
+        return messages, False
+
+    monkeypatch.setattr(router_service, "_cloud_messages", fake_cloud_messages)
+    monkeypatch.setattr(settings, "BREAKER_OPEN_SECONDS", 10)
+    now = [1000.0]
+    monkeypatch.setattr(circuit_breaker.time, "monotonic", lambda: now[0])
+    breaker = circuit_breaker.claude_breaker
+    breaker._open(now[0])
+    try:
+        assert breaker.is_open()
+        with pytest.raises(CircuitOpenError):
+            asyncio.run(router_service.call_cloud([{"role": "user", "content": "hi"}]))
+        assert searched == []
+
+        now[0] += 11
+        assert not breaker.is_open()
+        assert breaker.state == HALF_OPEN
+    finally:
+        breaker._close()
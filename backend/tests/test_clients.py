@@ -0,0 +1,49 @@
+import asyncio
+
+import httpx
+
+from app.clients import http, ollama_client
+
+
+def _run(coro):
+    return asyncio.run(coro)
+
+
+def test_ollama_chat_uses_pooled_client():
+    """Test that Ollama responses are normalized through the shared client."""
+    def handler(request: httpx.Request):
+        assert request.url.path == "/api/chat"
+        return httpx.Response(200, json={
+            "message": {"content": "hi"},
+            "prompt_eval_count": 3,
+            "eval_count": 2,
+            "prompt_eval_duration": 40_000_000,
+            "eval_duration": 250_000_000,
+        })
+
+    http.set_transport("ollama", httpx.MockTransport(handler))
+    try:
+        res = _run(ollama_client.chat([{"role": "user", "content": "hello"}]))
+    finally:
+        http.set_transport("ollama", None)
+
+    assert res["choices"][0]["message"]["content"] == "hi"
+    assert res["usage"]["total_tokens"] == 5
+    assert res["timings_ms"] == {"prompt_eval": 40, "eval": 250}
+    assert http.pool_stats()["ollama"]["requests"] >= 1
+
+
+def test_ollama_chat_falls_back_to_generate():
+    """Test that a 404 from /api/chat falls back to /api/generate."""
+    def handler(request: httpx.Request):
+        if request.url.path == "/api/chat":
+            return httpx.Response(404)
+        return httpx.Response(200, json={"response": "old server", "eval_count": 1})
+
+    http.set_transport("ollama", httpx.MockTransport(handler))
+    try:
+        res = _run(ollama_client.chat([{"role": "user", "content": "hello"}]))
+    finally:
+        http.set_transport("ollama", None)
+
+    assert res["choices"][0]["message"]["content"] == "old server"
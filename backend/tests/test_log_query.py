@@ -0,0 +1,63 @@
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import create_engine, insert, inspect, text
+
+from app.db import ensure_schema
+from app.log_query import parse_fields, query_logs
+from app.models import LogEntry
+
+
+def _session(log_db, n=25):
+    engine, factory = log_db
+    rows = [dict(route="local" if i % 2 else "cloud", model="llama" if i % 2 else "claude",
+                 prompt_hash=f"h{i}", confidence=i / 25, latency_ms=i, estimated_cost_usd=0.0,
+                 estimated_cost_saved_usd=0.0, request="{}", response="{}")
+            for i in range(n)]
+    with engine.begin() as conn:
+        conn.execute(insert(LogEntry), rows)
+    return factory()
+
+
+def test_keyset_pages_cover_all_rows_once(log_db):
+    """Test that following the cursor walks every row exactly once, newest first."""
+    db = _session(log_db)
+    seen, cursor = [], None
+    while True:
+        rows, cursor = query_logs(db, limit=10, before_id=cursor)
+        seen += [r["id"] for r in rows]
+        if cursor is None:
+            break
+    assert seen == list(range(25, 0, -1))
+
+
+def test_filters_and_projection(log_db):
+    """Test route/confidence/time filters and that bodies are opt-in."""
+    db = _session(log_db)
+    rows, _ = query_logs(db, route="local", min_confidence=0.5)
+    assert {r["route"] for r in rows} == {"local"}
+    assert all(r["confidence"] >= 0.5 for r in rows)
+    assert "request" not in rows[0]
+
+    rows, _ = query_logs(db, limit=1, fields=parse_fields("response,route"))
+    assert set(rows[0]) == {"id", "response", "route"}
+
+    future = datetime(2999, 1, 1, tzinfo=timezone.utc)
+    assert query_logs(db, since=future)[0] == []
+    assert len(query_logs(db, until=future)[0]) == 25
+
+    with pytest.raises(ValueError):
+        parse_fields("id,password")
+
+
+def test_ensure_schema_migrates_old_table(tmp_path):
+    """Test that a logs table from before the model column gains it and its index."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE logs (id INTEGER PRIMARY KEY, route VARCHAR, prompt_hash VARCHAR, "
+                          "confidence FLOAT, latency_ms INTEGER, estimated_cost_usd FLOAT, "
+                          "estimated_cost_saved_usd FLOAT, request TEXT, response TEXT, created_at DATETIME)"))
+    ensure_schema(engine)
+    inspector = inspect(engine)
+    assert "model" in {c["name"] for c in inspector.get_columns("logs")}
+    assert {"ix_logs_model", "ix_logs_route", "ix_logs_created_at"} <= {i["name"] for i in inspector.get_indexes("logs")}
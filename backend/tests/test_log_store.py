@@ -0,0 +1,59 @@
+import json
+
+from sqlalchemy import insert, text
+
+from app import log_store
+from app.models import LogEntry
+
+
+def _conversation(turns):
+    messages = []
+    rows = []
+    for i in range(turns):
+        messages.append({"role": "user", "content": f"question {i} " + "context " * 200})
+        answer = {"role": "assistant", "content": f"answer {i} " + "detail " * 100}
+        rows.append(dict(route="local", prompt_hash=f"h{i}",
+                         request={"conversation_id": "c", "messages": list(messages)},
+                         response={"id": f"r{i}", "choices": [{"index": 0, "message": answer}]}))
+        messages.append(answer)
+    return rows
+
+
+def test_pack_unpack_roundtrip_and_dedup(log_db):
+    """Test that payloads read back unchanged while history is stored once."""
+    _, factory = log_db
+    rows = _conversation(30)
+    db = factory()
+    messages = {}
+    packed = [log_store.pack(r, messages) for r in rows]
+    log_store.write_messages(db, messages)
+    db.execute(insert(LogEntry), packed)
+    db.commit()
+
+    stored = [dict(r._mapping) for r in db.execute(
+        text("SELECT request_blob, response_blob FROM logs ORDER BY id"))]
+    out = log_store.unpack(db, stored)
+    for original, got in zip(rows, out):
+        assert json.loads(got["request"]) == original["request"]
+        assert json.loads(got["response"]) == original["response"]
+
+    # 60 distinct messages, each stored once
+    assert db.execute(text("SELECT COUNT(*) FROM log_messages")).scalar() == 60
+    raw = sum(len(json.dumps(r["request"])) + len(json.dumps(r["response"])) for r in rows)
+    stored_bytes = db.execute(text(
+        "SELECT (SELECT SUM(LENGTH(request_blob) + LENGTH(response_blob)) FROM logs) + "
+        "(SELECT SUM(LENGTH(body)) FROM log_messages)")).scalar()
+    assert stored_bytes * 10 < raw
+
+
+def test_unpack_reads_legacy_text_rows():
+    """Test that rows written before compression are returned as-is."""
+    rows = [{"id": 1, "request": '{"messages": []}', "request_blob": None}]
+    assert log_store.unpack(None, rows) == [{"id": 1, "request": '{"messages": []}'}]
+
+
+def test_codec_tags():
+    """Test that each codec round-trips and is tagged."""
+    data = b"hello " * 100
+    assert log_store.decompress(log_store.compress(data)) == data
+    assert log_store.decompress(b"\x00" + data) == data
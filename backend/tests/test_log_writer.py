@@ -0,0 +1,67 @@
+import asyncio
+
+import pytest
+
+from sqlalchemy import text
+
+from app.log_writer import LogWriter
+
+
+def _row(i):
+    return dict(route="local", prompt_hash=f"h{i}", confidence=0.9, latency_ms=i,
+                estimated_cost_usd=0.0, estimated_cost_saved_usd=0.0, request={}, response={})
+
+
+def test_rows_are_batched_and_flushed_on_close(log_db):
+    """Test that queued rows are written in batches and flushed at shutdown."""
+    engine, factory = log_db
+    writer = LogWriter(session_factory=factory)
+
+    async def main():
+        writer.start()
+        for i in range(50):
+            await writer.submit(_row(i))
+        await writer.close()
+
+    asyncio.run(main())
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT COUNT(*) FROM logs")).scalar() == 50
+    assert writer.stats()["written"] == 50
+    assert writer.stats()["batches"] < 50
+
+
+def test_full_queue_drops_rows(log_db):
+    """Test the drop backpressure policy when the queue is full."""
+    _, factory = log_db
+    writer = LogWriter(session_factory=factory, max_queue=2)
+
+    async def main():
+        writer.start()
+        for i in range(5):
+            await writer.submit(_row(i))
+        dropped = writer.stats()["dropped"]
+        await writer.close()
+        return dropped
+
+    assert asyncio.run(main()) == 3
+
+
+def test_failed_batch_does_not_hide_message_bodies(log_db, monkeypatch):
+    """Test that messages from a rolled-back batch are written by the next batch."""
+    engine, factory = log_db
+    writer = LogWriter(session_factory=factory)
+    row = dict(_row(0), request={"messages": [{"role": "user", "content": "hi"}]},
+               response={"choices": [{"message": {"role": "assistant", "content": "hello"}}]})
+
+    def fail(db, rows):
+        raise RuntimeError("disk full")
+
+    monkeypatch.setattr("app.log_writer.rollups.record", fail)
+    with pytest.raises(RuntimeError):
+        writer._write_batch([dict(row)])
+    monkeypatch.undo()
+    writer._write_batch([dict(row)])
+
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT COUNT(*) FROM logs")).scalar() == 1
+        assert conn.execute(text("SELECT COUNT(*) FROM log_messages")).scalar() == 2
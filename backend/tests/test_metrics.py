@@ -0,0 +1,44 @@
+import pytest
+
+from app.metrics import Counter, Gauge, Histogram, Registry
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    reg = Registry()
+    monkeypatch.setattr("app.metrics.registry", reg)
+    return reg
+
+
+def test_prometheus_text_format(registry):
+    """Test counter, gauge and cumulative histogram exposition."""
+    c = Counter("t_requests", "Requests", ["route"])
+    g = Gauge("t_in_flight", "In flight", ["backend"])
+    h = Histogram("t_seconds", "Latency", ["stage"], buckets=(0.1, 1))
+    c.labels("local").inc()
+    c.labels("local").inc(2)
+    with g.labels("ollama").track():
+        in_progress = g.labels("ollama").value
+    for v in (0.05, 0.5, 5):
+        h.labels("ollama").observe(v)
+
+    text = registry.render()
+    assert in_progress == 1
+    assert "# TYPE t_requests counter" in text
+    assert 't_requests_total{route="local"} 3.0' in text
+    assert 't_in_flight{backend="ollama"} 0.0' in text
+    assert 't_seconds_bucket{stage="ollama",le="0.1"} 1' in text
+    assert 't_seconds_bucket{stage="ollama",le="1"} 2' in text
+    assert 't_seconds_bucket{stage="ollama",le="+Inf"} 3' in text
+    assert 't_seconds_count{stage="ollama"} 3' in text
+
+
+def test_labels_are_validated_and_escaped(registry):
+    """Test label arity checks and value escaping."""
+    c = Counter("t_errors", "Errors", ["reason"])
+    with pytest.raises(ValueError):
+        c.labels("a", "b")
+    c.labels('say "hi"\n').inc()
+    assert 't_errors_total{reason="say \\"hi\\"\\n"} 1.0' in registry.render()
+    with pytest.raises(ValueError):
+        Counter("t_errors", "Duplicate")
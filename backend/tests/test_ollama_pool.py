@@ -0,0 +1,66 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.clients import http
+from app.clients.ollama_pool import NoBackendAvailable, OllamaPool
+from app.settings import settings
+
+
+def _run(coro):
+    return asyncio.run(coro)
+
+
+def _tags_handler(inventory, down=()):
+    def handler(request: httpx.Request):
+        host = f"http://{request.url.host}"
+        if host in down:
+            raise httpx.ConnectError("down", request=request)
+        return httpx.Response(200, json={"models": [{"name": m} for m in inventory[host]]})
+    return handler
+
+
+def test_pick_routes_by_model_and_outstanding():
+    """Test that requests go to the least-loaded host that has the model."""
+    pool = OllamaPool(["http://a", "http://b", "http://c"])
+    inventory = {"http://a": ["llama3.2:latest"], "http://b": ["llama3.2:latest", "qwen2.5:7b"], "http://c": ["qwen2.5:7b"]}
+    http.set_transport("ollama", httpx.MockTransport(_tags_handler(inventory)))
+    try:
+        _run(pool.probe_all())
+    finally:
+        http.set_transport("ollama", None)
+
+    a, b, c = pool.backends
+    b._outstanding.set(2)
+    assert pool.pick("llama3.2") is a
+    c._outstanding.set(5)
+    assert pool.pick("qwen2.5:7b") is b
+    with pytest.raises(NoBackendAvailable):
+        pool.pick("mistral")
+
+
+def test_failures_eject_and_probe_readmits(monkeypatch):
+    """Test that repeated failures eject a host and a good probe re-admits it."""
+    monkeypatch.setattr(settings, "OLLAMA_EJECT_AFTER_FAILURES", 2)
+    pool = OllamaPool(["http://a", "http://b"])
+    a, b = pool.backends
+
+    async def failing_call():
+        async with pool.acquire("llama3.2") as base:
+            raise httpx.ConnectError("refused", request=httpx.Request("POST", f"{base}/api/chat"))
+
+    for _ in range(4):
+        with pytest.raises(httpx.ConnectError):
+            _run(failing_call())
+    assert not a.healthy and not b.healthy
+    assert a.outstanding == 0
+
+    inventory = {"http://a": ["llama3.2:latest"], "http://b": ["llama3.2:latest"]}
+    http.set_transport("ollama", httpx.MockTransport(_tags_handler(inventory, down={"http://b"})))
+    try:
+        _run(pool.probe_all())
+    finally:
+        http.set_transport("ollama", None)
+    assert a.healthy and not b.healthy
+    assert all(pool.pick("llama3.2") is a for _ in range(10))
@@ -0,0 +1,50 @@
+from app.classifier import LogisticModel
+from app.prerouting import PreRouter, routing_features
+
+REVIEW = [{"role": "user", "content": "review this long diff for subtle concurrency bugs"}]
+CHAT = [{"role": "user", "content": "say hello to my friend"}]
+
+
+def _train(tmp_path):
+    model = LogisticModel(n_buckets=256)
+    samples = [(REVIEW, False, None), (CHAT, False, None)] * 20
+    labels = [1, 0] * 20
+    model.fit([routing_features(model, *s) for s in samples], labels, epochs=20)
+    path = tmp_path / "prerouting.json"
+    model.save(str(path))
+    return path
+
+
+def test_shadow_mode_scores_predictions_without_routing(monkeypatch, tmp_path):
+    """Test that shadow mode never enforces and tracks accuracy against real outcomes."""
+    monkeypatch.setattr("app.prerouting.settings.PREROUTING_MODE", "shadow")
+    monkeypatch.setattr("app.prerouting.settings.PREROUTING_MODEL_PATH", str(_train(tmp_path)))
+    router = PreRouter()
+    router.load()
+
+    review = router.decide(REVIEW, False, None)
+    chat = router.decide(CHAT, False, None)
+    assert review["predicted"] and not review["enforced"]
+    assert not chat["predicted"]
+
+    router.record_outcome(review, True, 4000)
+    router.record_outcome(chat, False, 800)
+    router.record_outcome(chat, True, 900)
+    stats = router.stats()
+    assert stats["scored"] == 3 and stats["precision"] == 1.0 and stats["recall"] == 0.5
+    assert stats["local_ms_skippable"] == 4000
+
+
+def test_enforce_mode_respects_cloud_policy(monkeypatch, tmp_path):
+    """Test that enforce mode skips local only when cloud is allowed and configured."""
+    monkeypatch.setattr("app.prerouting.settings.PREROUTING_MODE", "enforce")
+    monkeypatch.setattr("app.prerouting.settings.PREROUTING_MODEL_PATH", str(_train(tmp_path)))
+    monkeypatch.setattr("app.prerouting.settings.ANTHROPIC_API_KEY", "test-key")
+    router = PreRouter()
+    router.load()
+
+    assert router.decide(REVIEW, False, None)["enforced"]
+    private = [{"role": "user", "content": REVIEW[0]["content"] + " #no_cloud"}]
+    assert not router.decide(private, False, None)["enforced"]
+    assert not router.decide(CHAT, False, None)["enforced"]
+    assert router.stats()["enforced"] == 1
@@ -0,0 +1,74 @@
+import asyncio
+import time
+
+from app.profiler import SamplingProfiler
+from app.settings import settings
+
+
+def _busy():
+    end = time.time() + 0.05
+    while time.time() < end:
+        pass
+
+
+def test_forced_profile_dumps_folded_stacks(tmp_path, monkeypatch):
+    """Test that a forced profile records thread and task stacks in folded format."""
+    monkeypatch.setattr(settings, "PROFILE_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "PROFILE_INTERVAL_MS", 2)
+    profiler = SamplingProfiler()
+
+    async def waiting_on_upstream():
+        await asyncio.sleep(0.05)
+
+    async def main():
+        profile = profiler.start(forced=True)
+        await asyncio.gather(asyncio.to_thread(_busy), waiting_on_upstream())
+        return profiler.stop(profile, "abc")
+
+    path = asyncio.run(main())
+    lines = open(path).read().splitlines()
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+    assert any("_busy" in line for line in lines)
+    assert any(line.startswith("task:") and "waiting_on_upstream" in line for line in lines)
+
+
+def test_fast_sampled_request_is_not_dumped(tmp_path, monkeypatch):
+    """Test that rate-sampled requests under PROFILE_SLOW_MS leave no file."""
+    monkeypatch.setattr(settings, "PROFILE_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "PROFILE_SLOW_MS", 60000)
+    profiler = SamplingProfiler()
+
+    async def main():
+        profile = profiler.start()
+        await asyncio.sleep(0.02)
+        return profiler.stop(profile, "abc")
+
+    assert asyncio.run(main()) is None
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_header_profiles_are_opt_in_rate_limited_and_capped(tmp_path, monkeypatch):
+    """Test that X-Profile is off by default, limited per minute, and dumps stop at PROFILE_MAX_FILES."""
+    monkeypatch.setattr(settings, "PROFILE_DIR", str(tmp_path))
+    profiler = SamplingProfiler()
+    assert not profiler.allow_forced(True)
+
+    monkeypatch.setattr(settings, "PROFILE_ALLOW_HEADER", True)
+    monkeypatch.setattr(settings, "PROFILE_HEADER_PER_MINUTE", 2)
+    assert [profiler.allow_forced(True) for _ in range(3)] == [True, True, False]
+    assert not profiler.allow_forced(False)
+
+    monkeypatch.setattr(settings, "PROFILE_MAX_FILES", 1)
+
+    async def main():
+        paths = []
+        for request_id in ("a", "b"):
+            profile = profiler.start(forced=True)
+            await asyncio.to_thread(_busy)
+            paths.append(profiler.stop(profile, request_id))
+        return paths
+
+    first, second = asyncio.run(main())
+    assert first is not None and second is None
+    assert len(list(tmp_path.iterdir())) == 1
+    assert profiler.stats()["dumps_skipped"] == 1
@@ -0,0 +1,91 @@
+import asyncio
+
+import httpx
+
+from app.clients import http, ollama_client
+from app.clients.ollama_pool import OllamaPool
+from app.residency import COLD_LOADS, ModelResidency, keep_alive_for
+from app.settings import settings
+
+
+def _run(coro):
+    return asyncio.run(coro)
+
+
+def test_keep_alive_is_sent_with_per_model_overrides(monkeypatch):
+    """Test that local payloads carry keep_alive, with numeric overrides as seconds."""
+    monkeypatch.setattr(settings, "OLLAMA_KEEP_ALIVE", "30m")
+    monkeypatch.setattr(settings, "OLLAMA_KEEP_ALIVE_OVERRIDES", {"llama3.2": "-1"})
+
+    assert ollama_client._build_chat_payload([], "llama3.1:8b", 0.2, None)["keep_alive"] == "30m"
+    assert keep_alive_for("llama3.2:latest") == -1
+    monkeypatch.setattr(settings, "OLLAMA_KEEP_ALIVE", "")
+    assert "keep_alive" not in ollama_client._build_chat_payload([], "llama3.1:8b", 0.2, None)
+
+
+def test_warm_up_refresh_and_warm_alternate(monkeypatch):
+    """Test that warm-up loads configured models and a cold model yields to a warm alternate."""
+    monkeypatch.setattr(settings, "LOCAL_MODELS", ["big:70b", "small:8b"])
+    monkeypatch.setattr(settings, "LOCAL_MODEL_ALTERNATES", {"big:70b": ["small:8b"]})
+    loaded = []
+
+    def handler(request: httpx.Request):
+        if request.url.path == "/api/tags":
+            return httpx.Response(200, json={"models": [{"name": "big:70b"}, {"name": "small:8b"}]})
+        if request.url.path == "/api/generate":
+            loaded.append(request.read())
+            return httpx.Response(200, json={"done": True, "load_duration": 3_000_000_000})
+        return httpx.Response(200, json={"models": [{"name": "small:8b"}]})  # /api/ps
+
+    residency = ModelResidency(OllamaPool(["http://a"]))
+    cold_before = COLD_LOADS.labels("big:70b").value
+    http.set_transport("ollama", httpx.MockTransport(handler))
+    try:
+        _run(residency.warm_up())
+        assert len(loaded) == 2
+        assert residency.pick("big:70b") == "big:70b"  # warm after preload
+        assert COLD_LOADS.labels("big:70b").value == cold_before + 1
+
+        _run(residency.refresh())  # Ollama has since evicted big:70b
+    finally:
+        http.set_transport("ollama", None)
+
+    assert not residency.is_warm("big:70b")
+    assert residency.pick("big:70b") == "small:8b"
+    assert residency.pick("small:8b") == "small:8b"
+    assert residency.stats()["substitutions"] == 0  # picking alone does not count
+
+
+def test_alternates_match_normalized_names(monkeypatch):
+    """Test that an alternates entry for "llama3" also applies to "llama3:latest"."""
+    monkeypatch.setattr(settings, "LOCAL_MODEL_ALTERNATES", {"llama3": ["small:8b"]})
+    residency = ModelResidency(OllamaPool(["http://a"]))
+    residency.observe("http://a", "small:8b", 0)
+    assert residency.pick("llama3:latest") == "small:8b"
+    assert residency.pick("llama3") == "small:8b"
+
+
+def test_substituted_answer_is_cached_under_the_serving_model(monkeypatch):
+    """Test that the cache key follows the warm alternate and a cache hit records no substitution."""
+    from app import main
+    from app.cache import key_for_messages
+    from app.router_service import RoutingContext
+    from app.schemas import ChatRequest
+
+    monkeypatch.setattr(settings, "LOCAL_MODELS", ["big:70b", "small:8b"])
+    monkeypatch.setattr(main.residency, "pick", lambda model: "small:8b")
+    substitutions = main.residency.substitutions
+    looked_up = []
+
+    async def fake_cache_get(key, ttl):
+        looked_up.append(key)
+        return {"choices": []}
+
+    monkeypatch.setattr(main, "cache_get", fake_cache_get)
+    req = ChatRequest(model="big:70b", messages=[{"role": "user", "content": "hi"}])
+    _run(main._chat(req, RoutingContext()))
+
+    messages = [{"role": "user", "content": "hi"}]
+    assert looked_up == [key_for_messages(messages, "small:8b")]
+    assert looked_up[0] != key_for_messages(messages, "big:70b")
+    assert main.residency.substitutions == substitutions  # a cache hit calls no local model
@@ -0,0 +1,55 @@
+import gzip
+import json
+
+from sqlalchemy import insert, text
+
+from app.models import LogEntry
+from app.retention import LogRetention
+from app.settings import settings
+
+
+def _setup(log_db, n):
+    engine, factory = log_db
+    rows = [dict(route="local", prompt_hash=f"h{i}", confidence=0.9, latency_ms=i,
+                 estimated_cost_usd=0.0, estimated_cost_saved_usd=0.0, request="{}", response="{}")
+            for i in range(n)]
+    with engine.begin() as conn:
+        conn.execute(insert(LogEntry), rows)
+    return engine, factory
+
+
+def test_row_limit_keeps_newest_rows(log_db, monkeypatch):
+    """Test that pruning keeps exactly the newest MAX_LOG_ROWS rows, in batches."""
+    monkeypatch.setattr(settings, "MAX_LOG_ROWS", 10)
+    monkeypatch.setattr(settings, "LOG_MAX_AGE_DAYS", 0)
+    monkeypatch.setattr(settings, "LOG_RETENTION_BATCH_SIZE", 7)
+    monkeypatch.setattr(settings, "LOG_ARCHIVE_DIR", "")
+    engine, factory = _setup(log_db, 35)
+    retention = LogRetention(session_factory=factory)
+
+    assert retention.run_once() == 25
+    assert retention.run_once() == 0
+    with engine.connect() as conn:
+        ids = [r[0] for r in conn.execute(text("SELECT id FROM logs ORDER BY id"))]
+    assert ids == list(range(26, 36))
+
+
+def test_age_limit_and_archive(tmp_path, log_db, monkeypatch):
+    """Test that rows older than LOG_MAX_AGE_DAYS are archived to gzip JSONL and deleted."""
+    archive = tmp_path / "archive"
+    monkeypatch.setattr(settings, "MAX_LOG_ROWS", 1000)
+    monkeypatch.setattr(settings, "LOG_MAX_AGE_DAYS", 7)
+    monkeypatch.setattr(settings, "LOG_ARCHIVE_DIR", str(archive))
+    engine, factory = _setup(log_db, 5)
+    with engine.begin() as conn:
+        conn.execute(text("UPDATE logs SET created_at = '2000-01-01 00:00:00' WHERE id <= 3"))
+    retention = LogRetention(session_factory=factory)
+
+    assert retention.run_once() == 3
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT COUNT(*) FROM logs")).scalar() == 2
+    [path] = archive.iterdir()
+    with gzip.open(path, "rt") as f:
+        archived = [json.loads(line) for line in f]
+    assert [r["id"] for r in archived] == [1, 2, 3]
+    assert retention.stats()["archived"] == 3
@@ -0,0 +1,54 @@
+import random
+
+import pytest
+
+from app import rollups
+from app.sketch import LatencySketch
+
+
+def test_sketch_quantiles_within_relative_error():
+    """Test that merged sketches report quantiles within the configured accuracy."""
+    rng = random.Random(0)
+    values = [rng.lognormvariate(6, 1) for _ in range(5000)]
+    a, b = LatencySketch(), LatencySketch()
+    for i, v in enumerate(values):
+        (a if i % 2 else b).add(v)
+    merged = LatencySketch.from_json(a.to_json()).merge(b)
+    values.sort()
+    for q in (0.5, 0.95, 0.99):
+        exact = values[int(q * (len(values) - 1))]
+        assert abs(merged.quantile(q) - exact) / exact <= 0.021
+
+
+def test_record_and_summarize(log_db):
+    """Test that batches fold into buckets and the summary reads them back."""
+    _, factory = log_db
+    db = factory()
+    now = 1_700_000_000
+    rows = [{"route": "local", "latency_ms": 100, "estimated_cost_usd": 0.0, "estimated_cost_saved_usd": 0.01}] * 3
+    rollups.record(db, rows, now=now)
+    rollups.record(db, [{"route": "cloud", "latency_ms": 1000, "estimated_cost_usd": 0.02,
+                         "estimated_cost_saved_usd": 0.0}], now=now + 30)
+    # Outside a 15 minute window
+    rollups.record(db, rows, now=now - 3600)
+    db.commit()
+
+    s = rollups.summarize(db, rollups.parse_window("15m"), now=now + 60)
+    assert s["granularity_seconds"] == 60
+    assert s["requests"] == 4
+    assert s["routes"]["local"]["requests"] == 3
+    assert s["routes"]["local"]["share"] == 0.75
+    assert s["cost_usd"] == 0.02
+    assert s["saved_usd"] == 0.03
+    assert abs(s["routes"]["cloud"]["latency_ms"]["p50"] - 1000) <= 20
+
+    day = rollups.summarize(db, rollups.parse_window("1d"), now=now + 60)
+    assert day["granularity_seconds"] == 3600
+    assert day["requests"] == 7
+
+
+def test_parse_window_rejects_garbage():
+    """Test window parsing."""
+    assert rollups.parse_window("7d") == 7 * 86400
+    with pytest.raises(ValueError):
+        rollups.parse_window("soon")
@@ -1,4 +1,16 @@
-from app.router_service import parse_json_block
+import asyncio
+import json
+import time
+
+import httpx
+import pytest
+from fastapi import HTTPException
+
+from app.clients import http
+from app.router_service import (
+    parse_json_block, AnswerStreamParser, RoutingContext, early_aborts, leading_confidence, try_local,
+)
+from app.spillover import spillover
 
 
 def test_parse_json():
@@ -24,3 +36,155 @@ def test_parse_json_missing_fields():
     assert p["answer"] == "test"
     assert p["confidence"] == 0.0
 
+
+
+def test_stream_parser_forwards_only_answer():
+    """Test incremental extraction of the answer from a chunked JSON envelope."""
+    envelope = json.dumps({"answer": "Line 1\nSays \"hi\" \u00e9", "confidence": 0.8})
+    parser = AnswerStreamParser()
+    out = "".join(parser.feed(envelope[i:i + 3]) for i in range(0, len(envelope), 3))
+    assert out == json.loads(envelope)["answer"]
+    assert parser.answer_complete
+    assert parse_json_block(parser.text)["confidence"] == 0.8
+
+
+def test_stream_parser_passes_through_plain_text():
+    """Test that output without a JSON envelope is streamed unchanged."""
+    parser = AnswerStreamParser()
+    assert parser.feed("Hello ") + parser.feed("world") == "Hello world"
+
+
+def test_escalation_reuses_search_from_local_attempt(monkeypatch):
+    """Test that call_cloud reuses the local attempt's search via the routing context."""
+    from app import router_service
+
+    searches = []
+
+    async def fake_search(query, max_results):
+        searches.append(query)
+        return "1. Result"
+
+    async def fake_local(**kwargs):
+        return {"choices": [{"message": {"content": '{"answer": "maybe", "confidence": 0.2}'}}], "usage": {}}
+
+    async def fake_cloud(**kwargs):
+        assert "1. Result" in kwargs["messages"][-2]["content"]
+        return {"choices": [{"message": {"content": "sure"}}], "usage": {}}
+
+    monkeypatch.setattr(router_service.settings, "ENABLE_WEB_SEARCH", True)
+    monkeypatch.setattr(router_service, "perform_search_and_format", fake_search)
+    monkeypatch.setattr(router_service.ollama_client, "chat", fake_local)
+    monkeypatch.setattr(router_service.claude_client, "chat", fake_cloud)
+
+    async def escalate():
+        ctx = router_service.RoutingContext()
+        messages = [{"role": "user", "content": "latest news"}]
+        await router_service.try_local(messages, ctx=ctx)
+        return await router_service.call_cloud(messages, ctx=ctx)
+
+    answer, _, usage = asyncio.run(escalate())
+    assert answer == "sure"
+    assert searches == ["latest news"]
+    assert usage["reused_stages"] == ["web_search"]
+
+
+def test_spans_and_server_timing():
+    """Test that spans and upstream-reported timings appear in the Server-Timing value."""
+    ctx = RoutingContext()
+    with ctx.span("ocr"):
+        time.sleep(0.01)
+    ctx.add_upstream_timings("ollama", {"prompt_eval": 40, "eval": 250})
+    header = ctx.server_timing()
+    assert ctx.timings["ocr"] >= 10
+    assert "ollama_prompt_eval;dur=40" in header
+    assert "ollama_eval;dur=250" in header
+    assert header.split(", ")[-1].startswith("total;dur=")
+
+
+def test_leading_confidence_waits_for_a_complete_number():
+    """Test incremental reading of a confidence written before the answer."""
+    assert leading_confidence('{"confidence": 0.') == (False, None)
+    assert leading_confidence('{"confidence": 0.35,') == (True, 0.35)
+    assert leading_confidence('{"answer": "x", "confidence": 0.2}') == (True, None)
+
+
+def test_confidence_first_stops_low_confidence_generation(monkeypatch):
+    """Test that a low leading confidence closes the Ollama stream and reports the savings."""
+    monkeypatch.setattr("app.router_service.settings.CONFIDENCE_FIRST", True)
+    monkeypatch.setattr("app.router_service.settings.ENABLE_WEB_SEARCH", False)
+    monkeypatch.setattr("app.router_service.settings.ANTHROPIC_API_KEY", "test-key")
+    spillover.latency.observe("abort-test", {"completion_tokens": 300}, {"eval": 6000})  # 50 tok/s
+    tokens = ['{"', 'confidence', '":', ' 0', '.2', ',', ' "answer": "', "Long"] + [" answer"] * 500
+    sent = []
+
+    async def body():
+        for t in tokens:
+            sent.append(t)
+            yield (json.dumps({"message": {"content": t}, "done": False}) + "\n").encode()
+
+    http.set_transport("ollama", httpx.MockTransport(lambda request: httpx.Response(200, content=body())))
+    before = early_aborts.aborts
+    ctx = RoutingContext()
+    try:
+        parsed, _, usage = asyncio.run(try_local([{"role": "user", "content": "hard"}], model="abort-test", ctx=ctx))
+    finally:
+        http.set_transport("ollama", None)
+
+    assert parsed == {"answer": "", "confidence": 0.2}
+    assert len(sent) < 20
+    assert early_aborts.aborts == before + 1
+    assert ctx.early_abort == {"confidence": 0.2, "tokens_generated": 6, "tokens_saved": 294, "latency_avoided_ms": 5880}
+    assert usage["completion_tokens"] == 6
+
+
+def test_failed_escalation_books_no_early_abort_savings(monkeypatch):
+    """Test that an abort whose escalation fails and is regenerated locally saves nothing."""
+    from app import main
+
+    monkeypatch.setattr("app.main.settings.ANTHROPIC_API_KEY", "test-key")
+    spillover.latency.observe("abort-fallback", {"completion_tokens": 300}, {"eval": 6000})
+    messages = [{"role": "user", "content": "hard question"}]
+    before = early_aborts.stats()
+
+    async def fake_local(messages, temperature=None, model=None, ctx=None, early_abort=True):
+        if early_abort:
+            ctx.early_abort = early_aborts.record(model, 0.2, 6)
+            return {"answer": "", "confidence": 0.2}, 10, {"completion_tokens": 6}
+        return {"answer": "full local answer", "confidence": 0.2}, 100, {"completion_tokens": 300}
+
+    async def failing_cloud(messages, temperature=None, ctx=None):
+        raise httpx.ConnectError("refused")
+
+    monkeypatch.setattr(main, "try_local", fake_local)
+    monkeypatch.setattr(main, "call_cloud", failing_cloud)
+    ctx = RoutingContext()
+    resp = asyncio.run(main._route(messages, "abort-key", "conv", "", "abort-fallback", False, 0.2, ctx))
+
+    assert resp["route"] == "local" and resp["choices"][0]["message"]["content"] == "full local answer"
+    assert early_aborts.aborts == before["aborts"] + 1
+    assert early_aborts.tokens_saved == before["tokens_saved"]
+    assert ctx.early_abort["tokens_saved"] == 0
+
+
+def test_failed_regeneration_after_early_abort_returns_503(monkeypatch):
+    """Test that a local failure while finishing an aborted answer surfaces as a 503, not a 500."""
+    from app import main
+
+    monkeypatch.setattr("app.main.settings.ANTHROPIC_API_KEY", "test-key")
+
+    async def fake_local(messages, temperature=None, model=None, ctx=None, early_abort=True):
+        if early_abort:
+            ctx.early_abort = early_aborts.record(model, 0.2, 6)
+            return {"answer": "", "confidence": 0.2}, 10, {"completion_tokens": 6}
+        raise httpx.ConnectError("ollama went away")
+
+    async def failing_cloud(messages, temperature=None, ctx=None):
+        raise httpx.ConnectError("refused")
+
+    monkeypatch.setattr(main, "try_local", fake_local)
+    monkeypatch.setattr(main, "call_cloud", failing_cloud)
+    with pytest.raises(HTTPException) as exc_info:
+        asyncio.run(main._route([{"role": "user", "content": "hard"}], "regen-key", "conv", "", "m", False, 0.2,
+                                RoutingContext()))
+    assert exc_info.value.status_code == 503
+    assert "ollama went away" in exc_info.value.detail
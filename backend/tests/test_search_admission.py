@@ -0,0 +1,37 @@
+from app.classifier import LogisticModel
+from app.services.search_admission import SearchAdmission
+
+
+def test_keyword_mode_skips_creative_prompts(monkeypatch):
+    """Test that keyword admission skips prompts with no search signal."""
+    monkeypatch.setattr("app.services.search_admission.settings.SEARCH_ADMISSION_MODE", "keyword")
+    admission = SearchAdmission()
+    assert admission.admit("write me a haiku") == (False, "keyword")
+    assert admission.admit("what is the latest news on the election") == (True, "keyword")
+    assert admission.stats()["skip_rate"] == 0.5
+
+
+def test_search_is_shed_under_load(monkeypatch):
+    """Test that search is skipped once the concurrency limit is reached."""
+    monkeypatch.setattr("app.services.search_admission.settings.SEARCH_ADMISSION_MODE", "always")
+    monkeypatch.setattr("app.services.search_admission.settings.SEARCH_ADMISSION_MAX_CONCURRENT", 1)
+    admission = SearchAdmission()
+    with admission.track():
+        assert admission.admit("latest news") == (False, "load")
+    assert admission.admit("latest news") == (True, "always")
+
+
+def test_learned_mode_uses_trained_model(monkeypatch, tmp_path):
+    """Test that a trained classifier file drives admission in learned mode."""
+    model = LogisticModel(n_buckets=256)
+    samples = ["latest stock price today", "current weather now", "write a poem", "tell me a joke"] * 10
+    labels = [1, 1, 0, 0] * 10
+    model.fit([model.features(q) for q in samples], labels, epochs=20)
+    path = tmp_path / "admission.json"
+    model.save(str(path))
+
+    monkeypatch.setattr("app.services.search_admission.settings.SEARCH_ADMISSION_MODE", "learned")
+    monkeypatch.setattr("app.services.search_admission.settings.SEARCH_ADMISSION_MODEL_PATH", str(path))
+    admission = SearchAdmission()
+    assert admission.admit("latest stock price today")[0] is True
+    assert admission.admit("write a poem") == (False, "learned")
@@ -0,0 +1,42 @@
+import asyncio
+
+from app import semantic_cache as sc
+
+VECTORS = {
+    "What's the capital of France?": [1.0, 0.0, 0.1],
+    "what is the capital of france": [0.98, 0.0, 0.12],
+    "write me a haiku": [0.0, 1.0, 0.0],
+}
+
+
+async def _fake_embed(text, model):
+    return VECTORS[text]
+
+
+def _user(text):
+    return [{"role": "user", "content": text}]
+
+
+def test_near_duplicate_prompt_hits(monkeypatch):
+    """Test that a paraphrased prompt is answered from the semantic index."""
+    monkeypatch.setattr(sc.ollama_client, "embed", _fake_embed)
+    cache = sc.SemanticCache(threshold=0.95, max_entries_per_scope=10, max_scopes=10)
+
+    assert asyncio.run(cache.lookup("k1", _user("What's the capital of France?"), "m", 60)) is None
+    cache.store("k1", {"answer": "Paris"})
+
+    assert asyncio.run(cache.lookup("k2", _user("what is the capital of france"), "m", 60)) == {"answer": "Paris"}
+    assert asyncio.run(cache.lookup("k3", _user("write me a haiku"), "m", 60)) is None
+    assert asyncio.run(cache.lookup("k4", _user("what is the capital of france"), "other", 60)) is None
+    assert cache.stats()["hits"] == 1
+
+
+def test_scope_capacity_is_bounded(monkeypatch):
+    """Test that a scope never holds more than its configured entries."""
+    monkeypatch.setattr(sc.ollama_client, "embed", _fake_embed)
+    cache = sc.SemanticCache(threshold=0.95, max_entries_per_scope=2, max_scopes=10)
+    for i, text in enumerate(VECTORS):
+        asyncio.run(cache.lookup(f"k{i}", _user(text), "m", 60))
+        cache.store(f"k{i}", {"answer": text})
+    assert cache.stats()["entries"] == 2
+    assert cache.stats()["evictions"] == 1
@@ -0,0 +1,60 @@
+import asyncio
+
+import pytest
+
+from app.singleflight import SingleFlight
+
+
+def test_concurrent_calls_share_one_execution():
+    """Test that followers receive the leader's result without re-running it."""
+    flight = SingleFlight()
+    calls = 0
+
+    async def work():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return {"answer": "shared"}
+
+    async def main():
+        return await asyncio.gather(*(flight.do("k", work, timeout=1) for _ in range(5)))
+
+    results = asyncio.run(main())
+    assert calls == 1
+    assert all(r == {"answer": "shared"} for r in results)
+    assert flight.stats()["upstream_calls_avoided"] == 4
+    assert flight.stats()["in_flight"] == 0
+
+
+def test_followers_receive_leader_error():
+    """Test that an upstream failure is propagated to every waiter."""
+    flight = SingleFlight()
+
+    async def work():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("upstream down")
+
+    async def main():
+        return await asyncio.gather(*(flight.do("k", work, timeout=1) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(main())
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+
+def test_follower_times_out():
+    """Test that a follower stops waiting after its timeout."""
+    flight = SingleFlight()
+
+    async def work():
+        await asyncio.sleep(0.2)
+        return "late"
+
+    async def main():
+        leader = asyncio.ensure_future(flight.do("k", work, timeout=1))
+        await asyncio.sleep(0)
+        with pytest.raises(asyncio.TimeoutError):
+            await flight.do("k", work, timeout=0.01)
+        return await leader
+
+    assert asyncio.run(main()) == "late"
+    assert flight.stats()["follower_timeouts"] == 1
@@ -0,0 +1,89 @@
+import asyncio
+
+from app import speculation as speculation_module
+from app.speculation import EscalationPredictor, Speculation, SpendWindow
+
+MESSAGES = [{"role": "user", "content": "Review this 400-line diff for bugs"}]
+
+
+def test_predictor_learns_escalation_rate_and_sticky_conversations():
+    """Test that the predictor tracks escalations per bucket and per conversation."""
+    predictor = EscalationPredictor(alpha=0.5)
+    assert predictor.predict(MESSAGES, "m", "c1") == 0.0
+    predictor.record(MESSAGES, "m", "c1", escalated=True)
+    assert predictor.predict(MESSAGES, "m", None) == 1.0
+    predictor.record(MESSAGES, "m", "c2", escalated=False)
+    assert predictor.predict(MESSAGES, "m", None) == 0.5
+    assert predictor.predict([{"role": "user", "content": "hi"}], "m", "c1") == 0.8
+
+
+def test_budget_caps_wasted_speculative_spend(monkeypatch):
+    """Test that discarded speculative calls are charged and stop further speculation."""
+    monkeypatch.setattr("app.speculation.settings.SPECULATIVE_CLOUD_ENABLED", True)
+    monkeypatch.setattr("app.speculation.settings.SPECULATIVE_ESCALATION_THRESHOLD", 0.5)
+    monkeypatch.setattr("app.speculation.settings.SPECULATIVE_BUDGET_USD_PER_HOUR", 0.01)
+    spec = Speculation()
+    spec.predictor.record(MESSAGES, "m", None, escalated=True)
+    assert spec.should_speculate(MESSAGES, "m", None, "tenant-a")
+
+    async def finished_call():
+        return "answer", 10, {"prompt_tokens": 1000, "completion_tokens": 1000}
+
+    async def settle_completed_but_unused():
+        task = asyncio.ensure_future(finished_call())
+        await task
+        spec.settle(task, used=False, messages=MESSAGES, tenant="tenant-a")
+
+    asyncio.run(settle_completed_but_unused())
+    assert spec.stats()["wasted_usd"] == 0.02
+    assert not spec.should_speculate(MESSAGES, "m", None, "tenant-a")
+    assert spec.should_speculate(MESSAGES, "m", None, "tenant-b")
+    assert spec.stats()["skipped_budget"] == 1
+
+
+
+def test_spend_window_caps_rotating_tenants_and_forgets_idle_ones(monkeypatch):
+    """Test that the global cap holds across new tenant ids and expired or excess tenants are dropped."""
+    now = [10_000.0]
+    monkeypatch.setattr(speculation_module.time, "time", lambda: now[0])
+    monkeypatch.setattr(speculation_module, "_MAX_TENANTS", 2)
+    window = SpendWindow()
+    for tenant in ("a", "b", "c"):
+        assert window.allows(tenant, 0.3, tenant_limit=1.0, total_limit=1.0)
+        window.charge(tenant, 0.3)
+    assert not window.allows("fresh-id", 0.3, tenant_limit=1.0, total_limit=1.0)
+    assert list(window._spend) == ["b", "c"]
+
+    now[0] += 3601
+    assert window.spent("b") == 0.0
+    assert "b" not in window._spend
+    window.charge("d", 0.1)
+    assert list(window._spend) == ["d"]
+    assert window.spent_total() == 0.1
+
+def test_confident_local_answer_beats_faster_speculative_call(monkeypatch):
+    """Test that a speculative answer arriving first is discarded, charged and recorded."""
+    from app import main
+    from app.router_service import RoutingContext
+
+    monkeypatch.setattr("app.main.settings.ANTHROPIC_API_KEY", "test-key")
+    monkeypatch.setattr("app.speculation.settings.SPECULATIVE_CLOUD_ENABLED", True)
+    monkeypatch.setattr("app.speculation.settings.SPECULATIVE_ESCALATION_THRESHOLD", 0.5)
+    spec = Speculation()
+    spec.predictor.record(MESSAGES, "m", None, escalated=True)
+    monkeypatch.setattr(main, "speculation", spec)
+
+    async def slow_local(messages, temperature=None, model=None, ctx=None):
+        await asyncio.sleep(0.05)
+        return {"answer": "local answer", "confidence": 0.95}, 50, {"completion_tokens": 10}
+
+    async def fast_cloud(messages, temperature=None, ctx=None):
+        return "cloud answer", 5, {"prompt_tokens": 1000, "completion_tokens": 1000}
+
+    monkeypatch.setattr(main, "try_local", slow_local)
+    monkeypatch.setattr(main, "call_cloud", fast_cloud)
+    resp = asyncio.run(main._route(MESSAGES, "spec-key", "conv", "", "m", False, 0.2, RoutingContext()))
+
+    assert resp["route"] == "local" and resp["choices"][0]["message"]["content"] == "local answer"
+    assert spec.stats()["wasted"] == 1 and spec.stats()["wasted_usd"] == 0.02
+    assert spec.predictor.predict(MESSAGES, "m", None) < 1.0
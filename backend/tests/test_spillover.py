@@ -0,0 +1,47 @@
+import pytest
+
+from app.clients.ollama_pool import ollama_pool
+from app.spillover import LocalLatencyModel, Spillover
+
+MODEL = "llama3.1:8b-instruct-q4_K_M"
+MESSAGES = [{"role": "user", "content": "x" * 400}]  # ~100 prompt tokens
+USAGE = {"prompt_tokens": 100, "completion_tokens": 200}
+TIMINGS = {"prompt_eval": 100, "eval": 4000}  # 1000 tok/s prompt, 50 tok/s eval
+
+
+def test_latency_model_predicts_queue_wait_and_generation():
+    """Test that predictions add queued service time to prompt eval and generation."""
+    model = LocalLatencyModel()
+    assert model.predict_ms(MODEL, 100, 0) is None
+    model.observe(MODEL, USAGE, TIMINGS)
+    assert model.predict_ms(MODEL, 100, 0) == pytest.approx(4100)
+    assert model.predict_ms(MODEL, 100, 2) == pytest.approx(2 * 4100 + 4100)
+
+
+def test_spills_when_queue_misses_slo_within_policy_and_budget(monkeypatch):
+    """Test that a deep local queue spills to cloud unless #no_cloud or the tenant or global budget forbids it."""
+    monkeypatch.setattr("app.spillover.settings.LOCAL_SLO_MS", 10000)
+    monkeypatch.setattr("app.spillover.settings.ANTHROPIC_API_KEY", "test-key")
+    monkeypatch.setattr("app.spillover.settings.SPILLOVER_BUDGET_USD_PER_HOUR", 0.01)
+    spill = Spillover()
+    spill.latency.observe(MODEL, USAGE, TIMINGS)
+
+    backend = ollama_pool.backends[0]
+    assert spill.decide(MESSAGES, MODEL, "t") == {
+        "predicted_local_ms": 4100, "slo_ms": 10000, "queued": 0, "spilled": False,
+    }
+    backend._outstanding.set(3)
+    try:
+        assert spill.decide(MESSAGES, MODEL, "t")["spilled"]
+        no_cloud = spill.decide([{"role": "user", "content": "secret #no_cloud"}], MODEL, "t")
+        assert not no_cloud["spilled"] and no_cloud["blocked"] == "no_cloud"
+
+        spill.charge("t", {"prompt_tokens": 1000, "completion_tokens": 1000})
+        assert spill.decide(MESSAGES, MODEL, "t")["blocked"] == "budget"
+        assert spill.decide(MESSAGES, MODEL, "other")["spilled"]
+
+        monkeypatch.setattr("app.spillover.settings.SPILLOVER_BUDGET_USD_PER_HOUR_TOTAL", 0.02)
+        assert spill.decide(MESSAGES, MODEL, "rotated-id")["blocked"] == "budget"
+    finally:
+        backend._outstanding.set(0)
+    assert spill.stats()["spilled"] == 2
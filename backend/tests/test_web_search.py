@@ -0,0 +1,59 @@
+import asyncio
+
+from app.services.web_search import WebSearchService, normalize_query
+
+
+def test_normalize_query_folds_case_punctuation_and_whitespace():
+    """Test that trivially different queries normalize to the same key."""
+    assert normalize_query("What's  the capital of France?") == normalize_query("what s the capital of france")
+
+
+def test_search_results_are_cached():
+    """Test that a repeated (normalized) query skips the live search but quotes its own wording."""
+    service = WebSearchService()
+    calls = []
+
+    async def fake_search(query, max_results):
+        calls.append(query)
+        return [{"title": "Paris", "url": "https://example.com", "snippet": "Capital"}], True
+
+    service._search_uncached = fake_search
+    results, formatted = asyncio.run(service.search_and_format("Capital of France?", 5))
+    again, formatted_again = asyncio.run(service.search_and_format("capital of   france", 5))
+
+    assert len(calls) == 1
+    assert again == results
+    assert "Paris" in formatted_again
+    assert "'capital of   france'" in formatted_again and "Capital of France?" not in formatted_again
+    assert service.cache_stats()["hits"] == 1
+
+
+def test_empty_results_are_negatively_cached():
+    """Test that an empty result is cached and counted as a negative hit."""
+    service = WebSearchService()
+    calls = []
+
+    async def fake_search(query, max_results):
+        calls.append(query)
+        return [], False
+
+    service._search_uncached = fake_search
+    assert asyncio.run(service.search_and_format("nothing here", 5)) == ([], None)
+    assert asyncio.run(service.search_and_format("nothing here", 5)) == ([], None)
+    assert len(calls) == 1
+    assert service.cache_stats()["negative_hits"] == 1
+
+
+def test_negative_placeholder_quotes_the_current_query():
+    """Test that a cached placeholder result is rebuilt for the query that hit it."""
+    service = WebSearchService()
+
+    async def fake_search(query, max_results):
+        return service._placeholder_results(query), False
+
+    service._search_uncached = fake_search
+    asyncio.run(service.search_and_format("Secret Project X?", 5))
+    results, formatted = asyncio.run(service.search_and_format("secret project x", 5))
+    assert results[0]["title"] == "Search: secret project x"
+    assert "Secret Project X?" not in formatted
+    assert service.cache_stats()["negative_hits"] == 1
@@ -1,14 +1,21 @@
 import { useEffect, useState } from "react";
 
+const WINDOWS = ["15m", "1h", "24h", "7d"];
+
 export default function LogsTable() {
   const [rows, setRows] = useState<any[]>([]);
+  const [stats, setStats] = useState<any | null>(null);
+  const [statsWindow, setStatsWindow] = useState("1h");
   const [loading, setLoading] = useState(true);
 
   const fetchLogs = async () => {
     try {
-      const r = await fetch("/api/logs");
-      const data = await r.json();
-      setRows(data);
+      const [logsRes, statsRes] = await Promise.all([
+        fetch("/api/logs"),
+        fetch(`/api/stats?window=${statsWindow}`),
+      ]);
+      setRows(await logsRes.json());
+      setStats(await statsRes.json());
     } catch (error) {
       console.error("Failed to fetch logs:", error);
     } finally {
@@ -21,7 +28,7 @@ export default function LogsTable() {
     // Refresh every 5 seconds
     const interval = setInterval(fetchLogs, 5000);
     return () => clearInterval(interval);
-  }, []);
+  }, [statsWindow]);
 
   if (loading) {
     return <div className="p-4">Loading logs...</div>;
@@ -38,6 +45,28 @@ export default function LogsTable() {
           Refresh
         </button>
       </div>
+      {stats && (
+        <div className="flex flex-wrap items-center gap-4 mb-3 text-sm text-gray-700">
+          <select
+            value={statsWindow}
+            onChange={(e) => setStatsWindow(e.target.value)}
+            className="border rounded px-2 py-1"
+          >
+            {WINDOWS.map((w) => (
+              <option key={w} value={w}>Last {w}</option>
+            ))}
+          </select>
+          <span>{stats.requests} requests</span>
+          <span>
+            {Math.round((stats.routes?.local?.share ?? 0) * 100)}% local
+          </span>
+          <span>Cost ${stats.cost_usd?.toFixed(4)}</span>
+          <span className="text-green-700">Saved ${stats.saved_usd?.toFixed(4)}</span>
+          <span>
+            p50 {stats.latency_ms?.p50 ?? "-"} ms · p95 {stats.latency_ms?.p95 ?? "-"} ms
+          </span>
+        </div>
+      )}
       <div className="overflow-x-auto">
         <table className="w-full text-sm">
           <thead className="bg-gray-50 border-b">